@@ -0,0 +1,424 @@
+"""
+Benchmark Module
+
+This module implements an offline benchmark suite for the pipeline. It drives
+`orchestrator.orchestrate_async`/`orchestrate_batch` and the individual agents against a
+replaying fake LLM (model_client/replay.py) and a stub `az` executable
+(model_client/fake_az/az), so the pipeline's own overhead can be measured and compared
+between changes without Azure credentials.
+
+Scenarios:
+    single       One query, including packaging and (fake) deployment
+    batch_100    A batch of distinct queries run concurrently (100 by default)
+    fix_heavy    Queries whose first version fails, so every run goes through the fix loop
+    cache_cold   Queries against an empty LLM response cache
+    cache_warm   The same queries after an unmeasured warm-up pass has filled the cache
+    agents       The Developer, QA and Deployment agents called on their own
+    deploy_ledger  One artifact deployed to several apps with `deploy_many`, twice; the
+                 second pass must be skipped by the deployment ledger
+
+Every scenario runs in a fresh interpreter so peak RSS and process-wide state are not shared.
+Reported per scenario: throughput (pipelines/min), p50/p95 latency per stage, model call
+and executor from the telemetry spans, event-loop lag, CPU time of the process and its
+children, and peak RSS. Results are written as JSON; pass `--compare` with an earlier
+result file to print the differences.
+
+Usage:
+    python -m benchmarks.benchmark [--scenario single --scenario fix_heavy] [--latency 0.05]
+                                   [--output benchmarks/results/run.json] [--compare baseline.json]
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import statistics
+from collections import defaultdict
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+SCENARIOS = {
+    "single": {"queries": 1, "recording": "default", "deploy": True},
+    "batch_100": {"queries": None, "recording": "default", "deploy": False},
+    "fix_heavy": {"queries": 20, "recording": "fix_heavy", "deploy": False},
+    # Same failures fixed with error-focused patches instead of whole-file rewrites
+    "fix_patch": {"queries": 20, "recording": "fix_patch", "deploy": False,
+                  "env": {"HIVEMIND_FIX_PATCH_MIN_LINES": "0"}},
+    "cache_cold": {"queries": 20, "recording": "default", "deploy": False},
+    "cache_warm": {"queries": 20, "recording": "default", "deploy": False, "warm_up": True},
+    "agents": {"queries": 20, "recording": "default"},
+    "deploy_ledger": {"apps": 10, "recording": "default"},
+    "solution_index": {"queries": 20, "recording": "default", "deploy": False, "near_duplicates": True},
+}
+# Metrics compared by `--compare`, with the direction that counts as an improvement
+COMPARED_METRICS = {"throughput_per_min": "higher", "wall_s": "lower", "peak_rss_mb": "lower",
+                    "cpu_s": "lower", "loop_lag_p99_ms": "lower"}
+
+
+async def _monitor_loop_lag(samples, interval=0.01):
+    """
+    Records how late the event loop wakes a sleeping task; blocking work shows up as lag.
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+def _queries(count, near_duplicates=False):
+    if near_duplicates:
+        # Rephrasings of a handful of requests, as users tend to submit them
+        phrasings = ["Write a script that prints the Fibonacci numbers up to {n}.",
+                     "write a python script which prints the fibonacci numbers up to {n}",
+                     "Please write a script printing the Fibonacci numbers up to {n}!"]
+        return [phrasings[i % len(phrasings)].format(n=100 + i // len(phrasings) % 4) for i in range(count)]
+    return [f"Write a script that prints the Fibonacci numbers up to {100 + i}." for i in range(count)]
+
+
+def _configure_environment(work_dir, options):
+    """
+    Points every component at the scenario's scratch directory and the fake Azure CLI.
+    """
+    from model_client.replay import FAKE_AZ_DIR
+
+    os.environ.update({
+        "HIVEMIND_WORKSPACE_DIR": os.path.join(work_dir, "runs"),
+        "HIVEMIND_LLM_CACHE_DIR": os.path.join(work_dir, "llm_cache"),
+        "HIVEMIND_TELEMETRY_FILE": os.path.join(work_dir, "telemetry.jsonl"),
+        "HIVEMIND_FAKE_AZ_LOG": os.path.join(work_dir, "az.jsonl"),
+        "HIVEMIND_DEPLOY_LEDGER": os.path.join(work_dir, "deployments.sqlite"),
+        "HIVEMIND_SOLUTION_INDEX_PATH": os.path.join(work_dir, "solutions.sqlite"),
+        "HIVEMIND_ENV_DIR": os.path.join(work_dir, "envs"),
+        "HIVEMIND_FAKE_AZ_LATENCY": str(options["az_latency"]),
+        # Measure the pipeline, not the quota of a real deployment
+        "HIVEMIND_RPM": "1000000",
+        "HIVEMIND_TPM": "1000000000",
+        "HIVEMIND_LLM_CONCURRENCY": str(options["llm_concurrency"]),
+        "AZURE_APP_SERVICE_RG": "benchmark-rg",
+        "AZURE_APP_SERVICE_NAME": "benchmark-app",
+        "PATH": FAKE_AZ_DIR + os.pathsep + os.environ.get("PATH", ""),
+    })
+
+
+async def _run_pipelines(scenario, options, work_dir):
+    from orchestrator import orchestrate_async, orchestrate_batch
+
+    count = scenario["queries"] or options["batch_size"]
+    # The recordings answer the single structured-output call of the "direct" mode; the
+    # assistant mode would need recorded tool calls
+    run_options = {"generation_mode": "direct", "retention": "always"}
+
+    started = time.perf_counter()
+    if count == 1:
+        results = [await orchestrate_async(_queries(1)[0], run_deployment=scenario["deploy"], **run_options)]
+        results[0]["status"] = "ok"
+    else:
+        jsonl_path = os.path.join(work_dir, "queries.jsonl")
+        with open(jsonl_path, "w") as f:
+            f.writelines(json.dumps(query) + "\n" for query in _queries(count, scenario.get("near_duplicates")))
+        results = await orchestrate_batch(jsonl_path, options["concurrency"], run_deployment=scenario["deploy"],
+                                          **run_options)
+    wall_s = time.perf_counter() - started
+
+    return {"pipelines": count, "wall_s": wall_s,
+            "throughput_per_min": count / wall_s * 60,
+            "succeeded": sum(result["status"] == "ok" and result.get("zip_path") is not None for result in results),
+            "fixed": sum(bool(result.get("fixed")) for result in results),
+            "solution_hits": sum(bool(result.get("solution")) for result in results)}
+
+
+async def _run_agents(scenario, options, work_dir):
+    from helper import create_project_zip
+    from telemetry.telemetry import span, run_context
+    from coding_agent.coding_agent import CodeGenratingAgent
+    from qa_tester.qa_tester import QATester
+    from deployment_agent.deployment_agent import DeploymentAgent
+
+    code_dir = os.path.join(work_dir, "agents", "code")
+    os.makedirs(code_dir, exist_ok=True)
+    qa_tester = QATester(work_dir=os.path.join(work_dir, "agents", "execution"))
+    deployment_agent = DeploymentAgent(work_dir=os.path.join(work_dir, "agents", "execution"))
+
+    started = time.perf_counter()
+    for index, query in enumerate(_queries(scenario["queries"])):
+        with run_context(f"agents-{index}"):
+            with span("agent.developer"):
+                code = await CodeGenratingAgent(query).direct_generate()
+            code_path = os.path.join(code_dir, f"code_{index}.py")
+            with open(code_path, "w") as f:
+                f.write(code)
+            with span("agent.qa"):
+                await qa_tester.test_code(code_path)
+            zip_path = os.path.join(work_dir, "agents", f"package_{index}.zip")
+            await asyncio.to_thread(create_project_zip, code_dir, zip_path)
+            with span("agent.deployment"):
+                await deployment_agent.deploy_code(zip_path)
+    wall_s = time.perf_counter() - started
+    return {"pipelines": scenario["queries"], "wall_s": wall_s,
+            "throughput_per_min": scenario["queries"] / wall_s * 60}
+
+
+async def _run_deploys(scenario, options, work_dir):
+    from helper import create_project_zip
+    from deployment_agent.deployment_agent import deploy_many
+
+    project_dir = os.path.join(work_dir, "deploy", "app")
+    os.makedirs(project_dir, exist_ok=True)
+    with open(os.path.join(project_dir, "main.py"), "w") as f:
+        f.write("print('hello')\n")
+    zip_path = os.path.join(work_dir, "deploy", "app.zip")
+    manifest_hash = create_project_zip(project_dir, zip_path)
+    targets = [{"zip_path": zip_path, "artifact_hash": manifest_hash, "resource_group": "benchmark-rg",
+                "app_name": f"benchmark-app-{index}"} for index in range(scenario["apps"])]
+
+    def az_invocations():
+        if not os.path.exists(os.environ["HIVEMIND_FAKE_AZ_LOG"]):
+            return 0
+        with open(os.environ["HIVEMIND_FAKE_AZ_LOG"], "r") as f:
+            return sum(1 for _ in f)
+
+    passes = []
+    started = time.perf_counter()
+    for _ in range(2):
+        pass_started, invocations_before = time.perf_counter(), az_invocations()
+        results = await deploy_many(targets, max_concurrency=options["concurrency"],
+                                    work_dir=os.path.join(work_dir, "deploy", "execution"))
+        passes.append({"wall_s": time.perf_counter() - pass_started,
+                       "deployed": sum(result["status"] == "ok" and not result.get("skipped") for result in results),
+                       "skipped": sum(bool(result.get("skipped")) for result in results),
+                       "errors": sum(result["status"] == "error" for result in results),
+                       "az_invocations": az_invocations() - invocations_before})
+    wall_s = time.perf_counter() - started
+    return {"pipelines": 2 * scenario["apps"], "wall_s": wall_s,
+            "throughput_per_min": 2 * scenario["apps"] / wall_s * 60, "passes": passes}
+
+
+def _span_statistics(telemetry_path):
+    """
+    Aggregates the scenario's spans: latency per stage and model call, token totals and
+    a per-run split of wall time into model calls, executor runs and everything else.
+    """
+    from telemetry.telemetry import summarize
+
+    if not os.path.exists(telemetry_path):
+        return {}, {}
+    summary = summarize(telemetry_path)
+
+    per_run = defaultdict(lambda: {"run_s": 0.0, "llm_s": 0.0, "executor_s": 0.0})
+    with open(telemetry_path, "r") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["run_id"] is None:
+                continue
+            if record["kind"] == "run":
+                per_run[record["run_id"]]["run_s"] = record["wall_s"]
+            elif record["kind"] in ("llm", "executor"):
+                per_run[record["run_id"]][f"{record['kind']}_s"] += record["wall_s"]
+
+    runs = [run for run in per_run.values() if run["run_s"]]
+    breakdown = {}
+    if runs:
+        breakdown = {
+            "run_s_p50": statistics.median(run["run_s"] for run in runs),
+            "llm_s_p50": statistics.median(run["llm_s"] for run in runs),
+            "executor_s_p50": statistics.median(run["executor_s"] for run in runs),
+            # Approximate: parallel fix candidates can make model and executor time overlap
+            "other_s_p50": statistics.median(run["run_s"] - run["llm_s"] - run["executor_s"] for run in runs),
+        }
+    return summary, breakdown
+
+
+async def _measure(name, options, work_dir):
+    from model_client.replay import RECORDINGS_PATH, load_recording, replay_client_factory
+    from model_client.model_client import set_model_client_factory
+    from telemetry.telemetry import reset_telemetry
+    from qa_tester.fix_context import get_fix_stats
+
+    scenario = SCENARIOS[name]
+    _configure_environment(work_dir, options)
+    # Only the solution_index scenario serves stored solutions; the others measure full pipelines
+    os.environ["HIVEMIND_SOLUTION_INDEX"] = "1" if scenario.get("near_duplicates") else "0"
+    os.environ.update(scenario.get("env", {}))
+    reset_telemetry(os.environ["HIVEMIND_TELEMETRY_FILE"])
+    set_model_client_factory(replay_client_factory(
+        load_recording(RECORDINGS_PATH, scenario["recording"]),
+        latency_s=options["latency"], jitter_s=options["jitter"], seed=options["seed"]))
+
+    if scenario.get("warm_up"):
+        await _run_pipelines(scenario, options, work_dir)
+        os.remove(os.environ["HIVEMIND_TELEMETRY_FILE"])
+
+    lag_samples = []
+    monitor = asyncio.create_task(_monitor_loop_lag(lag_samples))
+    cpu_before = resource.getrusage(resource.RUSAGE_SELF)
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    try:
+        runner = {"agents": _run_agents, "deploy_ledger": _run_deploys}.get(name, _run_pipelines)
+        result = await runner(scenario, options, work_dir)
+    finally:
+        monitor.cancel()
+    cpu_after = resource.getrusage(resource.RUSAGE_SELF)
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    stages, breakdown = _span_statistics(os.environ["HIVEMIND_TELEMETRY_FILE"])
+    lag_ms = sorted(sample * 1000 for sample in lag_samples)
+    result.update({
+        "cpu_s": (cpu_after.ru_utime + cpu_after.ru_stime) - (cpu_before.ru_utime + cpu_before.ru_stime),
+        "children_cpu_s": (children_after.ru_utime + children_after.ru_stime)
+                          - (children_before.ru_utime + children_before.ru_stime),
+        "loop_lag_p50_ms": lag_ms[len(lag_ms) // 2] if lag_ms else None,
+        "loop_lag_p99_ms": lag_ms[min(int(len(lag_ms) * 0.99), len(lag_ms) - 1)] if lag_ms else None,
+        "loop_lag_max_ms": lag_ms[-1] if lag_ms else None,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        "peak_rss_mb": cpu_after.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "children_peak_rss_mb": children_after.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "run_breakdown": breakdown,
+        "fixes": get_fix_stats(),
+        "spans": stages,
+    })
+    return result
+
+
+def run_scenario(name, options):
+    """
+    Runs one scenario in the current process.
+
+    Args:
+        name (str): Scenario name, see `SCENARIOS`
+        options (dict): Benchmark options (latency, concurrency, ...)
+
+    Returns:
+        dict: Measurements of the scenario
+    """
+    os.chdir(REPO_DIR)
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    with tempfile.TemporaryDirectory(prefix=f"hivemind-bench-{name}-") as work_dir:
+        return asyncio.run(_measure(name, options, work_dir))
+
+
+def run_isolated(name, options, verbose=False):
+    """
+    Runs one scenario in a fresh interpreter and returns its measurements.
+
+    Args:
+        name (str): Scenario name, see `SCENARIOS`
+        options (dict): Benchmark options
+        verbose (bool, optional): Show the pipeline's output. Defaults to False
+
+    Returns:
+        dict: Measurements of the scenario, or {"error": ...} if it failed
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result_file:
+        result_path = result_file.name
+    try:
+        command = [sys.executable, "-m", "benchmarks.benchmark", "--run-one", name,
+                   "--result-file", result_path, "--options", json.dumps(options)]
+        process = subprocess.run(command, cwd=REPO_DIR, stdout=None if verbose else subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            return {"error": process.stderr[-4000:]}
+        with open(result_path, "r") as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def compare(baseline, current):
+    """
+    Lists the relative change of the headline metrics between two result files.
+
+    Args:
+        baseline (dict): Earlier benchmark results
+        current (dict): New benchmark results
+
+    Returns:
+        list: Lines describing each change, flagged when it is a regression
+    """
+    lines = []
+    for name, result in current["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous or "error" in previous or "error" in result:
+            continue
+        for metric, better in COMPARED_METRICS.items():
+            before, after = previous.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            regression = change < 0 if better == "higher" else change > 0
+            flag = " (regression)" if regression and abs(change) >= 0.05 else ""
+            lines.append(f"{name:<12} {metric:<20} {before:>12.3f} -> {after:>12.3f} {change:+8.1%}{flag}")
+    return lines
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable). Defaults to all")
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency of a fake model call in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Maximum extra latency of a fake model call")
+    parser.add_argument("--az-latency", type=float, default=0.05, help="Latency of a fake az command in seconds")
+    parser.add_argument("--batch-size", type=int, default=100, help="Queries in the batch scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent pipelines in batch scenarios")
+    parser.add_argument("--llm-concurrency", type=int, default=32, help="Initial concurrency of the LLM scheduler")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the fake latency jitter")
+    parser.add_argument("--output", help="Result file. Defaults to benchmarks/results/benchmark-<time>.json")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's output")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    parser.add_argument("--options", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        measurements = run_scenario(args.run_one, json.loads(args.options))
+        with open(args.result_file, "w") as f:
+            json.dump(measurements, f)
+        sys.exit(0)
+
+    options = {"latency": args.latency, "jitter": args.jitter, "az_latency": args.az_latency,
+               "batch_size": args.batch_size, "concurrency": args.concurrency,
+               "llm_concurrency": args.llm_concurrency, "seed": args.seed}
+    results = {"meta": {"commit": _git_commit(), "python": platform.python_version(),
+                        "platform": platform.platform(), "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "options": options},
+               "scenarios": {}}
+    for name in args.scenario or list(SCENARIOS):
+        print(f"Running {name}...")
+        results["scenarios"][name] = run_isolated(name, options, args.verbose)
+        result = results["scenarios"][name]
+        if "error" in result:
+            print(f"  failed:\n{result['error']}")
+        else:
+            print(f"  {result['pipelines']} pipelines in {result['wall_s']:.2f}s "
+                  f"({result['throughput_per_min']:.1f}/min), peak RSS {result['peak_rss_mb']:.0f}MB, "
+                  f"loop lag p99 {result['loop_lag_p99_ms']:.1f}ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print("\n".join(compare(json.load(f), results)))
@@ -0,0 +1,122 @@
+"""
+Import Budget Module
+
+This module checks that the entry points start fast. Each module is imported with
+`python -X importtime` in fresh interpreters, started from a scratch directory so that
+nothing depends on the current working directory, and the median cumulative import time
+is compared with its budget. The agents and their heavy dependencies (autogen, pydantic,
+httpx) must only be imported when a pipeline actually runs, so importing the entry points
+must not load them at all.
+
+The script exits with status 1 when a budget is exceeded or a deferred module is loaded.
+The same rules (with headroom for slower machines) are enforced by
+tests/test_import_budget.py as part of the test suite.
+
+Usage:
+    python -m benchmarks.import_budget [--runs 5] [--budget orchestrator=300] [--top 10]
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Median cumulative import time per module, in milliseconds
+BUDGETS_MS = {
+    "orchestrator": 300,
+    "model_client.model_client": 200,
+}
+# Packages that must not be loaded by importing the modules above
+DEFERRED_PACKAGES = ("autogen_agentchat", "autogen_ext", "autogen_core", "pydantic", "httpx")
+
+
+def measure_import(module, work_dir):
+    """
+    Imports a module in a fresh interpreter with `-X importtime`.
+
+    Args:
+        module (str): Module to import
+        work_dir (str): Working directory of the interpreter
+
+    Returns:
+        dict: "total_ms" (cumulative import time of the module) and "imports" (module name ->
+            cumulative milliseconds of every module loaded)
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.getenv("PYTHONPATH")])))
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=work_dir,
+                             env=environment, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr[-2000:]}")
+
+    imports = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            imports[name.strip()] = int(cumulative) / 1000
+    return {"total_ms": imports[module], "imports": imports}
+
+
+def check_budgets(budgets, runs=5, top=10):
+    """
+    Measures every module and reports the ones over budget.
+
+    Args:
+        budgets (dict): Module -> budget in milliseconds
+        runs (int, optional): Interpreters started per module; the median is compared. Defaults to 5
+        top (int, optional): Slowest imports listed per module. Defaults to 10
+
+    Returns:
+        list: Violations, empty when every module is within budget
+    """
+    violations = []
+    with tempfile.TemporaryDirectory(prefix="hivemind-importtime-") as work_dir:
+        for module, budget in budgets.items():
+            # The first interpreter also compiles the bytecode, so it is not measured
+            measure_import(module, work_dir)
+            measurements = [measure_import(module, work_dir) for _ in range(runs)]
+            median = statistics.median(measurement["total_ms"] for measurement in measurements)
+            imports = measurements[-1]["imports"]
+            status = "ok" if median <= budget else "OVER BUDGET"
+            print(f"{module}: {median:.1f} ms (budget {budget} ms) {status}")
+            slowest = sorted(((ms, name) for name, ms in imports.items() if name != module), reverse=True)[:top]
+            for ms, name in slowest:
+                print(f"    {ms:8.1f} ms  {name}")
+
+            if median > budget:
+                violations.append(f"{module} imports in {median:.1f} ms, over its {budget} ms budget")
+            loaded = sorted({name.split(".")[0] for name in imports} & set(DEFERRED_PACKAGES))
+            if loaded:
+                violations.append(f"{module} imports {', '.join(loaded)}, which must only be imported on first use")
+    return violations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import time of the entry points.")
+    parser.add_argument("--runs", type=int, default=5, help="Measured interpreters per module")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override or add the budget of a module")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports listed per module")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for entry in args.budget:
+        module, budget = entry.split("=")
+        budgets[module] = float(budget)
+
+    violations = check_budgets(budgets, args.runs, args.top)
+    for violation in violations:
+        print(f"FAIL: {violation}")
+    sys.exit(1 if violations else 0)
@@ -12,28 +12,51 @@ Date: 2025-02-04
 """
 
 import os
-import yaml
 import json
 import asyncio
 
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
-from autogen_agentchat.messages import TextMessage
 from autogen_core import CancellationToken
 from autogen_core.models import UserMessage
-from autogen_agentchat.agents import AssistantAgent
+from pydantic import BaseModel, Field
+
+from model_client.model_client import get_model_client
+from prompt_registry.prompt_registry import get_prompt
+from coding_agent.streaming import IncrementalCodeWriter, StreamAborted, strip_code_fences
+from qa_tester.fix_context import PatchError, apply_patch, build_fix_context, record_fix_call, record_fix_fallback
 
 import warnings
 warnings.filterwarnings("ignore")
 
-with open("prompts.yaml", "r") as f:
-    prompts = yaml.safe_load(f)
+class GeneratedCode(BaseModel):
+    """
+    Structured output schema for direct code generation.
+    """
+    code: str = Field(description="Complete, runnable Python source code without markdown fences or explanations")
+
+
+class DefinitionEdit(BaseModel):
+    """
+    One replaced or added definition of a structured fix.
+    """
+    name: str = Field(description='Name of the definition: "function_name", "ClassName" or "ClassName.method_name"')
+    code: str = Field(description="Complete new source of the definition, including decorators")
+
+
+class CodePatch(BaseModel):
+    """
+    Structured output schema for error-focused fixes (see `qa_tester.fix_context`).
+    """
+    edits: list[DefinitionEdit] = Field(description="Definitions to replace or add")
+    imports: list[str] = Field(default_factory=list, description="Import statements the fix needs")
+
 
 class CodeGenratingAgent:
     """
     A class that implements the Developer Agent functionality.
 
     This agent is responsible for:
-    - Generating Python code based on user requirements
+    - Generating Python code based on user requirements, either through an assistant
+      tool call or directly with structured output
     - Refactoring existing code when issues are found
     - Managing interactions with Azure OpenAI's GPT-4 model
 
@@ -41,26 +64,32 @@ class CodeGenratingAgent:
         user_query (str): The user's code requirements or specifications
         developer_agent_prompt (str): Prompt template for code generation
         refactor_code_agent_prompt (str): Prompt template for code refactoring
-        model_client (AzureOpenAIChatCompletionClient): Client for Azure OpenAI API
+        refactor_patch_agent_prompt (str): Prompt template for error-focused structured fixes
+        optimize_code_agent_prompt (str): Prompt template for profile-guided optimization
+        model_client (TracedChatCompletionClient): Shared client for the "developer" role (see model_client.model_client),
+            created on first use
     """
 
-    def __init__(self, user_query=None):
+    def __init__(self, user_query=None, model_client=None):
         """
         Initializes the CodeGenratingAgent with user query and required configurations.
 
         Args:
             user_query (str, optional): User's code requirements. Defaults to None.
+            model_client (optional): Chat client to use. Defaults to the shared "developer" client.
         """
         self.user_query = user_query
-        self.developer_agent_prompt = prompts["DEVELOPER_AGENT"]["prompt"]
-        self.refactor_code_agent_prompt = prompts["REFACTOR_CODE_AGENT"]["prompt"]
-        self.model_client = AzureOpenAIChatCompletionClient(
-            azure_deployment="gpt-4o",
-            azure_endpoint=os.getenv("AZURE_API_BASE"),
-            model="gpt-4o",
-            api_version="2024-08-01-preview",
-            api_key=os.getenv("AZURE_API_KEY"),
-        )
+        self.developer_agent_prompt = get_prompt("DEVELOPER_AGENT")
+        self.refactor_code_agent_prompt = get_prompt("REFACTOR_CODE_AGENT")
+        self.refactor_patch_agent_prompt = get_prompt("REFACTOR_PATCH_AGENT")
+        self.optimize_code_agent_prompt = get_prompt("OPTIMIZE_CODE_AGENT")
+        self._model_client = model_client
+
+    @property
+    def model_client(self):
+        if self._model_client is None:
+            self._model_client = get_model_client("developer")
+        return self._model_client
     
     def initiate_coding_assistant(self):
         """
@@ -69,6 +98,9 @@ class CodeGenratingAgent:
         Returns:
             AssistantAgent: Configured AI assistant for code generation
         """
+        # Only the assistant generation mode needs autogen_agentchat, the slowest import of the agents
+        from autogen_agentchat.agents import AssistantAgent
+
         self.model_assistant = AssistantAgent(name="coding_assistant",
                                               model_client=self.model_client,
                                               tools=[self.code_generator])
@@ -82,9 +114,78 @@ class CodeGenratingAgent:
             dict: Generated code and related metadata
         """
         user_query = self.user_query
-        generated_code = await self.model_client.create([UserMessage(content=self.developer_agent_prompt.format(user_query=user_query), source="user")])
+        generated_code = await self.model_client.create([UserMessage(content=self.developer_agent_prompt.format(user_query=user_query), source="user")],
+                                                          prompt_name="DEVELOPER_AGENT")
         return generated_code
 
+    async def direct_generate(self):
+        """
+        Generates code with a single model call, bypassing the assistant's tool-call round trip.
+
+        The rendered DEVELOPER_AGENT prompt is sent directly and the model is constrained to
+        the `GeneratedCode` schema, so the code comes back without markdown fences.
+
+        Returns:
+            str: Generated Python code
+        """
+        generated_code = await self.model_client.create([UserMessage(content=self.developer_agent_prompt.format(user_query=self.user_query), source="user")],
+                                                          prompt_name="DEVELOPER_AGENT",
+                                                          extra_create_args={"response_format": GeneratedCode})
+        return GeneratedCode.model_validate_json(generated_code.content).code
+
+    async def stream_code(self, prompt, code_path, max_attempts=2, prompt_name=None):
+        """
+        Streams a completion into `code_path`, checking the code as it arrives.
+
+        The completion is abandoned and re-requested as soon as it is clearly not usable
+        Python (see `coding_agent.streaming.IncrementalCodeWriter`). Once the closing
+        markdown fence arrives the remaining tokens are not consumed.
+
+        Args:
+            prompt (str): Rendered prompt
+            code_path (str): File the code is written to
+            max_attempts (int, optional): Completions to try before giving up. Defaults to 2
+            prompt_name (str, optional): Prompt type from prompts.yaml, used for scheduling
+
+        Returns:
+            str: Generated code
+
+        Raises:
+            StreamAborted: If every attempt was abandoned
+        """
+        last_error = None
+        for attempt in range(1, max_attempts + 1):
+            writer = IncrementalCodeWriter(code_path)
+            stream = self.model_client.create_stream([UserMessage(content=prompt, source="user")],
+                                                     prompt_name=prompt_name)
+            try:
+                async for chunk in stream:
+                    if isinstance(chunk, str) and writer.feed(chunk):
+                        break
+                return writer.finish()
+            except StreamAborted as e:
+                print(f"Aborted streamed completion (attempt {attempt}/{max_attempts}): {e}")
+                last_error = e
+            finally:
+                await stream.aclose()
+                writer.close()
+        raise last_error
+
+    async def stream_generate(self, folder_path, file_name):
+        """
+        Generates code for the user query by streaming it straight into the workspace.
+
+        Args:
+            folder_path (str): Directory where the generated code will be saved
+            file_name (str): Name of the file to create (without extension)
+
+        Returns:
+            str: Generated code
+        """
+        os.makedirs(folder_path, exist_ok=True)
+        prompt = self.developer_agent_prompt.format(user_query=self.user_query)
+        return await self.stream_code(prompt, f"{folder_path}/{file_name}.py", prompt_name="DEVELOPER_AGENT")
+
     async def assistant_run(self):
         """
         Executes the main code generation workflow.
@@ -92,6 +193,8 @@ class CodeGenratingAgent:
         Returns:
             TextMessage: Response from the AI assistant containing generated code
         """
+        from autogen_agentchat.messages import TextMessage
+
         self.model_assistant = self.initiate_coding_assistant()
         response = await self.model_assistant.on_messages(
             [TextMessage(content="Write efficient, scalable python code.", source="user")],
@@ -113,7 +216,8 @@ class CodeGenratingAgent:
             code = f.read()
         return code
     
-    async def refactor_code(self, code_file_path, new_folder_path="code_refactor", file_name="code_refactored"):
+    async def refactor_code(self, code_file_path, new_folder_path="code_refactor", file_name="code_refactored",
+                            error_output=None, temperature=None, stream=False):
         """
         Refactors problematic code using the AI model.
 
@@ -121,18 +225,113 @@ class CodeGenratingAgent:
             code_file_path (str): Path to the code file that needs refactoring
             new_folder_path (str, optional): Directory for refactored code. Defaults to "code_refactor"
             file_name (str, optional): Name for refactored file. Defaults to "code_refactored"
+            error_output (str, optional): Output of the failed execution, shown to the model
+            temperature (float, optional): Sampling temperature, used to diversify fix candidates
+            stream (bool, optional): Stream the fix into the file with early abort (see `stream_code`).
+                Defaults to False
 
         Returns:
             tuple: (refactored code content, path to refactored code file)
         """
         new_code_path = f"{new_folder_path}/{file_name}.py"
 
+        os.makedirs(new_folder_path, exist_ok=True)
         buggy_code = self.read_code(code_file_path)
-        refactored_code = await self.model_client.create([UserMessage(content=self.refactor_code_agent_prompt.format(buggy_code=buggy_code), source="user")])
+        extra_create_args = {"temperature": temperature} if temperature is not None else {}
+        refactor_prompt = self.refactor_code_agent_prompt.format(buggy_code=buggy_code,
+                                                                 error_output=error_output or "Not available")
+        if stream:
+            record_fix_call("whole_file")
+            return await self.stream_code(refactor_prompt, new_code_path, prompt_name="REFACTOR_CODE_AGENT"), new_code_path
+
+        refactored_code = await self.model_client.create([UserMessage(content=refactor_prompt, source="user")],
+                                                           prompt_name="REFACTOR_CODE_AGENT",
+                                                           extra_create_args=extra_create_args)
+        record_fix_call("whole_file", refactored_code.usage)
         
-        cleaned_code = refactored_code.content.replace("```", "").replace("python", "")
+        cleaned_code = strip_code_fences(refactored_code.content)
         
         with open(new_code_path, "w") as code_file:
             code_file.write(cleaned_code)
 
-        return cleaned_code, new_code_path
\ No newline at end of file
+        return cleaned_code, new_code_path
+
+    async def fix_code(self, code_file_path, new_folder_path="code_refactor", file_name="code_refactored",
+                       error_output=None, temperature=None, stream=False):
+        """
+        Fixes failing code with an error-focused patch, falling back to a whole-file refactor.
+
+        Only the definitions the error points at, the definitions they use and the traceback
+        are sent (see `qa_tester.fix_context.build_fix_context`); the structured patch that
+        comes back is applied locally. Errors that cannot be located, small files and patches
+        that do not apply go through `refactor_code`.
+
+        Args:
+            code_file_path (str): Path to the failing code
+            new_folder_path (str, optional): Directory for the fixed code. Defaults to "code_refactor"
+            file_name (str, optional): Name for the fixed file. Defaults to "code_refactored"
+            error_output (str, optional): Output of the failed execution
+            temperature (float, optional): Sampling temperature, used to diversify fix candidates
+            stream (bool, optional): Stream whole-file fixes (see `refactor_code`). Defaults to False
+
+        Returns:
+            tuple: (fixed code content, path to fixed code file, "patch" or "whole_file")
+        """
+        buggy_code = self.read_code(code_file_path)
+        context = build_fix_context(buggy_code, code_file_path, error_output)
+        if context is not None:
+            extra_create_args = {"response_format": CodePatch}
+            if temperature is not None:
+                extra_create_args["temperature"] = temperature
+            patch_result = await self.model_client.create([UserMessage(content=self.refactor_patch_agent_prompt.format(**context), source="user")],
+                                                            prompt_name="REFACTOR_PATCH_AGENT",
+                                                            extra_create_args=extra_create_args)
+            record_fix_call("patch", patch_result.usage)
+            try:
+                fixed_code = apply_patch(buggy_code, CodePatch.model_validate_json(patch_result.content).model_dump())
+            except (ValueError, PatchError) as e:
+                record_fix_fallback(e)
+            else:
+                os.makedirs(new_folder_path, exist_ok=True)
+                new_code_path = f"{new_folder_path}/{file_name}.py"
+                with open(new_code_path, "w") as code_file:
+                    code_file.write(fixed_code)
+                return fixed_code, new_code_path, "patch"
+
+        fixed_code, new_code_path = await self.refactor_code(code_file_path, new_folder_path, file_name,
+                                                             error_output=error_output, temperature=temperature,
+                                                             stream=stream)
+        return fixed_code, new_code_path, "whole_file"
+
+    async def optimize_code(self, code_file_path, profile_report, new_folder_path, file_name="code_optimized"):
+        """
+        Rewrites working code for speed and memory, guided by a profile of it.
+
+        Args:
+            code_file_path (str): Path to the working code
+            profile_report (dict): Report from `qa_tester.profiler.profile_code`
+            new_folder_path (str): Directory for the optimized code
+            file_name (str, optional): Name for the optimized file. Defaults to "code_optimized"
+
+        Returns:
+            tuple: (optimized code content, path to optimized code file)
+        """
+        new_code_path = f"{new_folder_path}/{file_name}.py"
+
+        os.makedirs(new_folder_path, exist_ok=True)
+        code = self.read_code(code_file_path)
+        hot_functions = "\n".join(f"{entry['function']} ({entry['file']}:{entry['line']}): {entry['cumulative_s']:.4f}s, "
+                                  f"{entry['calls']} calls" for entry in profile_report["hot_functions"])
+        allocations = "\n".join(f"{entry['site']}: {entry['size_kb']:.1f}KB in {entry['count']} blocks"
+                                for entry in profile_report["allocations"])
+        optimize_prompt = self.optimize_code_agent_prompt.format(code=code, hot_functions=hot_functions or "None",
+                                                                 allocations=allocations or "None")
+        optimized_code = await self.model_client.create([UserMessage(content=optimize_prompt, source="user")],
+                                                          prompt_name="OPTIMIZE_CODE_AGENT")
+
+        cleaned_code = strip_code_fences(optimized_code.content)
+
+        with open(new_code_path, "w") as code_file:
+            code_file.write(cleaned_code)
+
+        return cleaned_code, new_code_path
@@ -0,0 +1,196 @@
+"""
+Streaming Module
+
+This module supports streamed code generation for the Developer Agent. Code is written to
+the workspace as tokens arrive, and the completed top-level statements are syntax checked
+periodically so a completion that has clearly gone wrong (prose instead of code, or code
+that cannot parse) is abandoned early instead of being paid for in full.
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import io
+import re
+import ast
+import tokenize
+
+FENCE_PATTERN = re.compile(r"^\s*```[a-zA-Z0-9_+-]*[ \t]*\n?")
+PROSE_PATTERN = re.compile(r"^(here|sure|certainly|below|this|the|to|i|i'm|of course|note)\b[^\n]*", re.IGNORECASE)
+# Keywords that continue a compound statement rather than starting a new one
+CONTINUATION_KEYWORDS = {"else", "elif", "except", "finally", "case"}
+
+
+class StreamAborted(Exception):
+    """
+    Raised when a streamed completion is judged unusable before it finishes.
+    """
+
+
+def completed_prefix(code):
+    """
+    Returns the part of `code` made of complete top-level statements.
+
+    The code is tokenized so that multi-line strings and brackets are respected; the prefix
+    ends right before the last top-level statement, which may still be incomplete. The
+    decorators of a function or class belong to its statement, so the prefix never ends
+    between them and the definition.
+
+    Args:
+        code (str): Possibly truncated Python source
+
+    Returns:
+        str: Source made of complete top-level statements (may be empty)
+    """
+    lines = code.splitlines(keepends=True)
+    boundary_line = 1
+    depth = 0
+    at_line_start = True
+    in_decorators = False
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.type == tokenize.INDENT:
+                depth += 1
+            elif token.type == tokenize.DEDENT:
+                depth -= 1
+            elif token.type in (tokenize.NL, tokenize.COMMENT, tokenize.ENCODING):
+                continue
+            elif token.type == tokenize.NEWLINE:
+                at_line_start = True
+                continue
+            elif token.type == tokenize.ENDMARKER:
+                break
+            elif at_line_start:
+                at_line_start = False
+                if depth == 0 and token.string not in CONTINUATION_KEYWORDS:
+                    if not in_decorators:
+                        boundary_line = token.start[0]
+                    in_decorators = token.string == "@"
+    except (tokenize.TokenError, IndentationError):
+        pass
+    return "".join(lines[:boundary_line - 1])
+
+
+def strip_code_fences(text):
+    """
+    Removes a markdown fence (with its language tag) around code, leaving the code itself untouched.
+
+    Args:
+        text (str): Model response
+
+    Returns:
+        str: The code between the fences, or the text unchanged if it is not fenced
+    """
+    code = FENCE_PATTERN.sub("", text, count=1) if text.lstrip().startswith("```") else text
+    end = code.find("```")
+    return code[:end] if end != -1 else code
+
+
+class IncrementalCodeWriter:
+    """
+    Writes streamed code to a file and checks it as it grows.
+
+    Markdown fences around the code are removed on the fly, and the stream is reported
+    as complete as soon as the closing fence arrives.
+
+    Attributes:
+        code_path (str): File the code is written to
+        check_every_chars (int): Minimum growth between two syntax checks
+    """
+
+    def __init__(self, code_path, check_every_chars=400):
+        self.code_path = code_path
+        self.check_every_chars = check_every_chars
+        self._raw = ""
+        self._written = ""
+        self._last_check = 0
+        self._closed_fence = False
+        self._file = open(code_path, "w")
+
+    @property
+    def code(self):
+        """
+        The code received so far, without markdown fences.
+        """
+        code = FENCE_PATTERN.sub("", self._raw, count=1) if self._raw.lstrip().startswith("```") else self._raw
+        end = code.find("```")
+        if end != -1:
+            self._closed_fence = True
+            return code[:end]
+        # Hold back a partial closing fence until it is complete
+        return code.rstrip("`") if code.endswith("`") else code
+
+    def feed(self, chunk):
+        """
+        Consumes a chunk of the stream.
+
+        Args:
+            chunk (str): Next piece of the completion
+
+        Returns:
+            bool: True once the closing fence has been received and the rest can be skipped
+
+        Raises:
+            StreamAborted: If the completion is clearly not usable Python
+        """
+        self._raw += chunk
+        code = self.code
+
+        if code.startswith(self._written):
+            self._file.write(code[len(self._written):])
+        else:
+            self._file.seek(0)
+            self._file.truncate()
+            self._file.write(code)
+        self._file.flush()
+        self._written = code
+
+        if len(code) - self._last_check >= self.check_every_chars or self._closed_fence:
+            self.check()
+        return self._closed_fence
+
+    def check(self, complete=False):
+        """
+        Checks the completed part of the code.
+
+        Args:
+            complete (bool, optional): The stream has ended, so the whole code is checked even
+                without a closing fence. Defaults to False
+
+        Raises:
+            StreamAborted: If the code starts with prose or a completed statement does not parse
+        """
+        code = self._written
+        self._last_check = len(code)
+
+        first_line = next((line.strip() for line in code.splitlines() if line.strip()), "")
+        if first_line and PROSE_PATTERN.match(first_line) and not first_line.endswith(("(", "[", "{", ",", "\\")):
+            try:
+                ast.parse(first_line)
+            except SyntaxError:
+                raise StreamAborted(f"completion starts with prose: {first_line[:80]!r}")
+
+        prefix = code if self._closed_fence or complete else completed_prefix(code)
+        try:
+            ast.parse(prefix)
+        except SyntaxError as e:
+            raise StreamAborted(f"syntax error at line {e.lineno}: {e.msg}")
+
+    def finish(self):
+        """
+        Checks the whole code once the stream has ended.
+
+        Returns:
+            str: The code written
+
+        Raises:
+            StreamAborted: If the code does not parse, e.g. because the stream was cut off
+        """
+        self.check(complete=True)
+        return self._written
+
+    def close(self):
+        """
+        Closes the output file.
+        """
+        self._file.close()
@@ -0,0 +1,262 @@
+"""
+Azure CLI Module
+
+This module implements the environment probes and command rendering used by the
+Deployment Agent, replacing LLM calls and shell strings with deterministic checks:
+
+- The CLI is found with a PATH lookup and its version parsed from `az version`
+- Login status comes from `az account get-access-token` and is cached until the token
+  expires or a TTL passes, so consecutive deploys do not re-probe or re-login
+- Deploy commands are rendered from an argument-list template and run without a shell
+- Probe results are shared by every agent in the process; concurrent probes of the same
+  thing wait for a single subprocess
+
+Configuration (environment variables):
+    HIVEMIND_AZ_LOGIN_TTL      Seconds a login status is trusted. Defaults to 300
+    HIVEMIND_DEPLOY_COMMAND    Deploy command template, e.g.
+                               "az webapp deploy --resource-group {resource_group} --name {app_name}
+                               --src-path {zip_file_path} --type zip" (the default)
+    HIVEMIND_AZ_TIMEOUT        Timeout of a CLI command in seconds. Defaults to 600
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import re
+import json
+import time
+import shlex
+import shutil
+import asyncio
+from collections import Counter
+
+from telemetry.telemetry import span
+
+DEFAULT_DEPLOY_COMMAND = ["az", "webapp", "deploy", "--resource-group", "{resource_group}", "--name", "{app_name}",
+                          "--src-path", "{zip_file_path}", "--type", "zip"]
+VERSION_PATTERN = re.compile(r"azure-cli\"?\s*[:\s]\s*\"?(\d+\.\d+\.\d+)")
+# Re-probe a token this long before it expires
+TOKEN_EXPIRY_MARGIN = 60
+
+
+class AzureCLIError(Exception):
+    """
+    Raised when the Azure CLI is missing or a CLI command fails.
+    """
+
+
+def find_az():
+    """
+    Returns the path of the `az` executable on PATH, or None.
+    """
+    return shutil.which("az")
+
+
+def parse_az_version(output):
+    """
+    Extracts the azure-cli version from `az version` (JSON) or `az --version` (text) output.
+
+    Args:
+        output (str): Command output
+
+    Returns:
+        tuple: Version as a tuple of ints, or None if it cannot be found
+    """
+    match = VERSION_PATTERN.search(output)
+    return tuple(int(part) for part in match.group(1).split(".")) if match else None
+
+
+def render_deploy_command(template=None, **values):
+    """
+    Renders the deploy command as an argument list; values are never interpreted by a shell.
+
+    Args:
+        template (list | str, optional): Argument list or command string with {placeholders}.
+            Defaults to $HIVEMIND_DEPLOY_COMMAND or `DEFAULT_DEPLOY_COMMAND`
+        **values: Placeholder values (resource_group, app_name, zip_file_path)
+
+    Returns:
+        list: Command arguments
+    """
+    template = template or os.getenv("HIVEMIND_DEPLOY_COMMAND") or DEFAULT_DEPLOY_COMMAND
+    arguments = shlex.split(template) if isinstance(template, str) else template
+    return [argument.format(**values) for argument in arguments]
+
+
+async def run_az(arguments, timeout=None, cwd=None):
+    """
+    Runs a CLI command from an argument list, without a shell.
+
+    Args:
+        arguments (list): Command and arguments; a leading "az" is resolved on PATH
+        timeout (float, optional): Seconds before the command is killed. Defaults to $HIVEMIND_AZ_TIMEOUT or 600
+        cwd (str, optional): Working directory
+
+    Returns:
+        tuple: (exit code, combined stdout and stderr)
+    """
+    timeout = timeout or float(os.getenv("HIVEMIND_AZ_TIMEOUT", "600"))
+    executable = find_az() if arguments[0] == "az" else arguments[0]
+    if executable is None:
+        raise AzureCLIError("Azure CLI (az) was not found on PATH")
+
+    with span("az", kind="executor", command=" ".join(arguments[1:3])) as az_span:
+        process = await asyncio.create_subprocess_exec(executable, *arguments[1:], cwd=cwd,
+                                                       stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.STDOUT)
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            az_span.set(exit_code=124)
+            return 124, f"Timed out after {timeout}s: {' '.join(arguments)}"
+        except asyncio.CancelledError:
+            # A cancelled (e.g. speculative) probe must not leave the CLI running
+            process.kill()
+            await process.wait()
+            raise
+        az_span.set(exit_code=process.returncode)
+        return process.returncode, stdout.decode("utf-8", errors="replace")
+
+
+class AzureCLIProbe:
+    """
+    Cached probes of the Azure CLI installation and login status.
+
+    Attributes:
+        login_ttl (float): Seconds a login status is trusted
+    """
+
+    def __init__(self, login_ttl=None):
+        """
+        Args:
+            login_ttl (float, optional): Seconds a login status is trusted. Defaults to
+                $HIVEMIND_AZ_LOGIN_TTL or 300
+        """
+        self.login_ttl = login_ttl or float(os.getenv("HIVEMIND_AZ_LOGIN_TTL", "300"))
+        self._cache = {}
+        self._inflight = {}
+        self._waiters = Counter()
+
+    async def _cached(self, name, probe):
+        """
+        Returns a cached probe result, running `probe()` once (even for concurrent callers)
+        when there is none or it expired. `probe` returns (value, seconds it stays valid).
+        A caller that is cancelled does not cancel the probe for the others, but once no
+        caller is waiting for it any more the probe (and its `az` process) is cancelled.
+        """
+        entry = self._cache.get(name)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+
+        loop = asyncio.get_running_loop()
+        key = (name, loop)
+        task = self._inflight.get(key)
+        if task is None:
+            task = loop.create_task(probe())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self._waiters[key] += 1
+        try:
+            value, valid_for = await asyncio.shield(task)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                if not task.done():
+                    task.cancel()
+        self._cache[name] = (time.monotonic() + valid_for, value)
+        return value
+
+    def invalidate(self, name=None):
+        """
+        Forgets one cached probe ("cli" or "login"), or all of them.
+        """
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
+
+    async def cli_status(self):
+        """
+        Finds the CLI and parses its version. Cached for the life of the process.
+
+        Returns:
+            dict: "path" and "version" (tuple), or None if the CLI is not installed
+        """
+        async def probe():
+            path = find_az()
+            if path is None:
+                return None, 0.0
+            exit_code, output = await run_az(["az", "version", "--output", "json"])
+            if exit_code != 0:
+                exit_code, output = await run_az(["az", "--version"])
+            version = parse_az_version(output) if exit_code == 0 else None
+            return {"path": path, "version": version, "output": output}, float("inf")
+
+        return await self._cached("cli", probe)
+
+    async def login_status(self):
+        """
+        Checks whether the CLI holds a valid token, without prompting. Cached until the token
+        expires or the TTL passes, whichever comes first.
+
+        Returns:
+            dict: "logged_in", and "expires_at" (epoch seconds) when known
+        """
+        async def probe():
+            exit_code, output = await run_az(["az", "account", "get-access-token", "--output", "json"])
+            if exit_code != 0:
+                return {"logged_in": False}, 0.0
+            try:
+                token = json.loads(output)
+            except json.JSONDecodeError:
+                return {"logged_in": True}, self.login_ttl
+            expires_at = token.get("expires_on")
+            if expires_at is None:
+                return {"logged_in": True}, self.login_ttl
+            remaining = float(expires_at) - time.time() - TOKEN_EXPIRY_MARGIN
+            return {"logged_in": remaining > 0, "expires_at": float(expires_at)}, max(min(self.login_ttl, remaining), 0.0)
+
+        return await self._cached("login", probe)
+
+    async def ensure_login(self):
+        """
+        Logs in if there is no valid token: with a service principal when AZURE_CLIENT_ID,
+        AZURE_CLIENT_SECRET and AZURE_TENANT_ID are set, interactively otherwise.
+
+        Raises:
+            AzureCLIError: If the login fails
+        """
+        if (await self.login_status())["logged_in"]:
+            return
+
+        client_id, secret, tenant = (os.getenv("AZURE_CLIENT_ID"), os.getenv("AZURE_CLIENT_SECRET"),
+                                     os.getenv("AZURE_TENANT_ID"))
+        if client_id and secret and tenant:
+            arguments = ["az", "login", "--service-principal", "--username", client_id, "--password", secret,
+                         "--tenant", tenant, "--output", "none"]
+        else:
+            arguments = ["az", "login", "--output", "none"]
+        exit_code, output = await run_az(arguments)
+        self.invalidate("login")
+        if exit_code != 0:
+            raise AzureCLIError(f"az login failed with exit code {exit_code}:\n{output[-2000:]}")
+
+
+_probe = None
+
+
+def get_az_probe():
+    """
+    Returns the process-wide Azure CLI probe, so probe results are shared by every agent.
+
+    Returns:
+        AzureCLIProbe: Shared probe
+    """
+    global _probe
+    if _probe is None:
+        _probe = AzureCLIProbe()
+    return _probe
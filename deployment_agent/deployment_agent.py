@@ -5,35 +5,39 @@ This module implements the Infrastructure Agent responsible for deploying code t
 It handles Azure CLI installation, authentication, and automated deployment processes.
 
 The agent manages the entire deployment workflow including:
-- Azure CLI installation and verification
-- Azure authentication
-- Code packaging and deployment to Azure App Service
+- Azure CLI installation and verification (cached probes, see deployment_agent/az_cli.py)
+- Azure authentication (cached login/token status)
+- Code packaging and deployment to Azure App Service with a templated command
+- Skipping deploys of artifacts that are already live (see deployment_agent/ledger.py)
+
+The LLM prompts (AZURE_AVAILABILITY_CHECK, DEPLOYMENT_AGENT) are only used as an opt-in
+fallback, enabled with HIVEMIND_DEPLOY_LLM_FALLBACK=1: to interpret CLI output whose
+version cannot be parsed, and to propose a command when the templated deploy fails.
 
 Author: AI Vectorial
 Date: 2025-02-04
 """
 
 import os
-import yaml
+import shlex
 import platform
 import asyncio
+import subprocess
 from distutils.util import strtobool
 
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
-from autogen_core import CancellationToken
 from autogen_core.models import UserMessage
-from autogen_core.code_executor import CodeBlock
-from autogen_ext.code_executors.local import LocalCommandLineCodeExecutor
 
-from coding_agent.coding_agent import CodeGenratingAgent
+from deployment_agent.az_cli import AzureCLIError, get_az_probe, render_deploy_command, run_az
+from deployment_agent.ledger import get_deployment_ledger
+from workspace.checkpoint import file_sha256
+
+from model_client.model_client import get_model_client
+from prompt_registry.prompt_registry import get_prompt
 
 import warnings
 warnings.filterwarnings("ignore")
 
 
-with open("prompts.yaml", "r") as file:
-    prompts = yaml.safe_load(file)
-
 class DeploymentAgent:
     """
     A class that implements the Infrastructure Agent functionality.
@@ -47,55 +51,80 @@ class DeploymentAgent:
     Attributes:
         resource_group (str): Azure resource group name
         app_name (str): Azure App Service name
-        deployment_agent_prompt (str): Prompt template for deployment
-        model_client (AzureOpenAIChatCompletionClient): Client for Azure OpenAI API
-        code_executor (LocalCommandLineCodeExecutor): Executor for running Azure CLI commands
-        available_status_prompt (str): Prompt template for checking Azure CLI status
+        work_dir (str): Working directory of Azure CLI commands
+        deployment_agent_prompt (str): Prompt template for the LLM deploy command fallback
+        model_client (TracedChatCompletionClient): Shared client for the "deployment" role (see model_client.model_client),
+            created on first use, i.e. only when an LLM fallback runs
+        available_status_prompt (str): Prompt template for the LLM availability fallback
+        ledger (DeploymentLedger): Record of what is deployed to each app
+        probe (AzureCLIProbe): Shared, cached Azure CLI probes
+        llm_fallback (bool): Whether the LLM prompts may be used as a fallback
     """
 
-    def __init__(self):
+    def __init__(self, work_dir="execution_sample", model_client=None, resource_group=None, app_name=None,
+                 ledger=None, llm_fallback=None):
         """
         Initializes the DeploymentAgent with Azure configurations and required clients.
+
+        Args:
+            work_dir (str, optional): Directory for running Azure CLI commands. Defaults to "execution_sample"
+            model_client (optional): Chat client to use. Defaults to the shared "deployment" client.
+            resource_group (str, optional): Target resource group. Defaults to $AZURE_APP_SERVICE_RG
+            app_name (str, optional): Target App Service. Defaults to $AZURE_APP_SERVICE_NAME
+            ledger (DeploymentLedger, optional): Deployment ledger. Defaults to the shared ledger.
+            llm_fallback (bool, optional): Allow the LLM fallbacks. Defaults to $HIVEMIND_DEPLOY_LLM_FALLBACK == "1"
         """
-        self.resource_group = os.getenv("AZURE_APP_SERVICE_RG")
-        self.app_name = os.getenv("AZURE_APP_SERVICE_NAME")
-        self.deployment_agent_prompt = prompts["DEPLOYMENT_AGENT"]["prompt"]
-        self.model_client = AzureOpenAIChatCompletionClient(
-            azure_deployment="gpt-4o",
-            azure_endpoint=os.getenv("AZURE_API_BASE"),
-            model="gpt-4o",
-            api_version="2024-08-01-preview",
-            api_key=os.getenv("AZURE_API_KEY"),
-        )
-        self.code_executor = LocalCommandLineCodeExecutor(work_dir="execution_sample")
-        self.available_status_prompt = prompts["AZURE_AVAILABILITY_CHECK"]["prompt"]
+        self.resource_group = resource_group or os.getenv("AZURE_APP_SERVICE_RG")
+        self.app_name = app_name or os.getenv("AZURE_APP_SERVICE_NAME")
+        self.work_dir = work_dir
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.ledger = ledger or get_deployment_ledger()
+        self.probe = get_az_probe()
+        self.llm_fallback = llm_fallback if llm_fallback is not None else \
+            os.getenv("HIVEMIND_DEPLOY_LLM_FALLBACK", "0") == "1"
+        self.deployment_agent_prompt = get_prompt("DEPLOYMENT_AGENT")
+        self._model_client = model_client
+        self.available_status_prompt = get_prompt("AZURE_AVAILABILITY_CHECK")
+
+    @property
+    def model_client(self):
+        if self._model_client is None:
+            self._model_client = get_model_client("deployment")
+        return self._model_client
 
     async def check_azure_cli(self):
         """
         Verifies Azure CLI installation and version.
 
-        If Azure CLI is not installed, triggers installation process.
-        Validates the installation status using AI assessment.
+        The CLI is looked up on PATH and its version parsed; the result is cached for the
+        process. If Azure CLI is not installed, triggers installation process.
+
+        Returns:
+            dict: CLI "path" and "version"
+
+        Raises:
+            AzureCLIError: If the CLI is still unavailable after installation
         """
-        result = await self.code_executor.execute_code_blocks(code_blocks=[CodeBlock(code="az --version", language="bash")],
-                                                              cancellation_token=CancellationToken())
+        status = await self.probe.cli_status()
+        available = status is not None and status["version"] is not None
+
+        if status is not None and status["version"] is None and self.llm_fallback:
+            available_status = await self.model_client.create([UserMessage(content=self.available_status_prompt.format(result=status["output"]), source="user")],
+                                                               prompt_name="AZURE_AVAILABILITY_CHECK")
+            available = bool(strtobool(available_status.content.strip()))
+
+        if available:
+            return status
+
+        print("Azure CLI not installed. Beginning installation...")
+        installation_status = await asyncio.to_thread(self.install_azure_cli)
+        self.probe.invalidate("cli")
+        status = await self.probe.cli_status()
+        if not installation_status or status is None:
+            raise AzureCLIError("Azure CLI installation failed")
+        print("Azure CLI installed successfully")
+        return status
 
-        available_status = await self.model_client.create([UserMessage(content=self.available_status_prompt.format(result=result.output), source="user")])
-        available_status = bool(strtobool(available_status.content))
-        
-        print(f"checking az version : {available_status}")
-        
-        if available_status:
-            print("Azure CLI installed successfully")
-        else:
-            print("Azure CLI not installed. Beginning installation...")
-            installation_status = self.install_azure_cli()
-            if installation_status:
-                print("Azure CLI installed successfully")
-            else:
-                print("Azure CLI installation failed")
-    
-        
     def install_azure_cli(self):
         """
         Installs Azure CLI based on the operating system.
@@ -105,54 +134,156 @@ class DeploymentAgent:
         Returns:
             bool: True if installation successful, False otherwise
         """
+        commands = {
+            "Windows": [["winget", "install", "--id", "Microsoft.AzureCLI", "-e", "--source", "winget"]],
+            "Darwin": [["brew", "update"], ["brew", "install", "azure-cli"]],
+            "Linux": [["sudo", "apt-get", "update"], ["sudo", "apt-get", "install", "-y", "azure-cli"]],
+        }.get(platform.system())
+        if commands is None:
+            print("Unsupported operating system")
+            return False
+
         try:
-            if platform.system() == "Windows":
-                os.system("winget install --id AzureCLI -e --source winget")
-            elif platform.system() == "Darwin":
-                os.system("brew update && brew install azure-cli")
-            elif platform.system() == "Linux":
-                os.system("sudo apt-get update && sudo apt-get install azure-cli")
-            else:
-                print("Unsupported operating system")
-            
+            for command in commands:
+                subprocess.run(command, check=True)
             return True
-        except Exception as e:
+        except (OSError, subprocess.CalledProcessError) as e:
             print(f"An error occurred during installation: {e}")
             return False
-    
+
     async def check_authentication_status(self):
         """
         Verifies Azure authentication status.
 
-        Initiates Azure login process and validates authentication.
+        Uses the cached token status and only logs in when there is no valid token.
         """
-        await self.code_executor.execute_code_blocks(code_blocks=[CodeBlock(code="az login", language="bash")],
-                                                              cancellation_token=CancellationToken())
-        
+        await self.probe.ensure_login()
         print("Authentication Successful Initiating Deployment...")
 
-    async def deploy_code(self, zip_file_path):
+    async def llm_deploy_command(self, zip_file_path):
+        """
+        Asks the model for a deploy command (opt-in fallback).
+
+        Args:
+            zip_file_path (str): Path to the zipped code package
+
+        Returns:
+            list: Command arguments
+
+        Raises:
+            AzureCLIError: If the proposed command is not an `az` command
+        """
+        deployment_verification = await self.model_client.create([UserMessage(content=self.deployment_agent_prompt.format(resource_group=self.resource_group, app_name=self.app_name, zip_file_path=zip_file_path), source="user")],
+                                                                 prompt_name="DEPLOYMENT_AGENT")
+        arguments = shlex.split(deployment_verification.content.replace("```", "").replace("bash", ""))
+        if not arguments or arguments[0] != "az":
+            raise AzureCLIError(f"The model did not propose an az command: {deployment_verification.content!r}")
+        return arguments
+
+    async def deploy_code(self, zip_file_path, artifact_hash=None, force=False):
         """
         Deploys code package to Azure App Service.
 
         Performs the following steps:
-        1. Verifies Azure CLI installation
-        2. Checks authentication status
-        3. Generates deployment command using AI
-        4. Executes deployment to Azure App Service
+        1. Skips the deploy if the ledger shows this artifact is already live on the app
+        2. Verifies Azure CLI installation
+        3. Checks authentication status
+        4. Renders the deploy command from its template
+        5. Executes deployment to Azure App Service and records it in the ledger
 
         Args:
             zip_file_path (str): Path to the zipped code package
+            artifact_hash (str, optional): Hash identifying the package content, e.g. the manifest
+                hash from `helper.create_project_zip`. Defaults to the SHA-256 of the zip file.
+            force (bool, optional): Deploy even if the artifact is already live. Defaults to False
+
+        Returns:
+            dict: The deployment "command", its "exit_code" and "output", and whether it was "skipped"
+
+        Raises:
+            ValueError: If the target resource group or app name is not configured
         """
+        missing = [name for name, value in (("AZURE_APP_SERVICE_RG", self.resource_group),
+                                            ("AZURE_APP_SERVICE_NAME", self.app_name)) if not value]
+        if missing:
+            raise ValueError(f"Deployment target is not configured, set {' and '.join(missing)}")
+
+        artifact_hash = artifact_hash or file_sha256(zip_file_path)
+        if not force and self.ledger.is_deployed(self.resource_group, self.app_name, artifact_hash):
+            current = self.ledger.current(self.resource_group, self.app_name)
+            print(f"{self.app_name} already runs artifact {artifact_hash[:12]}, skipping deployment")
+            return {"command": current["command"], "exit_code": 0, "output": "", "skipped": True}
+
         await self.check_azure_cli()
         await self.check_authentication_status()
 
-        deployment_verification = await self.model_client.create([UserMessage(content=self.deployment_agent_prompt.format(resource_group=self.resource_group, app_name=self.app_name, zip_file_path=zip_file_path), source="user")])
-        
-        refactored_command = deployment_verification.content.replace("```", "").replace("bash", "")
-        print(f"deployment verification : {refactored_command}")
+        arguments = render_deploy_command(resource_group=self.resource_group, app_name=self.app_name,
+                                          zip_file_path=os.path.abspath(zip_file_path))
+        print(f"Deploying with: {shlex.join(arguments)}")
+        exit_code, output = await run_az(arguments, cwd=self.work_dir)
+
+        if exit_code != 0 and self.llm_fallback:
+            print(f"Templated deploy failed with exit code {exit_code}, asking the model for a command")
+            arguments = await self.llm_deploy_command(os.path.abspath(zip_file_path))
+            exit_code, output = await run_az(arguments, cwd=self.work_dir)
+
+        command = shlex.join(arguments)
+        self.ledger.record(self.resource_group, self.app_name, artifact_hash, zip_file_path, command, exit_code)
+        return {"command": command, "exit_code": exit_code, "output": output[-4000:], "skipped": False}
+
+
+_app_locks = {}
+
+
+def get_app_lock(resource_group, app_name):
+    """
+    Returns the process-wide lock of an app. Every deploy to the app, whether from
+    `deploy_many`, a pipeline run or a service job, holds it, so `az webapp deploy` never
+    runs twice at once against the same app.
+
+    Args:
+        resource_group (str): Resource group of the app
+        app_name (str): App Service name
+
+    Returns:
+        asyncio.Lock: Lock of the app in the running event loop
+    """
+    key = (resource_group, app_name, asyncio.get_running_loop())
+    lock = _app_locks.get(key)
+    if lock is None:
+        lock = _app_locks[key] = asyncio.Lock()
+    return lock
+
+
+async def deploy_many(targets, max_concurrency=4, work_dir="execution_sample", force=False):
+    """
+    Deploys packages to several apps concurrently. Deploys to the same app are serialized
+    and artifacts that are already live are skipped (see `DeploymentAgent.deploy_code`).
+
+    Args:
+        targets (list): Dicts with "zip_path", "resource_group", "app_name" and optionally "artifact_hash"
+        max_concurrency (int, optional): Maximum deploys in flight. Defaults to 4
+        work_dir (str, optional): Directory for Azure CLI commands. Defaults to "execution_sample"
+        force (bool, optional): Deploy even if an artifact is already live. Defaults to False
+
+    Returns:
+        list: One result per target, in input order, with "status" "ok" or "error"
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def deploy_one(target):
+        app_lock = get_app_lock(target["resource_group"], target["app_name"])
+        # Wait for the app before taking a concurrency slot, so waiting deploys do not hold one
+        async with app_lock, semaphore:
+            agent = DeploymentAgent(work_dir=work_dir, resource_group=target["resource_group"],
+                                    app_name=target["app_name"])
+            try:
+                result = await agent.deploy_code(target["zip_path"], target.get("artifact_hash"), force=force)
+            except Exception as e:
+                return {**target, "status": "error", "error": str(e)}
+            return {**target, **result, "status": "ok" if result["exit_code"] == 0 else "error"}
 
-        os.system(refactored_command)
+    return await asyncio.gather(*(deploy_one(target) for target in targets))
         
 # if __name__ == "__main__":
 #     import asyncio
@@ -0,0 +1,161 @@
+"""
+Deployment Ledger Module
+
+This module implements a local ledger of deployments, stored in SQLite and keyed by
+(resource group, app name). Each deploy records the hash of the artifact it uploaded and
+its result, so that deploying an artifact that is already live becomes a no-op instead of
+an Azure CLI round trip and a full upload. Every attempt is also kept in a history table.
+
+Configuration (environment variables):
+    HIVEMIND_DEPLOY_LEDGER   SQLite file. Defaults to "<HIVEMIND_WORKSPACE_DIR or runs>/deployments.sqlite"
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deployments (
+    resource_group TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    artifact_hash TEXT NOT NULL,
+    zip_path TEXT,
+    command TEXT,
+    exit_code INTEGER NOT NULL,
+    deployed_at REAL NOT NULL,
+    PRIMARY KEY (resource_group, app_name)
+);
+CREATE TABLE IF NOT EXISTS deployment_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    resource_group TEXT NOT NULL,
+    app_name TEXT NOT NULL,
+    artifact_hash TEXT NOT NULL,
+    zip_path TEXT,
+    command TEXT,
+    exit_code INTEGER NOT NULL,
+    deployed_at REAL NOT NULL
+);
+"""
+
+
+class DeploymentLedger:
+    """
+    Records what is deployed to each app.
+
+    Attributes:
+        path (str): SQLite file of the ledger
+    """
+
+    def __init__(self, path=None):
+        """
+        Opens (and creates if needed) the ledger.
+
+        Args:
+            path (str, optional): SQLite file. Defaults to $HIVEMIND_DEPLOY_LEDGER or
+                "<HIVEMIND_WORKSPACE_DIR or runs>/deployments.sqlite"
+        """
+        self.path = path or os.getenv("HIVEMIND_DEPLOY_LEDGER") or os.path.join(
+            os.getenv("HIVEMIND_WORKSPACE_DIR", "runs"), "deployments.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    def current(self, resource_group, app_name):
+        """
+        Returns the last deployment recorded for an app.
+
+        Args:
+            resource_group (str): Azure resource group
+            app_name (str): Azure App Service name
+
+        Returns:
+            dict: Artifact hash, zip path, command, exit code and time, or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT * FROM deployments WHERE resource_group = ? AND app_name = ?",
+                (resource_group, app_name)).fetchone()
+        return dict(row) if row else None
+
+    def is_deployed(self, resource_group, app_name, artifact_hash):
+        """
+        Checks whether an artifact is what is currently live on an app.
+
+        Args:
+            resource_group (str): Azure resource group
+            app_name (str): Azure App Service name
+            artifact_hash (str): Hash of the artifact to deploy
+
+        Returns:
+            bool: True if the last deployment to the app succeeded with the same artifact
+        """
+        current = self.current(resource_group, app_name)
+        return bool(current and current["artifact_hash"] == artifact_hash and current["exit_code"] == 0)
+
+    def record(self, resource_group, app_name, artifact_hash, zip_path, command, exit_code):
+        """
+        Records a deployment attempt.
+
+        Args:
+            resource_group (str): Azure resource group
+            app_name (str): Azure App Service name
+            artifact_hash (str): Hash of the deployed artifact
+            zip_path (str): Uploaded archive
+            command (str): Command that was run
+            exit_code (int): Exit code of the command
+        """
+        values = (resource_group, app_name, artifact_hash, zip_path, command, exit_code, time.time())
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO deployments (resource_group, app_name, artifact_hash, zip_path, command, "
+                "exit_code, deployed_at) VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+            self._connection.execute(
+                "INSERT INTO deployment_history (resource_group, app_name, artifact_hash, zip_path, command, "
+                "exit_code, deployed_at) VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+
+    def history(self, resource_group=None, app_name=None, limit=100):
+        """
+        Returns past deployment attempts, most recent first.
+
+        Args:
+            resource_group (str, optional): Only this resource group
+            app_name (str, optional): Only this app
+            limit (int, optional): Maximum number of attempts. Defaults to 100
+
+        Returns:
+            list: Deployment attempts as dicts
+        """
+        query = "SELECT * FROM deployment_history WHERE (? IS NULL OR resource_group = ?) " \
+                "AND (? IS NULL OR app_name = ?) ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._connection.execute(
+                query, (resource_group, resource_group, app_name, app_name, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_ledger = None
+
+
+def get_deployment_ledger():
+    """
+    Returns the process-wide deployment ledger, opening it on first use.
+
+    Returns:
+        DeploymentLedger: Shared ledger
+    """
+    global _ledger
+    if _ledger is None:
+        _ledger = DeploymentLedger()
+    return _ledger
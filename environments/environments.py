@@ -0,0 +1,408 @@
+"""
+Dependency Environments Module
+
+This module gives generated code the third-party packages it imports. Requirements are
+inferred from the code's imports, pinned, and installed into a virtual environment that
+is cached under a key derived from the pinned requirement set (plus the Python version
+and platform). Runs whose code needs the same packages reuse the environment without
+installing anything; code that only uses the standard library runs on the host
+interpreter.
+
+Environments are only built offline by default: with a wheelhouse configured, packages
+are installed with `--no-index` from it. Without one, code runs on the host interpreter
+unless HIVEMIND_DEPENDENCY_ENVS=1 allows installing from the package index. The exact versions installed (including
+transitive dependencies) are recorded with the environment and written to the package's
+`requirements.txt`.
+
+Configuration (environment variables):
+    HIVEMIND_DEPENDENCY_ENVS   "1" to build environments, from the package index if no wheelhouse is set;
+                               "0" to always run on the host interpreter (requirements.txt is still
+                               written). Defaults to building them only when HIVEMIND_WHEELHOUSE is set
+    HIVEMIND_ENV_DIR           Environment cache directory. Defaults to ".hivemind_envs"
+    HIVEMIND_WHEELHOUSE        Directory of wheels to install from, offline
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import time
+import venv
+import shutil
+import asyncio
+import hashlib
+import functools
+import threading
+import subprocess
+from collections import Counter
+import importlib.metadata
+
+ENVIRONMENT_FILE = "environment.json"
+# Import names whose distribution is named differently; other names are looked up in the
+# host environment and fall back to the import name
+IMPORT_TO_DISTRIBUTION = {
+    "attr": "attrs",
+    "bs4": "beautifulsoup4",
+    "cv2": "opencv-python",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "jwt": "PyJWT",
+    "multipart": "python-multipart",
+    "PIL": "pillow",
+    "sklearn": "scikit-learn",
+    "yaml": "PyYAML",
+}
+# Packages needed to serve code that imports the key, e.g. FastAPI apps are run by uvicorn
+IMPLIED_REQUIREMENTS = {"fastapi": ["uvicorn"], "starlette": ["uvicorn"]}
+# Packages that come with every virtual environment and are not written to requirements.txt
+BOOTSTRAP_PACKAGES = {"pip", "setuptools", "wheel"}
+MODULES_SCRIPT = ("import json, pkgutil, sysconfig; paths = sysconfig.get_paths(); "
+                  "print(json.dumps(sorted({m.name for m in pkgutil.iter_modules([paths['purelib'], paths['platlib']])})))")
+
+
+class EnvironmentBuildError(Exception):
+    """
+    Raised when a dependency environment cannot be created or its packages installed.
+    """
+
+
+def canonical_name(name):
+    """
+    Normalizes a distribution name as pip does ("Py_YAML" -> "py-yaml").
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _version_key(version):
+    return [int(part) for part in re.findall(r"\d+", version)]
+
+
+@functools.lru_cache(maxsize=None)
+def _host_distributions():
+    # Scans every installed distribution, which takes tens of milliseconds, so it is done once
+    return importlib.metadata.packages_distributions()
+
+
+def infer_requirements(code_file_path):
+    """
+    Infers the distributions a code file needs from its imports.
+
+    Standard library modules and modules next to the file are skipped.
+
+    Args:
+        code_file_path (str): Path to the code file
+
+    Returns:
+        list: Sorted distribution names
+
+    Raises:
+        SyntaxError: If the code cannot be parsed
+    """
+    with open(code_file_path, "r") as f:
+        tree = ast.parse(f.read(), filename=code_file_path)
+    code_dir = os.path.dirname(os.path.abspath(code_file_path))
+
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.add(node.module.split(".")[0])
+
+    host_distributions = _host_distributions()
+    requirements = set()
+    for module in modules:
+        if module in sys.stdlib_module_names or module in sys.builtin_module_names or module == "__future__":
+            continue
+        if os.path.exists(os.path.join(code_dir, f"{module}.py")) or os.path.isdir(os.path.join(code_dir, module)):
+            continue
+        distribution = IMPORT_TO_DISTRIBUTION.get(module) or host_distributions.get(module, [module])[0]
+        requirements.add(distribution)
+        requirements.update(IMPLIED_REQUIREMENTS.get(module, ()))
+    return sorted(requirements, key=canonical_name)
+
+
+def _wheelhouse_versions(wheelhouse):
+    """
+    Lists the versions available per distribution in a wheelhouse (wheels and sdists).
+    """
+    versions = {}
+    if not wheelhouse or not os.path.isdir(wheelhouse):
+        return versions
+    for file_name in os.listdir(wheelhouse):
+        if file_name.endswith(".whl"):
+            name, version = file_name.split("-")[:2]
+        elif file_name.endswith((".tar.gz", ".zip")):
+            name, _, version = file_name.rsplit(".tar.gz" if file_name.endswith(".tar.gz") else ".zip", 1)[0].rpartition("-")
+        else:
+            continue
+        versions.setdefault(canonical_name(name), []).append(version)
+    return versions
+
+
+def resolve_requirements(requirements, wheelhouse=None):
+    """
+    Pins requirements to the newest version in the wheelhouse, else to the host's version.
+    Requirements available in neither are left unpinned.
+
+    Args:
+        requirements (list): Distribution names
+        wheelhouse (str, optional): Directory of wheels
+
+    Returns:
+        list: Requirement specifiers, e.g. ["fastapi==0.115.7", "uvicorn==0.34.0"]
+    """
+    available = _wheelhouse_versions(wheelhouse)
+    pinned = []
+    for name in requirements:
+        versions = available.get(canonical_name(name))
+        if versions:
+            version = max(versions, key=_version_key)
+        else:
+            try:
+                version = importlib.metadata.version(name)
+            except importlib.metadata.PackageNotFoundError:
+                version = None
+        pinned.append(f"{name}=={version}" if version else name)
+    return pinned
+
+
+def environment_key(pinned):
+    """
+    Returns the cache key of an environment for a pinned requirement set.
+    """
+    payload = {"requirements": sorted(pinned, key=str.lower), "python": list(sys.version_info[:2]),
+               "platform": sys.platform}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DependencyEnvironment:
+    """
+    A cached virtual environment with the packages a piece of code needs.
+
+    Attributes:
+        key (str): Hash of the pinned requirement set
+        path (str): Environment directory
+        requirements (list): Pinned requirements it was built for
+        lock (list): Every package installed, as "name==version"
+        modules (set): Top-level modules importable from its site-packages
+    """
+
+    def __init__(self, path, state):
+        self.path = path
+        self.key = state["key"]
+        self.requirements = state["requirements"]
+        self.lock = state["lock"]
+        self.modules = set(state["modules"])
+
+    @property
+    def python(self):
+        """
+        Path of the environment's interpreter.
+        """
+        return os.path.join(self.path, "Scripts" if sys.platform == "win32" else "bin",
+                            "python.exe" if sys.platform == "win32" else "python")
+
+    @property
+    def context(self):
+        """
+        The `venv` context of the environment, as expected by `LocalCommandLineCodeExecutor(virtual_env_context=...)`.
+        """
+        return venv.EnvBuilder(with_pip=True).ensure_directories(self.path)
+
+
+class EnvironmentCache:
+    """
+    Builds dependency environments on demand and reuses them by requirement set.
+
+    Attributes:
+        root (str): Directory holding the environments
+        wheelhouse (str): Directory of wheels installs are restricted to, or None
+        stats (Counter): "hits", "builds" and "build_s"
+    """
+
+    def __init__(self, root=None, wheelhouse=None):
+        """
+        Args:
+            root (str, optional): Cache directory. Defaults to $HIVEMIND_ENV_DIR or ".hivemind_envs"
+            wheelhouse (str, optional): Directory of wheels. Defaults to $HIVEMIND_WHEELHOUSE
+        """
+        self.root = os.path.abspath(root or os.getenv("HIVEMIND_ENV_DIR", ".hivemind_envs"))
+        self.wheelhouse = wheelhouse or os.getenv("HIVEMIND_WHEELHOUSE")
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _load(self, path):
+        state_path = os.path.join(path, ENVIRONMENT_FILE)
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, "r") as f:
+            return DependencyEnvironment(path, json.load(f))
+
+    def ensure(self, pinned):
+        """
+        Returns the environment for a pinned requirement set, building it if needed. Blocks
+        while building; concurrent callers for the same set wait for a single build.
+
+        Args:
+            pinned (list): Requirement specifiers (see `resolve_requirements`)
+
+        Returns:
+            DependencyEnvironment: Environment with the requirements installed
+
+        Raises:
+            EnvironmentBuildError: If creating the environment or installing a package fails
+        """
+        key = environment_key(pinned)
+        path = os.path.join(self.root, key[:16])
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            environment = self._load(path)
+            if environment is not None:
+                self.stats["hits"] += 1
+                # The modification time records the last use, for `prune`
+                os.utime(path)
+                return environment
+
+            started = time.perf_counter()
+            # Built next to its final location and renamed into place, so a partial build is never reused
+            build_path = f"{path}.build-{os.getpid()}-{threading.get_ident()}"
+            shutil.rmtree(build_path, ignore_errors=True)
+            try:
+                self._build(build_path, key, pinned)
+                try:
+                    os.rename(build_path, path)
+                except OSError:
+                    # Another process finished the same environment first
+                    shutil.rmtree(build_path, ignore_errors=True)
+            except BaseException:
+                shutil.rmtree(build_path, ignore_errors=True)
+                raise
+            self.stats["builds"] += 1
+            self.stats["build_s"] += time.perf_counter() - started
+            print(f"Built dependency environment {key[:12]} ({', '.join(pinned)}) in {time.perf_counter() - started:.1f}s")
+            return self._load(path)
+
+    def prune(self, max_age_seconds):
+        """
+        Deletes the environments that were not used for a while.
+
+        Args:
+            max_age_seconds (float): Delete environments last used longer ago than this
+
+        Returns:
+            list: Directory names of the deleted environments
+        """
+        if not os.path.isdir(self.root):
+            return []
+        removed = []
+        now = time.time()
+        with self._lock:
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                # Environments being built are left to their builder
+                if ".build-" in name or not os.path.isdir(path):
+                    continue
+                if now - os.path.getmtime(path) > max_age_seconds:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed.append(name)
+        return removed
+
+    def _build(self, path, key, pinned):
+        try:
+            venv.EnvBuilder(with_pip=True).create(path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise EnvironmentBuildError(f"Could not create a virtual environment in {path}: {e}") from e
+        python = DependencyEnvironment(path, {"key": key, "requirements": pinned, "lock": [], "modules": []}).python
+
+        install = [python, "-m", "pip", "install", "--disable-pip-version-check", "--no-input", "--quiet"]
+        if self.wheelhouse:
+            install += ["--no-index", "--find-links", self.wheelhouse]
+        self._pip(install + list(pinned))
+        frozen = self._pip([python, "-m", "pip", "freeze", "--disable-pip-version-check"])
+        lock = [line for line in frozen.splitlines()
+                if line and "==" in line and canonical_name(line.split("==")[0]) not in BOOTSTRAP_PACKAGES]
+        modules = json.loads(self._pip([python, "-c", MODULES_SCRIPT]))
+
+        with open(os.path.join(path, ENVIRONMENT_FILE), "w") as f:
+            json.dump({"key": key, "requirements": pinned, "lock": lock, "modules": modules,
+                       "created_at": time.time()}, f, indent=2)
+
+    @staticmethod
+    def _pip(command):
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            raise EnvironmentBuildError(f"`{' '.join(command[1:])}` failed with exit code {process.returncode}:\n"
+                                        f"{(process.stdout + process.stderr)[-4000:]}")
+        return process.stdout
+
+
+_environment_cache = None
+
+
+def get_environment_cache():
+    """
+    Returns the process-wide environment cache, creating it on first use.
+
+    Returns:
+        EnvironmentCache: Shared cache, or None if environments are disabled (see HIVEMIND_DEPENDENCY_ENVS)
+    """
+    global _environment_cache
+    # Installing from the package index downloads packages, so it is opt-in; a wheelhouse stays offline
+    enabled = os.getenv("HIVEMIND_DEPENDENCY_ENVS", "1" if os.getenv("HIVEMIND_WHEELHOUSE") else "0")
+    if enabled == "0":
+        return None
+    if _environment_cache is None:
+        _environment_cache = EnvironmentCache()
+    return _environment_cache
+
+
+async def prepare_environment(code_file_path):
+    """
+    Infers, pins and installs the requirements of a code file without blocking the event loop.
+
+    Args:
+        code_file_path (str): Path to the code file
+
+    Returns:
+        tuple: (DependencyEnvironment, or None when the code needs no packages or environments
+            are disabled; pinned requirements)
+
+    Raises:
+        SyntaxError: If the code cannot be parsed
+        EnvironmentBuildError: If the environment cannot be built
+    """
+    cache = get_environment_cache()
+    wheelhouse = cache.wheelhouse if cache else os.getenv("HIVEMIND_WHEELHOUSE")
+    # Parsing the code and looking up installed versions reads files, so it runs off the loop too
+    pinned = await asyncio.to_thread(lambda: resolve_requirements(infer_requirements(code_file_path), wheelhouse))
+    if cache is None or not pinned:
+        return None, pinned
+    environment = await asyncio.to_thread(cache.ensure, pinned)
+    return environment, pinned
+
+
+def write_requirements(folder_path, environment=None, pinned=()):
+    """
+    Writes requirements.txt for a package: the environment's full lock if there is one,
+    otherwise the pinned direct requirements.
+
+    Args:
+        folder_path (str): Folder being packaged
+        environment (DependencyEnvironment, optional): Environment the code was tested in
+        pinned (list, optional): Pinned direct requirements
+
+    Returns:
+        str: Path of requirements.txt
+    """
+    lines = environment.lock if environment is not None else list(pinned)
+    requirements_path = os.path.join(folder_path, "requirements.txt")
+    with open(requirements_path, "w") as f:
+        f.writelines(f"{line}\n" for line in lines)
+    return requirements_path
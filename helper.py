@@ -9,30 +9,128 @@ Date: 2025-02-04
 """
 
 import os
+import json
 import shutil
+import fnmatch
+import hashlib
+import zipfile
 
-def create_project_zip(code_file_path):
+from workspace.checkpoint import file_sha256
+
+# Names never packaged: caches, secrets and virtual environments
+DEFAULT_ZIP_IGNORE = ["__pycache__", "*.pyc", "*.pyo", ".env", ".env.*", ".venv", "venv", "env",
+                      ".git", ".pytest_cache", ".mypy_cache", ".ruff_cache", ".DS_Store"]
+# Fixed timestamp for archive entries, so identical content gives an identical archive
+ZIP_ENTRY_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def iter_project_files(folder_path, ignore=None):
+    """
+    Walks a project directory in a stable order, skipping ignored files and directories.
+
+    Directories containing a `pyvenv.cfg` are treated as virtual environments and skipped.
+
+    Args:
+        folder_path (str): Project directory
+        ignore (list, optional): Extra glob patterns, matched against file and directory names
+
+    Yields:
+        tuple: (path relative to the project, absolute path)
     """
-    Creates a ZIP archive of a project directory.
+    patterns = DEFAULT_ZIP_IGNORE + list(ignore or [])
 
-    Useful for preparing code for deployment to cloud services.
+    def ignored(name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+    for current, directories, files in os.walk(folder_path):
+        directories[:] = sorted(d for d in directories
+                                if not ignored(d) and not os.path.exists(os.path.join(current, d, "pyvenv.cfg")))
+        for name in sorted(files):
+            if not ignored(name):
+                path = os.path.join(current, name)
+                yield os.path.relpath(path, folder_path).replace(os.sep, "/"), path
+
+
+def build_manifest(folder_path, ignore=None, exclude=()):
+    """
+    Computes the content hash of every file that would be packaged.
+
+    Args:
+        folder_path (str): Project directory
+        ignore (list, optional): Extra glob patterns to skip
+        exclude (iterable, optional): Absolute paths to leave out (e.g. the archive itself)
+
+    Returns:
+        tuple: (manifest hash, {relative path: sha256})
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    files = {relative_path: file_sha256(path) for relative_path, path in iter_project_files(folder_path, ignore)
+             if os.path.abspath(path) not in excluded}
+    manifest_hash = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8")).hexdigest()
+    return manifest_hash, files
+
+
+def create_project_zip(code_file_path, zip_path=None, ignore=None):
+    """
+    Creates a ZIP archive of a project directory, reusing the previous archive when the
+    content is unchanged.
+
+    Files are streamed into the archive in chunks, with ignore rules applied (caches,
+    `.env` files, virtual environments). A manifest of per-file content hashes is stored
+    next to the archive (`<zip_path>.manifest.json`); when the manifest matches and the
+    archive is intact, nothing is rewritten. Entries have fixed timestamps, so identical
+    content always produces an identical archive.
 
     Args:
         code_file_path (str): Path to the directory to zip
+        zip_path (str, optional): Path of the archive to create. Defaults to "<code_file_path>.zip"
+        ignore (list, optional): Extra glob patterns to skip. $HIVEMIND_ZIP_IGNORE
+            (comma separated) is added to them.
 
     Returns:
-        bool: True if ZIP creation successful
+        str: Manifest hash identifying the packaged content
+
+    Raises:
+        FileNotFoundError: If the directory does not exist
+        ValueError: If nothing is left to package after the ignore rules
     """
-    if not os.path.exists(code_file_path):  # Check the actual folder existence
-        print(f"The directory {code_file_path} does not exist.")
-    
-    zip_path = f"{code_file_path}.zip"
-    
+    if not os.path.isdir(code_file_path):
+        raise FileNotFoundError(f"The directory {code_file_path} does not exist.")
+
+    zip_path = zip_path or f"{code_file_path}.zip"
+    manifest_path = f"{zip_path}.manifest.json"
+    ignore = list(ignore or []) + [p for p in os.getenv("HIVEMIND_ZIP_IGNORE", "").split(",") if p]
+
+    manifest_hash, files = build_manifest(code_file_path, ignore, exclude=(zip_path, manifest_path))
+    if not files:
+        raise ValueError(f"Nothing to package in {code_file_path} after applying the ignore rules.")
+
+    if os.path.exists(zip_path) and os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            previous = json.load(f)
+        if previous.get("manifest_hash") == manifest_hash and previous.get("archive_size") == os.path.getsize(zip_path):
+            print(f"Reusing unchanged zip file: {zip_path}")
+            return manifest_hash
+
     print(f"Creating zip file from {code_file_path}...")
-    shutil.make_archive(code_file_path, 'zip', code_file_path)  # Create ZIP archive
+    temporary_path = f"{zip_path}.tmp"
+    with zipfile.ZipFile(temporary_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for relative_path, path in iter_project_files(code_file_path, ignore):
+            if relative_path not in files:
+                continue
+            entry = zipfile.ZipInfo(relative_path, date_time=ZIP_ENTRY_DATE)
+            entry.external_attr = (os.stat(path).st_mode & 0o777) << 16
+            entry.compress_type = zipfile.ZIP_DEFLATED
+            with open(path, "rb") as source, archive.open(entry, "w") as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+    os.replace(temporary_path, zip_path)
+
+    with open(manifest_path, "w") as f:
+        json.dump({"manifest_hash": manifest_hash, "archive_size": os.path.getsize(zip_path), "files": files},
+                  f, indent=2)
     print(f"Zip file created successfully: {zip_path}")
-    
-    return True
+
+    return manifest_hash
 
 def write_code_to_path(folder_path, file_name, content):
     """
@@ -49,8 +147,7 @@ def write_code_to_path(folder_path, file_name, content):
     Returns:
         str: Message confirming the file creation with path
     """
-    if not os.path.exists(folder_path):
-        os.mkdir(folder_path)
+    os.makedirs(folder_path, exist_ok=True)
 
     with open(f"{folder_path}/{file_name}.py", "w") as file:
         file.write(content)
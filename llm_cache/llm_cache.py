@@ -0,0 +1,244 @@
+"""
+LLM Cache Module
+
+This module provides a content-addressed, on-disk cache for chat completion responses.
+Identical prompts sent to the same model deployment are answered from a local store
+instead of making another paid round trip to Azure OpenAI.
+
+Entries are keyed by a hash of (model, deployment, api_version, rendered prompt) and are
+kept in a size and TTL bounded store with least-recently-used eviction. Caching is opted
+in or out per prompt type through the `cache` flag of each entry in prompts.yaml.
+
+Configuration (environment variables):
+    HIVEMIND_LLM_CACHE          Set to "0" to disable caching entirely
+    HIVEMIND_LLM_CACHE_DIR      Cache directory. Defaults to ".llm_cache"
+    HIVEMIND_LLM_CACHE_SIZE_MB  Maximum size of the store. Defaults to 256
+    HIVEMIND_LLM_CACHE_TTL      Entry lifetime in seconds. Defaults to 7 days
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import json
+import hashlib
+from collections import Counter
+
+from autogen_core.models import CreateResult
+from pydantic import BaseModel
+
+
+def _json_default(value):
+    """
+    Serializes values that json cannot handle natively when building cache keys.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    return repr(value)
+
+
+class LLMResponseCache:
+    """
+    A persistent, LRU-evicted store of chat completion results.
+
+    Attributes:
+        directory (str): Location of the on-disk store
+        ttl_seconds (float): Lifetime of each entry
+        hits (Counter): Cache hits per prompt type
+        misses (Counter): Cache misses per prompt type
+    """
+
+    def __init__(self, directory=None, size_limit_mb=None, ttl_seconds=None):
+        """
+        Opens (or creates) the on-disk store.
+
+        Args:
+            directory (str, optional): Cache directory. Defaults to $HIVEMIND_LLM_CACHE_DIR or ".llm_cache"
+            size_limit_mb (int, optional): Maximum store size. Defaults to $HIVEMIND_LLM_CACHE_SIZE_MB or 256
+            ttl_seconds (float, optional): Entry lifetime. Defaults to $HIVEMIND_LLM_CACHE_TTL or 7 days
+        """
+        import diskcache
+
+        self.directory = directory or os.getenv("HIVEMIND_LLM_CACHE_DIR", ".llm_cache")
+        size_limit_mb = size_limit_mb or int(os.getenv("HIVEMIND_LLM_CACHE_SIZE_MB", "256"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("HIVEMIND_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+        self._store = diskcache.Cache(self.directory,
+                                      size_limit=size_limit_mb * 1024 * 1024,
+                                      eviction_policy="least-recently-used")
+        self.hits = Counter()
+        self.misses = Counter()
+
+    @staticmethod
+    def make_key(model, azure_deployment, api_version, messages, **create_kwargs):
+        """
+        Builds the content address of a request.
+
+        Args:
+            model (str): Model name
+            azure_deployment (str): Azure deployment name
+            api_version (str): Azure OpenAI API version
+            messages (list): Rendered prompt messages
+            **create_kwargs: Other arguments that change the response (e.g. json_output)
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = {
+            "model": model,
+            "azure_deployment": azure_deployment,
+            "api_version": api_version,
+            "messages": messages,
+            "create_kwargs": create_kwargs,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=_json_default)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key, prompt_name=None):
+        """
+        Looks up a cached result and records a hit or miss.
+
+        Returns:
+            dict or None: The stored result, if present and not expired
+        """
+        value = self._store.get(key)
+        if value is None:
+            self.misses[prompt_name] += 1
+        else:
+            self.hits[prompt_name] += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Stores a result under the given key with the configured TTL.
+        """
+        self._store.set(key, value, expire=self.ttl_seconds)
+
+    def clear(self):
+        """
+        Removes every cached entry.
+        """
+        self._store.clear()
+
+    def stats(self):
+        """
+        Reports hit/miss statistics and store usage.
+
+        Returns:
+            dict: Totals, hit rate, per-prompt counts and store size
+        """
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        per_prompt = {
+            name: {"hits": self.hits[name], "misses": self.misses[name]}
+            for name in set(self.hits) | set(self.misses)
+        }
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": len(self._store),
+            "size_bytes": self._store.volume(),
+            "per_prompt": per_prompt,
+        }
+
+
+class CachedChatCompletionClient:
+    """
+    Wraps a chat completion client and serves repeated prompts from an `LLMResponseCache`.
+
+    Only calls that name their prompt type (via `prompt_name`) and whose prompt type has
+    caching enabled are cached. Tool calls made by agents are always passed through.
+    Every other attribute is delegated to the wrapped client.
+    """
+
+    def __init__(self, client, model, azure_deployment, api_version, prompts, cache=None):
+        """
+        Args:
+            client: The underlying chat completion client
+            model (str): Model name, part of the cache key
+            azure_deployment (str): Azure deployment name, part of the cache key
+            api_version (str): Azure OpenAI API version, part of the cache key
+            prompts (dict): Parsed prompts.yaml; each entry's `cache` flag opts it in or out
+            cache (LLMResponseCache, optional): Store to use. Defaults to the shared store.
+        """
+        self._client = client
+        self._model = model
+        self._azure_deployment = azure_deployment
+        self._api_version = api_version
+        self._cache_policy = {name: bool(entry.get("cache", False)) for name, entry in prompts.items()}
+        self._cache = cache
+
+    accepts_prompt_name = True
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _inner_kwargs(self, prompt_name, kwargs):
+        """
+        Forwards `prompt_name` to wrapped clients that understand it (e.g. the scheduler).
+        """
+        if getattr(self._client, "accepts_prompt_name", False):
+            return dict(kwargs, prompt_name=prompt_name)
+        return kwargs
+
+    def create_stream(self, messages, prompt_name=None, **kwargs):
+        """
+        Streams a completion from the wrapped client. Streams are never cached.
+        """
+        return self._client.create_stream(messages, **self._inner_kwargs(prompt_name, kwargs))
+
+    def _is_cacheable(self, prompt_name, kwargs):
+        if prompt_name is None or not self._cache_policy.get(prompt_name, False):
+            return False
+        if kwargs.get("tools"):
+            return False
+        return os.getenv("HIVEMIND_LLM_CACHE", "1") != "0"
+
+    async def create(self, messages, prompt_name=None, **kwargs):
+        """
+        Returns a cached result for the prompt if available, otherwise calls the model.
+
+        Args:
+            messages (list): Prompt messages
+            prompt_name (str, optional): Prompt type from prompts.yaml, used for the opt-in policy
+            **kwargs: Passed through to the wrapped client's `create`
+
+        Returns:
+            CreateResult: Model response, with `cached=True` when served from the store
+        """
+        if not self._is_cacheable(prompt_name, kwargs):
+            return await self._client.create(messages, **self._inner_kwargs(prompt_name, kwargs))
+
+        cache = self._cache or get_response_cache()
+        create_kwargs = {k: v for k, v in kwargs.items() if k != "cancellation_token"}
+        key = cache.make_key(self._model, self._azure_deployment, self._api_version,
+                             [message.model_dump() for message in messages], **create_kwargs)
+
+        cached_result = cache.get(key, prompt_name)
+        if cached_result is not None:
+            result = CreateResult.model_validate(cached_result)
+            result.cached = True
+            return result
+
+        result = await self._client.create(messages, **self._inner_kwargs(prompt_name, kwargs))
+        if result.finish_reason in ("stop", "function_calls"):
+            cache.set(key, result.model_dump())
+        return result
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """
+    Returns the process-wide response cache, creating it on first use.
+
+    Returns:
+        LLMResponseCache: The shared cache
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache()
+    return _response_cache
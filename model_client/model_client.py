@@ -0,0 +1,204 @@
+"""
+Model Client Module
+
+This module provides a single, process-wide registry of chat completion clients shared by
+all agents. Instead of every agent building its own Azure OpenAI client (each with its own
+HTTP connection pool and TLS handshakes), agents ask the registry for the client of their
+role and get a shared one backed by a keep-alive connection pool.
+
+Deployments and the deployment used by each agent role are read from the models.yaml next
+to the package (or the file named by HIVEMIND_MODEL_CONFIG), with per-role overrides from
+HIVEMIND_DEPLOYMENT_<ROLE>. A custom factory can be installed with
+`set_model_client_factory` so that a local fake client stands in for Azure in tests and
+benchmarks.
+
+Every client goes through the `LLMScheduler` of its deployment (rate limits, adaptive
+concurrency and priority classes, see model_client/scheduler.py) and then the LLM
+response cache, so cache hits never consume quota. The outermost wrapper records every
+call as a telemetry span (see telemetry/telemetry.py).
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import yaml
+import asyncio
+import weakref
+import functools
+
+from model_client.scheduler import LLMScheduler, ScheduledChatCompletionClient
+from telemetry.telemetry import TracedChatCompletionClient
+from prompt_registry.prompt_registry import PACKAGE_DIR, get_prompts
+
+MODEL_CONFIG_PATH = os.path.join(PACKAGE_DIR, "models.yaml")
+
+_client_factory = None
+# Clients are bound to the event loop they were created on (their connection pool is), so
+# the registry keeps one set of clients per running loop plus one for synchronous callers.
+_clients_by_loop = weakref.WeakKeyDictionary()
+_clients_without_loop = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _read_model_config(path):
+    with open(path, "r") as f:
+        config = yaml.safe_load(f)
+    config.setdefault("agents", {})
+    config.setdefault("http", {})
+    config.setdefault("scheduler", {})
+    return config
+
+
+def load_model_config(path=None):
+    """
+    Loads the deployment map. Files are read once and cached until `reset_model_clients`.
+
+    Args:
+        path (str, optional): Config file. Defaults to $HIVEMIND_MODEL_CONFIG or the models.yaml
+            next to the package
+
+    Returns:
+        dict: Parsed config with "deployments", "agents", "http" and "scheduler" sections
+    """
+    return _read_model_config(path or os.getenv("HIVEMIND_MODEL_CONFIG", MODEL_CONFIG_PATH))
+
+
+def resolve_deployment(role, config=None):
+    """
+    Returns the name and settings of the deployment used by an agent role.
+
+    Args:
+        role (str): Agent role, e.g. "developer", "qa" or "deployment"
+        config (dict, optional): Parsed config. Loaded from disk when omitted.
+
+    Returns:
+        tuple: (deployment name, deployment settings)
+    """
+    config = config or load_model_config()
+    name = os.getenv(f"HIVEMIND_DEPLOYMENT_{role.upper()}") or config["agents"].get(role)
+    if name is None:
+        name = next(iter(config["deployments"]))
+    if name not in config["deployments"]:
+        raise KeyError(f"Deployment {name!r} for role {role!r} is not defined in the model config")
+    return name, config["deployments"][name]
+
+
+def _build_azure_client(role, settings, http_settings):
+    """
+    Default factory: an Azure OpenAI client on a keep-alive connection pool.
+    """
+    import httpx
+    from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
+
+    max_connections = int(os.getenv("HIVEMIND_MAX_CONNECTIONS", http_settings.get("max_connections", 20)))
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=http_settings.get("max_keepalive_connections", max_connections),
+                            keepalive_expiry=http_settings.get("keepalive_expiry", 30)),
+        timeout=http_settings.get("timeout", 120),
+    )
+    return AzureOpenAIChatCompletionClient(
+        azure_deployment=settings["azure_deployment"],
+        azure_endpoint=os.getenv("AZURE_API_BASE"),
+        model=settings["model"],
+        api_version=settings["api_version"],
+        api_key=os.getenv("AZURE_API_KEY"),
+        http_client=http_client,
+    )
+
+
+def _build_scheduler(settings, scheduler_settings):
+    """
+    Builds the scheduler of a deployment; the deployment's own quota wins over the defaults.
+    """
+    def setting(key, env, default):
+        return int(os.getenv(env) or settings.get(key) or scheduler_settings.get(key, default))
+
+    return LLMScheduler(
+        requests_per_minute=setting("requests_per_minute", "HIVEMIND_RPM", 300),
+        tokens_per_minute=setting("tokens_per_minute", "HIVEMIND_TPM", 150000),
+        initial_concurrency=setting("initial_concurrency", "HIVEMIND_LLM_CONCURRENCY", 4),
+        max_concurrency=int(scheduler_settings.get("max_concurrency", 32)),
+    )
+
+
+def _registry():
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _clients_without_loop
+    return _clients_by_loop.setdefault(loop, {})
+
+
+def get_model_client(role):
+    """
+    Returns the shared, cached client for an agent role, creating it on first use.
+
+    Roles that map to the same deployment share one client.
+
+    Args:
+        role (str): Agent role, e.g. "developer", "qa" or "deployment"
+
+    Returns:
+        TracedChatCompletionClient: Shared client wrapped with the scheduler, the LLM response cache
+            and tracing
+    """
+    config = load_model_config()
+    name, settings = resolve_deployment(role, config)
+    clients = _registry()
+    if name not in clients:
+        # The cache needs autogen_core and pydantic, so it is imported with the first client
+        from llm_cache.llm_cache import CachedChatCompletionClient
+
+        prompts = get_prompts()
+        factory = _client_factory or (lambda role, settings: _build_azure_client(role, settings, config["http"]))
+        scheduled_client = ScheduledChatCompletionClient(
+            factory(role, settings),
+            _build_scheduler(settings, config["scheduler"]),
+            prompts,
+            max_retries=int(config["scheduler"].get("max_retries", 5)),
+        )
+        cached_client = CachedChatCompletionClient(
+            scheduled_client,
+            model=settings["model"],
+            azure_deployment=settings["azure_deployment"],
+            api_version=settings["api_version"],
+            prompts=prompts,
+        )
+        clients[name] = TracedChatCompletionClient(cached_client, deployment=name)
+    return clients[name]
+
+
+def get_scheduler_metrics():
+    """
+    Returns the scheduler metrics of every deployment with a client on the current loop.
+
+    Returns:
+        dict: Metrics returned by `LLMScheduler.metrics`, keyed by deployment name
+    """
+    return {name: client.scheduler.metrics() for name, client in _registry().items()}
+
+
+def set_model_client_factory(factory):
+    """
+    Installs a factory used to build every new client, e.g. a local fake for tests.
+
+    Existing clients are dropped so the next `get_model_client` call uses the factory.
+
+    Args:
+        factory (callable): `factory(role, deployment_settings)` returning a chat completion
+            client, or None to restore the Azure OpenAI factory
+    """
+    global _client_factory
+    _client_factory = factory
+    reset_model_clients()
+
+
+def reset_model_clients():
+    """
+    Forgets every registered client and the cached model config.
+    """
+    _clients_by_loop.clear()
+    _clients_without_loop.clear()
+    _read_model_config.cache_clear()
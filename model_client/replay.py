@@ -0,0 +1,160 @@
+"""
+Replay Module
+
+This module implements a deterministic chat completion client that replays recorded
+responses instead of calling Azure OpenAI, so the pipeline can run offline. The benchmarks
+and the local backend of the pipeline service both use it, together with the stub `az`
+executable in model_client/fake_az.
+
+Each request is matched to its prompt type by comparing the rendered message with the
+templates in prompts.yaml, and answered with the next recorded response for that prompt.
+Latency is simulated per call (with seeded jitter) so that concurrency and scheduling
+behave as they would against a real deployment.
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import json
+import random
+import asyncio
+import itertools
+from collections import Counter
+
+from autogen_core.models import CreateResult, RequestUsage
+
+from prompt_registry.prompt_registry import get_prompts
+
+REPLAY_DIR = os.path.dirname(os.path.abspath(__file__))
+RECORDINGS_PATH = os.path.join(REPLAY_DIR, "recordings", "responses.json")
+# Prepended to PATH so that `az` resolves to the stub CLI
+FAKE_AZ_DIR = os.path.join(REPLAY_DIR, "fake_az")
+
+
+def _template_prefix(template):
+    return " ".join(template.split("{")[0].split())[:120]
+
+
+class ReplayChatCompletionClient:
+    """
+    Replays recorded responses per prompt type with simulated latency.
+
+    Attributes:
+        responses (dict): Recorded responses per prompt name, replayed in a cycle
+        latency_s (float): Base latency of a call in seconds
+        jitter_s (float): Maximum extra latency added to a call
+        calls (Counter): Number of calls per prompt name
+    """
+
+    def __init__(self, responses, prompts, latency_s=0.05, jitter_s=0.0, seconds_per_token=0.0, seed=0):
+        """
+        Args:
+            responses (dict): Prompt name -> list of response contents
+            prompts (dict): Parsed prompts.yaml, used to recognise each request's prompt
+            latency_s (float, optional): Base latency of a call. Defaults to 0.05
+            jitter_s (float, optional): Maximum extra latency. Defaults to 0
+            seconds_per_token (float, optional): Extra latency per completion token. Defaults to 0
+            seed (int, optional): Seed of the jitter. Defaults to 0
+        """
+        self.responses = {name: itertools.cycle(contents) for name, contents in responses.items()}
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self.seconds_per_token = seconds_per_token
+        self.calls = Counter()
+        self._random = random.Random(seed)
+        self._prefixes = {name: _template_prefix(entry["prompt"]) for name, entry in prompts.items()}
+
+    def identify_prompt(self, messages):
+        """
+        Returns the prompts.yaml entry a request was rendered from.
+
+        Args:
+            messages (list): Request messages
+
+        Returns:
+            str: Prompt name
+
+        Raises:
+            KeyError: If no prompt template matches or no response was recorded for it
+        """
+        content = " ".join(str(messages[-1].content).split())
+        for name, prefix in self._prefixes.items():
+            if content.startswith(prefix):
+                if name not in self.responses:
+                    raise KeyError(f"No recorded response for prompt {name!r}")
+                return name
+        raise KeyError(f"Request does not match any prompt template: {content[:80]!r}")
+
+    def _respond(self, messages):
+        name = self.identify_prompt(messages)
+        self.calls[name] += 1
+        content = next(self.responses[name])
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        completion_tokens = max(len(content) // 4, 1)
+        delay = self.latency_s + self._random.uniform(0, self.jitter_s) + completion_tokens * self.seconds_per_token
+        return content, RequestUsage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens), delay
+
+    async def create(self, messages, **kwargs):
+        content, usage, delay = self._respond(messages)
+        await asyncio.sleep(delay)
+        return CreateResult(finish_reason="stop", content=content, usage=usage, cached=False)
+
+    async def create_stream(self, messages, chunk_chars=32, **kwargs):
+        content, usage, delay = self._respond(messages)
+        chunks = [content[i:i + chunk_chars] for i in range(0, len(content), chunk_chars)] or [""]
+        for chunk in chunks:
+            await asyncio.sleep(delay / len(chunks))
+            yield chunk
+        yield CreateResult(finish_reason="stop", content=content, usage=usage, cached=False)
+
+    def actual_usage(self):
+        return RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    def total_usage(self):
+        return RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    @property
+    def model_info(self):
+        return {"vision": False, "function_calling": True, "json_output": True, "family": "replay"}
+
+    @property
+    def capabilities(self):
+        return self.model_info
+
+
+def load_recording(path=RECORDINGS_PATH, scenario="default"):
+    """
+    Loads the recorded responses of a scenario. A scenario only lists the prompts whose
+    responses differ from the "default" scenario.
+
+    Args:
+        path (str, optional): JSON file of recordings. Defaults to the recordings of this package
+        scenario (str, optional): Scenario name. Defaults to "default"
+
+    Returns:
+        dict: Prompt name -> list of response contents
+    """
+    with open(path, "r") as f:
+        recordings = json.load(f)
+    responses = dict(recordings["default"])
+    responses.update(recordings.get(scenario, {}))
+    return responses
+
+
+def replay_client_factory(responses, prompts_path=None, **options):
+    """
+    Returns a factory for `model_client.model_client.set_model_client_factory` that builds
+    replaying clients.
+
+    Args:
+        responses (dict): Prompt name -> list of response contents
+        prompts_path (str, optional): Prompts file to recognise requests by. Defaults to the
+            shared prompt registry (see prompt_registry.prompt_registry)
+        **options: Passed to `ReplayChatCompletionClient`
+
+    Returns:
+        callable: `factory(role, deployment_settings)`
+    """
+    prompts = get_prompts(prompts_path)
+    return lambda role, settings: ReplayChatCompletionClient(responses, prompts, **options)
@@ -0,0 +1,340 @@
+"""
+Scheduler Module
+
+This module implements an adaptive rate limiter and priority scheduler that sits between
+the agents and the model client of each Azure OpenAI deployment.
+
+- Token buckets enforce both requests/minute and tokens/minute limits
+- Concurrency adapts (AIMD): it halves on a 429 and honours Retry-After, and grows by
+  one after a window of healthy responses
+- Calls are served by priority class, so cheap assessment calls and in-flight fix loops
+  are not starved by new generations. The class of each prompt comes from the `priority`
+  field of its entry in prompts.yaml ("assessment", "fix" or "generation")
+- Queue depth, in-flight calls, concurrency, wait times and throttling are exported
+  through `metrics()`
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from collections import Counter, deque
+
+from telemetry.telemetry import current_span
+
+PRIORITY_CLASSES = {"assessment": 0, "fix": 1, "generation": 2}
+DEFAULT_PRIORITY = "generation"
+# Rough completion size used to reserve tokens before the real usage is known
+ESTIMATED_COMPLETION_TOKENS = 800
+
+
+class RateLimited(Exception):
+    """
+    Raised when a call is still rate limited after every retry.
+    """
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at `rate_per_minute`.
+    """
+
+    def __init__(self, rate_per_minute):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_second)
+        self.updated = now
+
+    def time_until_available(self, amount):
+        """
+        Seconds until `amount` tokens can be taken (0 if available now).
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount):
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class LLMScheduler:
+    """
+    Admits model calls according to priority, rate limits and an adaptive concurrency limit.
+
+    Attributes:
+        concurrency (int): Current concurrency limit
+        min_concurrency (int): Lower bound of the concurrency limit
+        max_concurrency (int): Upper bound of the concurrency limit
+    """
+
+    def __init__(self, requests_per_minute=300, tokens_per_minute=150000, initial_concurrency=4,
+                 min_concurrency=1, max_concurrency=32):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        self._healthy_streak = 0
+        self._blocked_until = 0.0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+        self._wait_times = {name: deque(maxlen=1000) for name in PRIORITY_CLASSES}
+        self._counters = Counter()
+
+    def _admission_delay(self, estimated_tokens):
+        """
+        Seconds until the head of the queue may start, or None if it must wait for a release.
+        """
+        if self._in_flight >= self.concurrency:
+            return None
+        return max(self._blocked_until - time.monotonic(),
+                   self.requests.time_until_available(1),
+                   self.tokens.time_until_available(estimated_tokens),
+                   0.0)
+
+    async def acquire(self, priority, estimated_tokens):
+        """
+        Waits until the call may start.
+
+        Args:
+            priority (str): Priority class ("assessment", "fix" or "generation")
+            estimated_tokens (int): Tokens reserved from the tokens/minute bucket
+
+        Returns:
+            float: Seconds spent waiting in the queue
+        """
+        entry = (PRIORITY_CLASSES.get(priority, PRIORITY_CLASSES[DEFAULT_PRIORITY]), next(self._sequence))
+        queued_at = time.monotonic()
+        async with self._condition:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    if self._queue[0] == entry:
+                        delay = self._admission_delay(estimated_tokens)
+                        if delay == 0.0:
+                            break
+                    else:
+                        delay = None
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                heapq.heappop(self._queue)
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+                raise
+
+            self._in_flight += 1
+            self.requests.consume(1)
+            self.tokens.consume(estimated_tokens)
+            self._condition.notify_all()
+
+        wait = time.monotonic() - queued_at
+        self._wait_times.get(priority, self._wait_times[DEFAULT_PRIORITY]).append(wait)
+        self._counters[f"started_{priority}"] += 1
+        return wait
+
+    async def release(self, estimated_tokens, used_tokens=None, rate_limited=False, retry_after=None,
+                      cancelled=False):
+        """
+        Marks a call as finished and adapts the concurrency limit.
+
+        Args:
+            estimated_tokens (int): Tokens reserved by `acquire`
+            used_tokens (int, optional): Tokens actually used, to correct the reservation
+            rate_limited (bool, optional): Whether the call was answered with a 429
+            retry_after (float, optional): Seconds the service asked us to wait
+            cancelled (bool, optional): Whether the call was cancelled; it says nothing about
+                the health of the deployment, so the concurrency limit is left alone
+        """
+        async with self._condition:
+            self._in_flight -= 1
+            if used_tokens is not None:
+                self.tokens.refund(estimated_tokens - used_tokens)
+
+            if rate_limited:
+                self._counters["rate_limited"] += 1
+                self._healthy_streak = 0
+                self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+                backoff = retry_after if retry_after is not None else 1.0 + random.random()
+                self._blocked_until = max(self._blocked_until, time.monotonic() + backoff)
+            elif cancelled:
+                self._counters["cancelled"] += 1
+            else:
+                self._counters["completed"] += 1
+                self._healthy_streak += 1
+                if self._healthy_streak >= self.concurrency and self.concurrency < self.max_concurrency:
+                    self.concurrency += 1
+                    self._healthy_streak = 0
+            self._condition.notify_all()
+
+    def metrics(self):
+        """
+        Returns queue and throughput metrics.
+
+        Returns:
+            dict: Queue depth, in-flight calls, concurrency limit, counters and wait times per priority
+        """
+        wait_times = {}
+        for name, samples in self._wait_times.items():
+            ordered = sorted(samples)
+            wait_times[name] = {
+                "count": len(ordered),
+                "p50_s": ordered[len(ordered) // 2] if ordered else None,
+                "p95_s": ordered[int(len(ordered) * 0.95)] if ordered else None,
+                "max_s": ordered[-1] if ordered else None,
+            }
+        return {
+            "queue_depth": len(self._queue),
+            "in_flight": self._in_flight,
+            "concurrency": self.concurrency,
+            "blocked_for_s": max(self._blocked_until - time.monotonic(), 0.0),
+            "counters": dict(self._counters),
+            "wait_times": wait_times,
+        }
+
+
+def _rate_limit_details(error):
+    """
+    Returns (is_rate_limited, retry_after_seconds) for an exception raised by a model client.
+    """
+    status_code = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status_code is None and response is not None:
+        status_code = getattr(response, "status_code", None)
+    if status_code != 429:
+        return False, None
+
+    retry_after = None
+    headers = getattr(response, "headers", None) or {}
+    for header in ("retry-after-ms", "retry-after"):
+        value = headers.get(header)
+        if value is None:
+            continue
+        try:
+            retry_after = float(value) / (1000 if header == "retry-after-ms" else 1)
+            break
+        except ValueError:
+            continue
+    return True, retry_after
+
+
+class ScheduledChatCompletionClient:
+    """
+    Wraps a chat completion client so every call goes through an `LLMScheduler`.
+
+    Rate limited calls (HTTP 429) are retried after the scheduler has backed off. Every other
+    attribute is delegated to the wrapped client.
+    """
+
+    accepts_prompt_name = True
+
+    def __init__(self, client, scheduler, prompts, max_retries=5):
+        """
+        Args:
+            client: The underlying chat completion client
+            scheduler (LLMScheduler): Scheduler for the client's deployment
+            prompts (dict): Parsed prompts.yaml; each entry's `priority` sets its class
+            max_retries (int, optional): Retries of a rate limited call. Defaults to 5
+        """
+        self._client = client
+        self.scheduler = scheduler
+        self._priorities = {name: entry.get("priority", DEFAULT_PRIORITY) for name, entry in prompts.items()}
+        self._max_retries = max_retries
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _estimate_tokens(self, messages):
+        characters = sum(len(str(getattr(message, "content", ""))) for message in messages)
+        return characters // 4 + ESTIMATED_COMPLETION_TOKENS
+
+    async def create(self, messages, prompt_name=None, **kwargs):
+        """
+        Schedules and performs a model call.
+
+        Args:
+            messages (list): Prompt messages
+            prompt_name (str, optional): Prompt type from prompts.yaml, used for the priority class
+            **kwargs: Passed through to the wrapped client's `create`
+
+        Returns:
+            CreateResult: Model response
+        """
+        priority = self._priorities.get(prompt_name, DEFAULT_PRIORITY)
+        estimated_tokens = self._estimate_tokens(messages)
+
+        call_span = current_span()
+        for attempt in range(self._max_retries + 1):
+            wait = await self.scheduler.acquire(priority, estimated_tokens)
+            if call_span is not None:
+                call_span.add("queue_s", wait)
+            try:
+                result = await self._client.create(messages, **kwargs)
+            except Exception as e:
+                rate_limited, retry_after = _rate_limit_details(e)
+                await self.scheduler.release(estimated_tokens, used_tokens=0 if rate_limited else None,
+                                             rate_limited=rate_limited, retry_after=retry_after)
+                if not rate_limited:
+                    raise
+                if call_span is not None:
+                    call_span.add("rate_limited_retries", 1)
+                if attempt == self._max_retries:
+                    raise RateLimited(f"Still rate limited after {self._max_retries} retries") from e
+                continue
+            except BaseException:
+                # Cancelled calls must give their slot back, or it stays counted as in flight
+                await self.scheduler.release(estimated_tokens, cancelled=True)
+                raise
+
+            usage = getattr(result, "usage", None)
+            used_tokens = usage.prompt_tokens + usage.completion_tokens if usage else None
+            await self.scheduler.release(estimated_tokens, used_tokens=used_tokens)
+            return result
+
+    async def create_stream(self, messages, prompt_name=None, **kwargs):
+        """
+        Schedules a streamed model call; the scheduler slot is held until the stream ends.
+
+        Yields:
+            str chunks, then the final CreateResult
+        """
+        priority = self._priorities.get(prompt_name, DEFAULT_PRIORITY)
+        estimated_tokens = self._estimate_tokens(messages)
+        await self.scheduler.acquire(priority, estimated_tokens)
+        used_tokens, rate_limited, retry_after, cancelled = None, False, None, False
+        try:
+            async for chunk in self._client.create_stream(messages, **kwargs):
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    used_tokens = usage.prompt_tokens + usage.completion_tokens
+                yield chunk
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except Exception as e:
+            rate_limited, retry_after = _rate_limit_details(e)
+            raise
+        finally:
+            await self.scheduler.release(estimated_tokens, used_tokens=used_tokens,
+                                         rate_limited=rate_limited, retry_after=retry_after, cancelled=cancelled)
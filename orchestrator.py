@@ -14,22 +14,34 @@ Author: AI Vectorial
 Date: 2025-02-04
 """
 
+import os
+import time
 import uuid
 import asyncio
+import argparse
 import json
-from distutils.util import strtobool
 
 from helper import write_code_to_path, create_project_zip
-from coding_agent.coding_agent import CodeGenratingAgent
-from qa_tester.qa_tester import QATester
-from deployment_agent.deployment_agent import DeploymentAgent
+from qa_tester.preflight import preflight_check, format_preflight_errors, get_preflight_stats
+from qa_tester.fix_context import get_fix_stats
+from deployment_agent.az_cli import get_az_probe
+from workspace.workspace import Workspace
+from workspace.checkpoint import CheckpointStore, inputs_hash, file_sha256
+from pipeline.pipeline import StageGraph
+from solution_index.solution_index import get_solution_index
+from environments.environments import (EnvironmentBuildError, infer_requirements, prepare_environment,
+                                       resolve_requirements, write_requirements)
+from qa_tester.execution_assessor import get_assessment_stats
+from model_client.model_client import get_scheduler_metrics
+from prompt_registry.prompt_registry import get_prompt
+from telemetry.telemetry import span, run_context, start_metrics_server, get_telemetry
 
 
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
-def code(user_query: str, folder_path: str, file_name: str):
+async def code_async(user_query: str, folder_path: str, file_name: str, generation_mode: str = None):
     """
     Generates code based on user requirements using the Developer Agent.
 
@@ -37,58 +49,398 @@ def code(user_query: str, folder_path: str, file_name: str):
         user_query (str): The user's code requirements or specifications
         folder_path (str): Directory where the generated code will be saved
         file_name (str): Name of the file to create (without extension)
+        generation_mode (str, optional): "assistant" (assistant agent calling the code generator
+            tool), "direct" (one structured-output call) or "stream" (streamed into the file with
+            early abort). Defaults to $HIVEMIND_GENERATION_MODE or "assistant".
 
     Returns:
         str: Path to the generated code file
     """
+    from coding_agent.coding_agent import CodeGenratingAgent
+
+    generation_mode = generation_mode or os.getenv("HIVEMIND_GENERATION_MODE", "assistant")
     code_generator = CodeGenratingAgent(user_query)
-    
-    assistant_response = asyncio.run(code_generator.assistant_run())
 
-    parsed_response = json.loads(assistant_response.chat_message.content)
-    code_content = parsed_response["content"]
+    if generation_mode == "stream":
+        await code_generator.stream_generate(folder_path, file_name)
+        return f"{folder_path}/{file_name}.py"
+    elif generation_mode == "direct":
+        cleaned_code = await code_generator.direct_generate()
+    elif generation_mode == "assistant":
+        assistant_response = await code_generator.assistant_run()
+
+        parsed_response = json.loads(assistant_response.chat_message.content)
+        code_content = parsed_response["content"]
 
-    cleaned_code = code_content.replace("```", "").replace("python", "")
+        cleaned_code = code_content.replace("```", "").replace("python", "")
+    else:
+        raise ValueError(f"Unknown generation mode {generation_mode!r}, expected 'assistant', 'direct' or 'stream'")
 
     write_code_to_path(folder_path, file_name, cleaned_code)
 
     return f"{folder_path}/{file_name}.py"
 
-def test(code_path: str):
+def code(user_query: str, folder_path: str, file_name: str, generation_mode: str = None):
+    """
+    Synchronous wrapper around `code_async` for single-query use.
+    """
+    return asyncio.run(code_async(user_query, folder_path, file_name, generation_mode))
+
+async def test_async(code_path: str, work_dir: str = "execution_sample", return_output: bool = False):
     """
     Tests the generated code using the QA Agent.
 
     Args:
         code_path (str): Path to the code file to test
+        work_dir (str, optional): Directory the code is executed in. Defaults to "execution_sample"
+        return_output (bool, optional): Also return the execution output. Defaults to False
 
     Returns:
         bool: True if code passes tests, False otherwise
+        (or a tuple of the verdict and the execution output if `return_output` is set)
     """
-    qa_tester = QATester()
+    from qa_tester.qa_tester import QATester
 
-    executed_code = asyncio.run(qa_tester.qa_tester(code_path))
-    
-    output_verification = asyncio.run(qa_tester.code_assesment_agent(executed_code))
-    output_verification = bool(strtobool(output_verification.content))
+    qa_tester = QATester(work_dir=work_dir)
+
+    verification_status, execution_output = await qa_tester.test_code(code_path)
 
-    return output_verification
+    if return_output:
+        return verification_status, execution_output
+    return verification_status
 
-def deploy(folder_path):
+def test(code_path: str, work_dir: str = "execution_sample"):
+    """
+    Synchronous wrapper around `test_async` for single-query use.
+    """
+    return asyncio.run(test_async(code_path, work_dir))
+
+async def package_async(folder_path: str, zip_path: str = None):
+    """
+    Zips the code folder for deployment without blocking the event loop. An unchanged
+    folder reuses its previous archive (see `helper.create_project_zip`).
+
+    Args:
+        folder_path (str): Path to the folder containing code to package
+        zip_path (str, optional): Path of the archive. Defaults to "<folder_path>.zip"
+
+    Returns:
+        tuple: (path to the zip file, manifest hash of the packaged content)
+    """
+    zip_path = zip_path or f"{folder_path}.zip"
+    manifest_hash = await asyncio.to_thread(create_project_zip, folder_path, zip_path)
+    return zip_path, manifest_hash
+
+async def deploy_async(folder_path: str, zip_path: str = None, work_dir: str = "execution_sample"):
     """
     Deploys the code to Azure cloud using the Deployment Agent.
 
     Args:
         folder_path (str): Path to the folder containing code to deploy
+        zip_path (str, optional): Path of the archive to upload. Defaults to "<folder_path>.zip"
+        work_dir (str, optional): Directory for Azure CLI commands. Defaults to "execution_sample"
+    """
+    from deployment_agent.deployment_agent import DeploymentAgent
+
+    deployment_agent = DeploymentAgent(work_dir=work_dir)
+
+    with span("zip"):
+        zip_path, manifest_hash = await package_async(folder_path, zip_path)
+    await deployment_agent.deploy_code(zip_path, artifact_hash=manifest_hash)
+
+def deploy(folder_path: str, zip_path: str = None, work_dir: str = "execution_sample"):
+    """
+    Synchronous wrapper around `deploy_async` for single-query use.
+    """
+    asyncio.run(deploy_async(folder_path, zip_path, work_dir))
+
+
+async def orchestrate_async(user_query: str, run_id: str = None, file_name: str = "test_sample",
+                            run_deployment: bool = True, retention: str = "keep", generation_mode: str = None,
+                            optimize: bool = None):
+    """
+    Runs the generate -> test -> fix -> package/deploy workflow for a single query.
+
+    Every run works inside its own workspace (see `workspace.workspace.Workspace`), and
+    all stages share the caller's event loop, so several queries can be driven
+    concurrently (see `orchestrate_batch`). Each stage, model call and executor run is
+    recorded as a telemetry span tied to the run id (see `telemetry.telemetry`).
+
+    The stages form a graph (see `pipeline.pipeline.StageGraph`): work that does not need
+    the code (sandbox warm-up, Azure CLI and login probes) runs while it is generated, and
+    speculative deployment work is cancelled if the code cannot be fixed. The code is tested
+    in a cached environment with the packages it imports (see `environments.environments`),
+    and the package gets a pinned requirements.txt.
+
+    Queries close enough to one that was solved before are served the verified code from
+    the solution index (see `solution_index.solution_index`), which then only has to pass
+    the re-test; newly verified code is added to the index.
+
+    Stage outputs are checkpointed in the workspace as they complete. Running again with
+    the same run id (or calling `resume`) skips the stages whose inputs are unchanged.
+
+    Args:
+        user_query (str): User's code requirements or specifications
+        run_id (str, optional): Identifier of the run. A random uuid is used when omitted.
+        file_name (str, optional): Name of the generated file. Defaults to "test_sample"
+        run_deployment (bool, optional): Deploy the packaged result. Defaults to True
+        retention (str, optional): Workspace retention policy ("keep", "on_success"
+            or "always"). Defaults to "keep".
+        generation_mode (str, optional): "assistant", "direct" or "stream", see `code_async`
+        optimize (bool, optional): Run the profile-guided optimization stage on working code.
+            Defaults to $HIVEMIND_OPTIMIZE.
+
+    Returns:
+        dict: Run id, final code path, zip path, whether the first test run passed, whether
+            the code had to be fixed, the stages reused from the checkpoint and the solution
+            it was served from, if any. Code that could not be fixed is not packaged.
+
+    Raises:
+        RuntimeError: If the deployment command fails; the run can then be resumed
+    """
+    # The agents pull in autogen; importing them here keeps `import orchestrator` and the CLI fast
+    from qa_tester.qa_tester import QATester
+    from qa_tester.fix_engine import FixEngine
+    from qa_tester.profiler import optimize_code
+    from qa_tester.warm_pool_executor import WarmPoolCodeExecutor, get_warm_pool
+    from deployment_agent.deployment_agent import DeploymentAgent, get_app_lock
+
+    workspace = Workspace(run_id or uuid.uuid4().hex).create()
+    checkpoints = CheckpointStore(workspace.root, workspace.run_id)
+    generation_mode = generation_mode or os.getenv("HIVEMIND_GENERATION_MODE", "assistant")
+    optimize = optimize if optimize is not None else os.getenv("HIVEMIND_OPTIMIZE", "0") == "1"
+    checkpoints.begin(user_query, {"file_name": file_name, "run_deployment": run_deployment,
+                                   "retention": retention, "generation_mode": generation_mode,
+                                   "optimize": optimize})
+    resumed = []
+    succeeded = False
+    graph = StageGraph()
+    solution_index = get_solution_index()
+    # Seconds spent generating and fixing, stored with the solution as the time a later hit saves
+    build = {"build_s": 0.0, "solution": None}
+
+    async def warmup_stage(inputs):
+        with span("warmup") as warmup_span:
+            qa_tester = QATester(work_dir=workspace.execution_dir)
+            if isinstance(qa_tester.code_executor, WarmPoolCodeExecutor):
+                await asyncio.to_thread(get_warm_pool().warm_up)
+            warmup_span.set(executor=type(qa_tester.code_executor).__name__)
+        return qa_tester
+
+    async def code_stage(inputs):
+        code_inputs = inputs_hash(user_query, file_name, generation_mode, get_prompt("DEVELOPER_AGENT"))
+        outputs = checkpoints.completed("code", code_inputs)
+        if outputs is not None:
+            resumed.append("code")
+            return outputs["code_path"]
+        solution = solution_index.lookup(user_query) if solution_index is not None else None
+        if solution is not None:
+            with span("code", mode="solution_index", similarity=solution["similarity"]):
+                write_code_to_path(workspace.code_dir, file_name, solution["code"])
+            print(f"Serving the verified solution of a similar query ({solution['similarity']:.2f}): "
+                  f"{solution['query']!r}")
+            build["solution"] = {"query": solution["query"], "similarity": solution["similarity"]}
+            code_path = f"{workspace.code_dir}/{file_name}.py"
+        else:
+            started = time.perf_counter()
+            with span("code", mode=generation_mode):
+                code_path = await code_async(user_query, workspace.code_dir, file_name, generation_mode)
+            build["build_s"] += time.perf_counter() - started
+        checkpoints.record("code", code_inputs, {"code_path": code_path}, files=[code_path])
+        return code_path
+
+    async def dependencies_stage(inputs):
+        with span("dependencies") as dependencies_span:
+            try:
+                environment, pinned = await prepare_environment(inputs["code"])
+            except (SyntaxError, EnvironmentBuildError) as e:
+                # Pre-flight reports syntax errors; missing packages surface as failed imports
+                print(f"No dependency environment, testing on the host interpreter: {e}")
+                environment, pinned = None, []
+            dependencies_span.set(requirements=pinned, environment=environment.key[:12] if environment else None)
+        return environment
+
+    async def test_stage(inputs):
+        code_path = inputs["code"]
+        inputs["warmup"].use_environment(inputs["dependencies"])
+        test_inputs = inputs_hash(file_sha256(code_path))
+        outputs = checkpoints.completed("test", test_inputs)
+        if outputs is not None:
+            resumed.append("test")
+            return {"inputs": test_inputs, "verified": outputs["verified"], "output": outputs["output"]}
+        with span("preflight") as preflight_span:
+            preflight_errors = preflight_check(code_path, inputs["warmup"].available_modules)
+            preflight_span.set(passed=not preflight_errors, errors=len(preflight_errors))
+        if preflight_errors:
+            verification_status, execution_output = False, format_preflight_errors(preflight_errors)
+        else:
+            with span("test") as test_span:
+                verification_status, execution_output = await inputs["warmup"].test_code(code_path)
+                test_span.set(passed=verification_status)
+        if build["solution"] is not None and not verification_status:
+            # A stored solution that no longer passes must not be served to the next similar query
+            solution_index.remove(build["solution"]["query"])
+            print(f"Removed the stored solution of {build['solution']['query']!r}, it failed the re-test")
+        checkpoints.record("test", test_inputs, {"verified": verification_status, "output": execution_output})
+        return {"inputs": test_inputs, "verified": verification_status, "output": execution_output}
+
+    async def fix_stage(inputs):
+        code_path, tested = inputs["code"], inputs["test"]
+        if tested["verified"]:
+            print("Code is working fine 🥳")
+            return code_path
+        fix_inputs = inputs_hash(tested["inputs"], tested["output"])
+        outputs = checkpoints.completed("fix", fix_inputs)
+        if outputs is not None:
+            resumed.append("fix")
+            return outputs["code_path"]
+        print("Uhoh! Code execution failed. Fixing the code...")
+        started = time.perf_counter()
+        with span("fix") as fix_span:
+            fix_result = await FixEngine(inputs["warmup"]).fix(code_path, workspace.refactor_dir,
+                                                              error_output=tested["output"])
+            fix_span.set(fixed=fix_result["fixed"], rounds=fix_result["rounds"],
+                         candidates_tried=fix_result["candidates_tried"])
+        build["build_s"] += time.perf_counter() - started
+        if not fix_result["fixed"]:
+            print(f"Could not fix the code after {fix_result['rounds']} rounds 😞")
+            graph.halt()
+            return fix_result["code_path"]
+        checkpoints.record("fix", fix_inputs, {"code_path": fix_result["code_path"]}, files=[fix_result["code_path"]])
+        print("Code is now fixed and running fine 🥳")
+        return fix_result["code_path"]
+
+    async def optimize_stage(inputs):
+        code_path = inputs["fix"]
+        optimize_inputs = inputs_hash(file_sha256(code_path))
+        optimization = checkpoints.completed("optimize", optimize_inputs)
+        if optimization is not None:
+            resumed.append("optimize")
+            return optimization
+        with span("optimize") as optimize_span:
+            # Profiled and tested in the dependency environment the original was tested in
+            optimization = await optimize_code(code_path, workspace.execution_dir, workspace.optimized_dir,
+                                               report_path=os.path.join(workspace.root, "optimization.json"),
+                                               qa_tester=inputs["warmup"])
+            optimize_span.set(kept=optimization["kept"])
+        checkpoints.record("optimize", optimize_inputs,
+                           {"kept": optimization["kept"], "code_path": optimization["code_path"]},
+                           files=[optimization["code_path"]])
+        return optimization
+
+    async def zip_stage(inputs):
+        code_path = inputs["optimize"]["code_path"] if optimize else inputs["fix"]
+        # Fixing may have changed the imports; an unchanged requirement set reuses its environment
+        try:
+            environment, pinned = await prepare_environment(code_path)
+        except EnvironmentBuildError:
+            environment, pinned = None, resolve_requirements(infer_requirements(code_path))
+        write_requirements(os.path.dirname(code_path), environment, pinned)
+        # Packaging is incremental by itself: an unchanged folder reuses its archive
+        with span("zip") as zip_span:
+            zip_path, manifest_hash = await package_async(os.path.dirname(code_path))
+            zip_span.set(manifest_hash=manifest_hash)
+        checkpoints.record("zip", inputs_hash(manifest_hash),
+                           {"zip_path": zip_path, "manifest_hash": manifest_hash}, files=[zip_path])
+        return {"code_path": code_path, "zip_path": zip_path, "manifest_hash": manifest_hash}
+
+    async def deploy_probe_stage(inputs):
+        # Read-only probes: installing the CLI or logging in is left to the deploy stage
+        with span("deploy_probe", speculative=True) as probe_span:
+            probe = get_az_probe()
+            cli = await probe.cli_status()
+            login = await probe.login_status() if cli is not None else None
+            probe_span.set(cli=cli is not None, logged_in=bool(login and login["logged_in"]))
+        return {"cli": cli, "login": login}
+
+    async def deploy_stage(inputs):
+        package = inputs["zip"]
+        deployment_agent = DeploymentAgent(work_dir=workspace.execution_dir)
+        deploy_inputs = inputs_hash(package["manifest_hash"], deployment_agent.resource_group,
+                                    deployment_agent.app_name)
+        if checkpoints.completed("deploy", deploy_inputs) is not None:
+            print(f"{package['zip_path']} is already deployed, skipping deployment")
+            resumed.append("deploy")
+            return None
+        # Concurrent runs (batch mode, service workers) deploy to the same app one at a time
+        async with get_app_lock(deployment_agent.resource_group, deployment_agent.app_name):
+            with span("deploy") as deploy_span:
+                deployment = await deployment_agent.deploy_code(package["zip_path"],
+                                                                artifact_hash=package["manifest_hash"])
+                deploy_span.set(exit_code=deployment["exit_code"], skipped=deployment["skipped"])
+        if deployment["exit_code"] != 0:
+            raise RuntimeError(f"Deployment command exited with {deployment['exit_code']}: "
+                               f"{deployment['command']}; resume with `resume({workspace.run_id!r})`")
+        checkpoints.record("deploy", deploy_inputs, deployment)
+        return deployment
+
+    graph.add("warmup", warmup_stage)
+    graph.add("code", code_stage)
+    graph.add("dependencies", dependencies_stage, after=["code"])
+    graph.add("test", test_stage, after=["code", "warmup", "dependencies"])
+    graph.add("fix", fix_stage, after=["code", "test", "warmup"])
+    if optimize:
+        graph.add("optimize", optimize_stage, after=["fix", "warmup"])
+    graph.add("zip", zip_stage, after=["optimize"] if optimize else ["fix"])
+    if run_deployment:
+        graph.add("deploy_probe", deploy_probe_stage, speculative=True)
+        graph.add("deploy", deploy_stage, after=["zip", "deploy_probe"])
+
+    with run_context(workspace.run_id), span("run", kind="run") as run_span:
+        try:
+            results = await graph.run()
+            verification_status = results["test"]["verified"]
+            if graph.halted:
+                run_span.set(outcome="unfixed", resumed=resumed, cancelled=graph.cancelled)
+                return {"run_id": workspace.run_id, "code_path": results["fix"], "zip_path": None,
+                        "verified": False, "fixed": False}
+
+            package = results["zip"]
+            optimization = results.get("optimize")
+            if solution_index is not None and (build["solution"] is None or not verification_status):
+                with open(package["code_path"], "r") as f:
+                    solution_index.add(user_query, f.read(), verified=verification_status,
+                                       metrics={"build_s": build["build_s"], "fixed": not verification_status})
+            succeeded = True
+            run_span.set(outcome="fixed" if not verification_status else "verified", resumed=resumed,
+                         solution_hit=build["solution"] is not None)
+            return {"run_id": workspace.run_id, "code_path": package["code_path"], "zip_path": package["zip_path"],
+                    "verified": verification_status, "fixed": not verification_status,
+                    "manifest_hash": package["manifest_hash"],
+                    "optimized": bool(optimization and optimization["kept"]), "resumed": resumed,
+                    "solution": build["solution"]}
+        finally:
+            workspace.cleanup(succeeded, retention)
+
+
+async def resume_async(run_id: str, **overrides):
+    """
+    Resumes a run from its checkpoint, skipping every stage that already completed with
+    unchanged inputs (see `workspace.checkpoint.CheckpointStore`).
+
+    Args:
+        run_id (str): Identifier of the run to resume
+        **overrides: Run options replacing the recorded ones (e.g. run_deployment=False)
+
+    Returns:
+        dict: Result of `orchestrate_async`
     """
-    deployment_agent = DeploymentAgent()
+    checkpoints = CheckpointStore(Workspace(run_id).root)
+    if not checkpoints.exists:
+        raise FileNotFoundError(f"No checkpoint for run {run_id!r}; its workspace may have been cleaned up")
+    options = {**checkpoints.state["options"], **overrides}
+    return await orchestrate_async(checkpoints.state["query"], run_id=run_id, **options)
+
 
-    print(f"file path to be 🤐 : {folder_path}")
-    create_project_zip(folder_path)
-    asyncio.run(deployment_agent.deploy_code(f"{folder_path}.zip"))
+def resume(run_id: str, **overrides):
+    """
+    Synchronous wrapper around `resume_async`.
+    """
+    return asyncio.run(resume_async(run_id, **overrides))
 
 
 # driver function
-def orchestrate(user_query: str):
+def orchestrate(user_query: str, **options):
     """
     Main driver function that orchestrates the entire workflow.
     
@@ -100,25 +452,101 @@ def orchestrate(user_query: str):
 
     Args:
         user_query (str): User's code requirements or specifications
+        **options: Run options passed to `orchestrate_async` (retention, generation_mode, ...)
     """
-    folder_path = "sample"
-    file_name = "test_sample"
+    return asyncio.run(orchestrate_async(user_query, **options))
 
-    qa_tester = QATester()
-    code_path = code(user_query, folder_path, file_name)
 
-    verification_status = test(code_path)
+def load_queries(jsonl_path: str):
+    """
+    Reads user queries from a JSONL file.
 
-    if not verification_status:
-        print("Uhoh! Code execution failed. Fixing the code...")
-        fixed_executed_code, code_path = qa_tester.code_fixer(f"{folder_path}/{file_name}.py")
-        print("Code is now fixed and running fine 🥳")    
-    else:
-        print("Code is working fine 🥳")
-    
-    zip_folder = code_path.split("/")[0]
-    deploy(zip_folder)    
+    Each line is either a JSON string or an object with a "query" field and an
+    optional "id". Lines without an id are numbered by their line position.
+
+    Args:
+        jsonl_path (str): Path to the JSONL file
+
+    Returns:
+        list: Dicts with "id" and "query" keys
+    """
+    queries = []
+    with open(jsonl_path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"query": record}
+            query = record.get("query")
+            if not query:
+                raise ValueError(f"Line {line_number} of {jsonl_path} has no 'query' field")
+            queries.append({"id": str(record.get("id", line_number)), "query": query})
+    return queries
+
+async def orchestrate_batch(jsonl_path: str, max_concurrency: int = 4, run_deployment: bool = False, **options):
+    """
+    Runs the pipeline for every query in a JSONL file on a single event loop.
+
+    At most `max_concurrency` pipelines are in flight at once. A failing query
+    does not stop the batch; its error is reported in its result instead.
+
+    Args:
+        jsonl_path (str): Path to the JSONL file of queries
+        max_concurrency (int, optional): Maximum concurrent pipelines. Defaults to 4
+        run_deployment (bool, optional): Deploy each result. Defaults to False
+        **options: Run options passed to `orchestrate_async` for every query
+
+    Returns:
+        list: One result dict per query, in input order
+    """
+    queries = load_queries(jsonl_path)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(entry):
+        async with semaphore:
+            try:
+                result = await orchestrate_async(entry["query"], run_deployment=run_deployment, **options)
+                return {"id": entry["id"], "query": entry["query"], "status": "ok", **result}
+            except Exception as e:
+                return {"id": entry["id"], "query": entry["query"], "status": "error", "error": str(e)}
+
+    results = await asyncio.gather(*(run_one(entry) for entry in queries))
+    # Schedulers live on this loop, so report them before it closes
+    print(f"LLM scheduler: {json.dumps(get_scheduler_metrics())}")
+    return results
 
 
 if __name__ == "__main__":
-    orchestrate("Build a fastapi to print the fibonacci series from 1 to 100.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Hivemind pipeline.")
+    parser.add_argument("query", nargs="?", default="Build a fastapi to print the fibonacci series from 1 to 100.")
+    parser.add_argument("--batch", help="JSONL file of queries to run concurrently")
+    parser.add_argument("--run-id", help="Identifier of the run; an existing run's completed stages are reused")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume a run from its checkpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent pipelines in batch mode")
+    parser.add_argument("--retention", default="keep", choices=["keep", "on_success", "always"],
+                        help="When to delete a run's workspace after it finishes")
+    parser.add_argument("--optimize", action="store_true", default=None,
+                        help="Profile working code and keep an optimized rewrite if it is faster or smaller")
+    parser.add_argument("--generation-mode", choices=["assistant", "direct", "stream"],
+                        help="Generate through the assistant agent, one direct structured-output call or a stream")
+    args = parser.parse_args()
+    start_metrics_server()
+    options = {"retention": args.retention, "generation_mode": args.generation_mode, "optimize": args.optimize}
+
+    if args.resume:
+        print(json.dumps(resume(args.resume), indent=2))
+    elif args.batch:
+        results = asyncio.run(orchestrate_batch(args.batch, args.concurrency, **options))
+        print(json.dumps(results, indent=2))
+        from llm_cache.llm_cache import get_response_cache
+        print(f"LLM cache: {json.dumps(get_response_cache().stats())}")
+        print(f"Assessments: {json.dumps(get_assessment_stats())}")
+        print(f"Pre-flight: {json.dumps(get_preflight_stats())}")
+        print(f"Fixes: {json.dumps(get_fix_stats())}")
+        if get_solution_index() is not None:
+            print(f"Solution index: {json.dumps(get_solution_index().stats())}")
+        print(f"Telemetry: spans in {get_telemetry().path}, see `python -m telemetry.telemetry summary`")
+    else:
+        orchestrate(args.query, run_id=args.run_id, **options)
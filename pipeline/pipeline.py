@@ -0,0 +1,134 @@
+"""
+Pipeline Module
+
+This module implements a small DAG scheduler for the stages of a run. Each stage declares
+the stages whose results it needs, and every stage starts as soon as those have finished,
+so work that does not depend on the generated code (Azure CLI and login probes, sandbox
+warm-up) overlaps with LLM generation instead of waiting for it.
+
+Stages can be marked speculative: they prepare work that may turn out to be unnecessary.
+A failing speculative stage does not stop the run; its error only surfaces in the stages
+that depend on it. When a stage halts the graph (e.g. QA failed and the code could not be
+fixed), every stage that has not finished yet is cancelled and awaited before `run`
+returns, so no speculative work outlives the run (the shared Azure CLI probes are cancelled,
+with their `az` process, once no caller waits for them).
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import asyncio
+
+
+class Stage:
+    """
+    A node of a `StageGraph`.
+
+    Attributes:
+        name (str): Stage name
+        func (callable): Coroutine function called with a dict of the upstream results
+        after (tuple): Names of the stages whose results the stage needs
+        speculative (bool): Whether a failure of the stage may be ignored
+    """
+
+    def __init__(self, name, func, after=(), speculative=False):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.speculative = speculative
+
+
+class StageGraph:
+    """
+    Runs stages concurrently in dependency order.
+
+    Attributes:
+        stages (dict): Stage name -> `Stage`, in insertion order
+        results (dict): Results of the stages that completed
+        errors (dict): Exceptions of the speculative stages that failed
+        cancelled (list): Stages cancelled by `halt`
+        halted (bool): Whether a stage halted the graph
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.results = {}
+        self.errors = {}
+        self.cancelled = []
+        self.halted = False
+        self._tasks = {}
+
+    def add(self, name, func, after=(), speculative=False):
+        """
+        Adds a stage. Its dependencies must have been added before, which keeps the graph acyclic.
+
+        Args:
+            name (str): Stage name
+            func (callable): `async func(inputs)`, where `inputs` maps each name in `after` to its result
+            after (iterable, optional): Stages whose results the stage needs. Defaults to none
+            speculative (bool, optional): Tolerate a failure of the stage until a dependent needs
+                its result. Defaults to False
+
+        Raises:
+            ValueError: If the name is taken or a dependency is unknown
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} is already defined")
+        unknown = [dependency for dependency in after if dependency not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name!r} depends on unknown stages {unknown}")
+        self.stages[name] = Stage(name, func, after, speculative)
+
+    async def _run_stage(self, stage):
+        inputs = {}
+        for dependency in stage.after:
+            inputs[dependency] = await self._tasks[dependency]
+        result = await stage.func(inputs)
+        self.results[stage.name] = result
+        return result
+
+    def halt(self):
+        """
+        Stops the graph: every stage that has not finished, except the calling one, is cancelled.
+        """
+        self.halted = True
+        current = asyncio.current_task()
+        for name, task in self._tasks.items():
+            if task is not current and not task.done():
+                self.cancelled.append(name)
+                task.cancel()
+        if self.cancelled:
+            print(f"Cancelling stages: {', '.join(self.cancelled)}")
+
+    async def run(self):
+        """
+        Runs every stage and waits for all of them.
+
+        Returns:
+            dict: Results of the completed stages (all of them unless the graph was halted)
+
+        Raises:
+            Exception: The error of the first non-speculative stage that failed; the other
+                stages are cancelled first
+        """
+        self._tasks = {name: asyncio.create_task(self._run_stage(stage), name=f"stage:{name}")
+                       for name, stage in self.stages.items()}
+        names = {task: name for name, task in self._tasks.items()}
+        pending = set(self._tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if task.cancelled() or task.exception() is None:
+                        continue
+                    stage = self.stages[names[task]]
+                    if not stage.speculative:
+                        raise task.exception()
+                    self.errors[stage.name] = task.exception()
+                    print(f"Speculative stage {stage.name!r} failed: {task.exception()}")
+            return self.results
+        finally:
+            unfinished = [task for task in self._tasks.values() if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
@@ -0,0 +1,146 @@
+"""
+Prompt Registry Module
+
+This module loads prompts.yaml once per process and shares it with every agent, the model
+client registry and the benchmarks. Previously each agent module parsed the file at import
+time, relative to the current working directory, so importing an agent from another
+directory failed and every import paid for a YAML parse.
+
+The file is resolved relative to the package (or taken from HIVEMIND_PROMPTS_FILE) and
+validated when it is loaded: every entry needs a prompt template, a known priority class
+and a boolean cache flag, and the templates of the prompts the agents render must use
+exactly the fields the agents pass. A mismatch fails at startup instead of as a KeyError
+in the middle of a run.
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import string
+import functools
+
+import yaml
+
+from model_client.scheduler import PRIORITY_CLASSES
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPTS_PATH = os.path.join(PACKAGE_DIR, "prompts.yaml")
+
+# Fields each agent passes to `str.format` when rendering its prompt
+PROMPT_FIELDS = {
+    "DEVELOPER_AGENT": {"user_query"},
+    "CODE_ASSESSMENT_AGENT": {"code_string"},
+    "REFACTOR_CODE_AGENT": {"buggy_code", "error_output"},
+    "REFACTOR_PATCH_AGENT": {"error", "traceback", "targets", "definitions", "dependencies", "imports"},
+    "OPTIMIZE_CODE_AGENT": {"code", "hot_functions", "allocations"},
+    "DEPLOYMENT_AGENT": {"resource_group", "app_name", "zip_file_path"},
+    "AZURE_AVAILABILITY_CHECK": {"result"},
+}
+
+
+class PromptRegistryError(Exception):
+    """
+    Raised when the prompts file is missing an entry or an entry is malformed.
+    """
+
+
+def template_fields(template):
+    """
+    Returns the names of the replacement fields of a `str.format` template.
+
+    Args:
+        template (str): Prompt template
+
+    Returns:
+        set: Field names, e.g. {"user_query"}
+
+    Raises:
+        PromptRegistryError: If the template is not a valid format string or uses positional fields
+    """
+    try:
+        fields = {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+    except ValueError as e:
+        raise PromptRegistryError(f"Invalid template: {e}") from e
+    if any(not field or field.isdigit() for field in fields):
+        raise PromptRegistryError("Templates must use named fields")
+    return {field.split(".")[0].split("[")[0] for field in fields}
+
+
+def validate_prompts(prompts):
+    """
+    Checks every entry of a parsed prompts file.
+
+    Args:
+        prompts (dict): Prompt name -> entry with "prompt", "priority" and "cache"
+
+    Raises:
+        PromptRegistryError: Listing every problem found
+    """
+    problems = [f"missing prompt {name}" for name in PROMPT_FIELDS if name not in prompts]
+    for name, entry in prompts.items():
+        if not isinstance(entry, dict) or not isinstance(entry.get("prompt"), str):
+            problems.append(f"{name}: no prompt template")
+            continue
+        if entry.get("priority", "generation") not in PRIORITY_CLASSES:
+            problems.append(f"{name}: unknown priority {entry['priority']!r}")
+        if not isinstance(entry.get("cache", False), bool):
+            problems.append(f"{name}: cache must be true or false")
+        try:
+            fields = template_fields(entry["prompt"])
+        except PromptRegistryError as e:
+            problems.append(f"{name}: {e}")
+            continue
+        expected = PROMPT_FIELDS.get(name)
+        if expected is not None and fields != expected:
+            missing, unknown = sorted(expected - fields), sorted(fields - expected)
+            problems.append(f"{name}: template fields differ (missing {missing}, unknown {unknown})")
+    if problems:
+        raise PromptRegistryError("Invalid prompts file:\n  " + "\n  ".join(problems))
+
+
+@functools.lru_cache(maxsize=None)
+def _read_prompts(path):
+    with open(path, "r") as f:
+        prompts = yaml.safe_load(f)
+    if not isinstance(prompts, dict):
+        raise PromptRegistryError(f"{path} does not map prompt names to entries")
+    validate_prompts(prompts)
+    return prompts
+
+
+def get_prompts(path=None):
+    """
+    Returns the parsed and validated prompts, reading the file on first use.
+
+    Args:
+        path (str, optional): Prompts file. Defaults to $HIVEMIND_PROMPTS_FILE or the
+            prompts.yaml next to the package
+
+    Returns:
+        dict: Prompt name -> entry with "prompt", "priority" and "cache"
+
+    Raises:
+        PromptRegistryError: If the file is malformed
+    """
+    return _read_prompts(os.path.abspath(path or os.getenv("HIVEMIND_PROMPTS_FILE", PROMPTS_PATH)))
+
+
+def get_prompt(name):
+    """
+    Returns the template of one prompt.
+
+    Args:
+        name (str): Prompt name, e.g. "DEVELOPER_AGENT"
+
+    Returns:
+        str: Prompt template
+    """
+    return get_prompts()[name]["prompt"]
+
+
+def reset_prompts():
+    """
+    Forgets the loaded prompts, so the next `get_prompts` call reads the file again.
+    """
+    _read_prompts.cache_clear()
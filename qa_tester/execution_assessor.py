@@ -0,0 +1,81 @@
+"""
+Execution Assessor Module
+
+This module decides locally whether a code execution succeeded, so that the QA Agent only
+asks the LLM (CODE_ASSESSMENT_AGENT prompt) when the result is genuinely ambiguous.
+
+Clear cases handled by rules:
+- Timeout of the executor                   -> failed
+- Non-zero exit code                        -> failed
+- A Python traceback or "<Name>Error:" line -> failed
+- Clean exit with no error-like output      -> passed
+
+Everything else (e.g. a clean exit that prints "error")
+falls back to the LLM. Every decision is counted so the fallback rate is visible.
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import re
+from collections import Counter
+
+TIMEOUT_EXIT_CODE = 124
+TRACEBACK_PATTERN = re.compile(r"Traceback \(most recent call last\)|^\s*\w+(Error|Exception):", re.MULTILINE)
+SUSPICIOUS_PATTERN = re.compile(r"\b(error|exception|failed|failure|warning)\b", re.IGNORECASE)
+
+assessment_stats = Counter()
+
+
+def assess_execution(exit_code, output):
+    """
+    Classifies an execution result using deterministic rules.
+
+    Args:
+        exit_code (int): Exit code reported by the executor
+        output (str): Combined stdout/stderr of the execution
+
+    Returns:
+        tuple: (verdict, reason) where verdict is True/False, or None when ambiguous
+    """
+    output = output or ""
+
+    if exit_code == TIMEOUT_EXIT_CODE or output.rstrip().endswith("Timeout"):
+        return False, "execution timed out"
+    if exit_code != 0:
+        return False, f"non-zero exit code {exit_code}"
+    if TRACEBACK_PATTERN.search(output):
+        return False, "traceback in output"
+
+    if SUSPICIOUS_PATTERN.search(output):
+        return None, "clean exit but output mentions errors"
+    return True, "clean exit"
+
+
+def record_decision(source, verdict, reason):
+    """
+    Counts and logs an assessment decision.
+
+    Args:
+        source (str): "rule" or "llm"
+        verdict (bool): Final verdict
+        reason (str): Why the verdict was reached
+    """
+    assessment_stats[source] += 1
+    assessment_stats[f"{source}_{'pass' if verdict else 'fail'}"] += 1
+    total = assessment_stats["rule"] + assessment_stats["llm"]
+    print(f"Assessment [{source}] -> {verdict} ({reason}); "
+          f"LLM fallback rate {assessment_stats['llm']}/{total}")
+
+
+def get_assessment_stats():
+    """
+    Returns decision counts and the LLM fallback rate.
+
+    Returns:
+        dict: Counts per source/verdict and the fallback rate
+    """
+    total = assessment_stats["rule"] + assessment_stats["llm"]
+    stats = dict(assessment_stats)
+    stats["fallback_rate"] = assessment_stats["llm"] / total if total else 0.0
+    return stats
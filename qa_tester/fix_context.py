@@ -0,0 +1,337 @@
+"""
+Fix Context Module
+
+This module builds small, error-focused prompts for the fix path. Instead of sending the
+whole failing file and asking for the whole file back, the execution output is parsed for
+the error and the lines of the generated code it points at; the AST is then used to
+extract only the functions/classes containing those lines and the top-level definitions
+they use. The model answers with a structured patch (replacement definitions and
+imports) that is applied locally.
+
+When the error cannot be located inside a definition, the file is small, or the patch
+does not apply, the caller falls back to the whole-file prompt.
+
+Prompt/completion tokens and the pass rate of the candidates are counted per mode
+("patch" or "whole_file") so the two can be compared.
+
+Configuration (environment variables):
+    HIVEMIND_FIX_PATCH            Set to "0" to always use whole-file fixes
+    HIVEMIND_FIX_PATCH_MIN_LINES  Smallest file fixed with a patch. Defaults to 40
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import io
+import os
+import re
+import ast
+import tokenize
+from collections import Counter, defaultdict
+
+TRACEBACK_FRAME = re.compile(r'File "(?P<file>[^"]+)", line (?P<line>\d+)')
+PREFLIGHT_LINE = re.compile(r"^Line (?P<line>\d+):", re.MULTILINE)
+ERROR_LINE = re.compile(r"^(?P<type>[A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt))(?::\s*(?P<message>.*))?$",
+                        re.MULTILINE)
+# Executors run a copy of the code named tmp_code_<hash>.py
+EXECUTED_FILE_PREFIX = "tmp_code_"
+TRACEBACK_TAIL_LINES = 20
+MAX_TARGETS = 3
+MAX_DEPENDENCY_LINES = 120
+
+fix_stats = defaultdict(Counter)
+
+
+class PatchError(Exception):
+    """
+    Raised when a patch does not apply cleanly.
+    """
+
+
+def parse_error(output, code_file_path):
+    """
+    Extracts the error and the lines of the generated code it points at from execution output.
+
+    Args:
+        output (str): Execution or pre-flight output
+        code_file_path (str): Path of the code that was run
+
+    Returns:
+        dict: "type", "message", "lines" (outermost frame first) and "traceback" (its tail),
+            or None if no line of the code is referenced
+    """
+    if not output:
+        return None
+    code_file = os.path.basename(code_file_path)
+    lines = []
+    for match in TRACEBACK_FRAME.finditer(output):
+        frame_file = os.path.basename(match.group("file"))
+        if frame_file == code_file or frame_file.startswith(EXECUTED_FILE_PREFIX):
+            lines.append(int(match.group("line")))
+    lines.extend(int(match.group("line")) for match in PREFLIGHT_LINE.finditer(output))
+    if not lines:
+        return None
+
+    errors = ERROR_LINE.findall(output)
+    error_type, message = errors[-1] if errors else ("Error", "")
+    return {"type": error_type, "message": message.strip(), "lines": lines,
+            "traceback": "\n".join(output.strip().splitlines()[-TRACEBACK_TAIL_LINES:])}
+
+
+def _definitions(tree):
+    """
+    Maps qualified names ("func", "Class", "Class.method") to their top-level or class-level nodes.
+    """
+    definitions = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            definitions[node.name] = node
+            if isinstance(node, ast.ClassDef):
+                for child in node.body:
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        definitions[f"{node.name}.{child.name}"] = child
+    return definitions
+
+
+def _span(node):
+    first = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+    return first, node.end_lineno
+
+
+def _numbered(code_lines, first, last):
+    return "\n".join(f"{number:4d} | {code_lines[number - 1]}" for number in range(first, last + 1))
+
+
+def extract_context(code, lines):
+    """
+    Extracts the definitions containing the given lines and the top-level definitions they use.
+
+    Args:
+        code (str): Source code
+        lines (list): Line numbers referenced by the error
+
+    Returns:
+        dict: "targets" (qualified names), "definitions", "dependencies" and "imports" as source
+            text, or None if no line falls inside a function or class
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    code_lines = code.splitlines()
+    definitions = _definitions(tree)
+
+    targets = []
+    for line in reversed(lines):
+        # The innermost definition (a method rather than its class) containing the line
+        containing = [(name, node) for name, node in definitions.items() if _span(node)[0] <= line <= _span(node)[1]]
+        if not containing:
+            continue
+        name, _ = min(containing, key=lambda item: _span(item[1])[1] - _span(item[1])[0])
+        if name not in targets:
+            targets.append(name)
+        if len(targets) == MAX_TARGETS:
+            break
+    if not targets:
+        return None
+
+    used = set()
+    for name in targets:
+        used.update(node.id for node in ast.walk(definitions[name]) if isinstance(node, ast.Name))
+
+    dependencies, dependency_lines = [], 0
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = {node.name}
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            assigned = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = {target.id for target in assigned if isinstance(target, ast.Name)}
+        else:
+            continue
+        if not names & used or any(name.split(".")[0] in names for name in targets):
+            continue
+        first, last = _span(node)
+        if dependency_lines + last - first + 1 > MAX_DEPENDENCY_LINES:
+            # Only the signature of large dependencies
+            last = node.body[0].lineno - 1 if hasattr(node, "body") and node.body[0].lineno > first else first
+        dependencies.append(_numbered(code_lines, first, last))
+        dependency_lines += last - first + 1
+
+    imports = [ast.get_source_segment(code, node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return {
+        "targets": targets,
+        "definitions": "\n\n".join(_numbered(code_lines, *_span(definitions[name])) for name in targets),
+        "dependencies": "\n\n".join(dependencies) or "None",
+        "imports": "\n".join(imports) or "None",
+    }
+
+
+def build_fix_context(code, code_file_path, error_output):
+    """
+    Builds the context of an error-focused fix prompt, if a patch is worthwhile.
+
+    Args:
+        code (str): Source of the failing code
+        code_file_path (str): Path of the failing code
+        error_output (str): Output of its failed execution or pre-flight check
+
+    Returns:
+        dict: Fields of the REFACTOR_PATCH_AGENT prompt ("error", "traceback", "targets",
+            "definitions", "dependencies", "imports"), or None to fix the whole file
+    """
+    if os.getenv("HIVEMIND_FIX_PATCH", "1") == "0":
+        return None
+    if len(code.splitlines()) < int(os.getenv("HIVEMIND_FIX_PATCH_MIN_LINES", "40")):
+        return None
+    error = parse_error(error_output, code_file_path)
+    if error is None:
+        return None
+    context = extract_context(code, error["lines"])
+    if context is None:
+        return None
+    context.update(error=f"{error['type']}: {error['message']}" if error["message"] else error["type"],
+                   traceback=error["traceback"])
+    context["targets"] = ", ".join(context["targets"])
+    return context
+
+
+def _string_continuation_lines(code):
+    """
+    Returns the numbers (1-based) of the lines that continue a multi-line string literal.
+    """
+    lines, fstring_starts = set(), []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            # Python 3.12+ tokenizes f-strings into start/middle/end tokens
+            if token.type == getattr(tokenize, "FSTRING_START", None):
+                fstring_starts.append(token.start[0])
+            elif token.type == getattr(tokenize, "FSTRING_END", None):
+                lines.update(range(fstring_starts.pop() + 1, token.end[0] + 1))
+            elif token.type == tokenize.STRING:
+                lines.update(range(token.start[0] + 1, token.end[0] + 1))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return lines
+
+
+def _reindent(code, indent):
+    """
+    Moves a definition to `indent` columns. Lines that continue a multi-line string are
+    kept as they are, so string values do not change.
+    """
+    code_lines = code.strip("\n").splitlines()
+    continuation = _string_continuation_lines("\n".join(code_lines) + "\n")
+    statement_lines = [line for number, line in enumerate(code_lines, start=1)
+                       if number not in continuation and line.strip()]
+    current = min((len(line) - len(line.lstrip()) for line in statement_lines), default=0)
+    return "\n".join(line if number in continuation else (" " * indent + line[current:] if line.strip() else "")
+                     for number, line in enumerate(code_lines, start=1))
+
+
+def _replace_lines(code_lines, first, last, replacement):
+    return code_lines[:first - 1] + replacement + code_lines[last:]
+
+
+def apply_patch(code, patch):
+    """
+    Applies a structured patch: each edit replaces (or adds) one definition, and missing
+    imports are inserted after the existing ones.
+
+    Args:
+        code (str): Source code
+        patch (dict): "edits" (list of {"name", "code"}, name like "func" or "Class.method")
+            and "imports" (list of import statements)
+
+    Returns:
+        str: Patched source code
+
+    Raises:
+        PatchError: If an edit is malformed, targets an unknown method or the result does not parse
+    """
+    for edit in patch.get("edits", []):
+        replacement = _reindent(edit["code"], 0)
+        try:
+            replacement_tree = ast.parse(replacement)
+        except SyntaxError as e:
+            raise PatchError(f"Edit of {edit['name']!r} does not parse: {e}") from e
+        defined = [node for node in replacement_tree.body
+                   if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+        if len(defined) != 1 or defined[0].name != edit["name"].split(".")[-1]:
+            raise PatchError(f"Edit of {edit['name']!r} must contain exactly that one definition")
+
+        tree = ast.parse(code)
+        code_lines = code.splitlines()
+        node = _definitions(tree).get(edit["name"])
+        if node is not None:
+            first, last = _span(node)
+            code_lines = _replace_lines(code_lines, first, last,
+                                        _reindent(edit["code"], node.col_offset).splitlines())
+        elif "." in edit["name"]:
+            raise PatchError(f"Class of {edit['name']!r} not found")
+        else:
+            # New helper: before the `if __name__ == "__main__":` block, or at the end
+            main_guard = next((node for node in tree.body if isinstance(node, ast.If) and "__name__" in ast.dump(node.test)),
+                              None)
+            at = main_guard.lineno - 1 if main_guard is not None else len(code_lines)
+            code_lines = code_lines[:at] + replacement.splitlines() + ["", ""] + code_lines[at:]
+        code = "\n".join(code_lines) + "\n"
+
+    imports = [statement.strip() for statement in patch.get("imports", []) if statement.strip()]
+    if imports:
+        tree = ast.parse(code)
+        code_lines = code.splitlines()
+        missing = [statement for statement in imports if statement not in code_lines]
+        existing = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+        at = existing[-1].end_lineno if existing else 0
+        code = "\n".join(code_lines[:at] + missing + code_lines[at:]) + "\n"
+
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        raise PatchError(f"Patched code does not parse: {e}") from e
+    return code
+
+
+def record_fix_call(mode, usage=None):
+    """
+    Counts a fix call and its tokens.
+
+    Args:
+        mode (str): "patch" or "whole_file"
+        usage (RequestUsage, optional): Token usage of the call
+    """
+    fix_stats[mode]["calls"] += 1
+    if usage is not None:
+        fix_stats[mode]["prompt_tokens"] += usage.prompt_tokens
+        fix_stats[mode]["completion_tokens"] += usage.completion_tokens
+
+
+def record_fix_fallback(reason):
+    """
+    Counts a patch that was abandoned for a whole-file fix.
+    """
+    fix_stats["patch"]["fallbacks"] += 1
+    print(f"Patch not applied, fixing the whole file instead: {reason}")
+
+
+def record_fix_outcome(mode, passed):
+    """
+    Counts whether a fix candidate passed QA.
+    """
+    fix_stats[mode]["passed" if passed else "failed"] += 1
+
+
+def get_fix_stats():
+    """
+    Returns, per mode, calls, tokens per call and the share of candidates that passed.
+
+    Returns:
+        dict: Counters and rates per mode
+    """
+    stats = {}
+    for mode, counts in fix_stats.items():
+        tried = counts["passed"] + counts["failed"]
+        stats[mode] = dict(counts)
+        stats[mode]["prompt_tokens_per_call"] = counts["prompt_tokens"] / counts["calls"] if counts["calls"] else 0.0
+        stats[mode]["success_rate"] = counts["passed"] / tried if tried else 0.0
+    return stats
@@ -0,0 +1,167 @@
+"""
+Fix Engine Module
+
+This module implements a bounded, parallel fix loop for code that failed QA.
+
+Each round asks the Developer Agent for several refactor candidates at once, executes
+them concurrently and keeps the first candidate that passes assessment, cancelling the
+remaining ones. If no candidate passes, the next round starts from a failed candidate
+and feeds its execution output back to the model. The loop stops after a configurable
+number of rounds or wall-clock budget.
+
+Configuration (environment variables):
+    HIVEMIND_FIX_CANDIDATES      Candidates generated per round. Defaults to 3
+    HIVEMIND_FIX_ROUNDS          Maximum number of rounds. Defaults to 3
+    HIVEMIND_FIX_BUDGET_SECONDS  Wall-clock budget for the whole loop. Defaults to no limit
+    HIVEMIND_FIX_STREAM          Set to "1" to stream candidates with early abort
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import time
+import shutil
+import asyncio
+
+from autogen_core import CancellationToken
+
+from coding_agent.coding_agent import CodeGenratingAgent
+from qa_tester.preflight import preflight_check, format_preflight_errors
+from qa_tester.fix_context import record_fix_outcome
+
+
+class FixEngine:
+    """
+    Generates, executes and selects fix candidates for failing code.
+
+    Attributes:
+        qa_tester (QATester): QA Agent used to execute and assess candidates
+        candidates (int): Candidates generated per round
+        max_rounds (int): Maximum number of rounds
+        budget_seconds (float): Wall-clock budget, or None for no limit
+    """
+
+    def __init__(self, qa_tester, candidates=None, max_rounds=None, budget_seconds=None, stream=None):
+        """
+        Args:
+            qa_tester (QATester): QA Agent used to execute and assess candidates
+            candidates (int, optional): Candidates per round. Defaults to $HIVEMIND_FIX_CANDIDATES or 3
+            max_rounds (int, optional): Maximum rounds. Defaults to $HIVEMIND_FIX_ROUNDS or 3
+            budget_seconds (float, optional): Wall-clock budget. Defaults to $HIVEMIND_FIX_BUDGET_SECONDS
+            stream (bool, optional): Stream candidates with early abort. Defaults to $HIVEMIND_FIX_STREAM
+        """
+        env_budget = os.getenv("HIVEMIND_FIX_BUDGET_SECONDS")
+        self.qa_tester = qa_tester
+        self.candidates = candidates or int(os.getenv("HIVEMIND_FIX_CANDIDATES", "3"))
+        self.max_rounds = max_rounds or int(os.getenv("HIVEMIND_FIX_ROUNDS", "3"))
+        self.budget_seconds = budget_seconds or (float(env_budget) if env_budget else None)
+        self.stream = stream if stream is not None else os.getenv("HIVEMIND_FIX_STREAM", "0") == "1"
+        self.code_generator = CodeGenratingAgent("Fix the bug in this code and provide me the correct code.")
+
+    @staticmethod
+    def _candidate_temperature(index):
+        """
+        Spreads the sampling temperature across candidates so they do not all return the same fix.
+        """
+        return None if index == 0 else min(0.2 + 0.3 * index, 1.0)
+
+    async def _try_candidate(self, code_file_path, candidates_folder, file_name, error_output, temperature,
+                             cancellation_token):
+        """
+        Generates one candidate (an error-focused patch when possible, see
+        `CodeGenratingAgent.fix_code`), runs the pre-flight checks, executes it and assesses the result.
+
+        Returns:
+            tuple: (passed, candidate code path, execution output)
+        """
+        _, candidate_path, mode = await self.code_generator.fix_code(code_file_path, candidates_folder, file_name,
+                                                                     error_output=error_output,
+                                                                     temperature=temperature,
+                                                                     stream=self.stream)
+        preflight_errors = preflight_check(candidate_path, self.qa_tester.available_modules)
+        if preflight_errors:
+            record_fix_outcome(mode, False)
+            return False, candidate_path, format_preflight_errors(preflight_errors)
+
+        passed, output = await self.qa_tester.test_code(candidate_path, cancellation_token=cancellation_token)
+        record_fix_outcome(mode, passed)
+        return passed, candidate_path, output
+
+    async def fix(self, buggy_code_file_path, new_folder_path="code_refactor", file_name="code_refactored",
+                  error_output=None):
+        """
+        Runs the fix loop until a candidate passes or the budget is exhausted.
+
+        Candidates are written to "<new_folder_path>_candidates"; the winning candidate is
+        copied to "<new_folder_path>/<file_name>.py" so that folder only holds the fixed code.
+
+        Args:
+            buggy_code_file_path (str): Path to the code file containing bugs
+            new_folder_path (str, optional): Directory for the fixed code. Defaults to "code_refactor"
+            file_name (str, optional): Name for the fixed file. Defaults to "code_refactored"
+            error_output (str, optional): Output of the failed execution of the buggy code
+
+        Returns:
+            dict: "fixed", "code_path" (fixed code, or the last candidate tried), "output",
+                "rounds" and "candidates_tried"
+        """
+        candidates_folder = f"{new_folder_path}_candidates"
+        deadline = time.monotonic() + self.budget_seconds if self.budget_seconds else None
+        current_path, last_output = buggy_code_file_path, error_output
+        candidates_tried = 0
+        rounds_run = 0
+
+        for round_number in range(1, self.max_rounds + 1):
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"Fix budget of {self.budget_seconds}s exhausted after {rounds_run} rounds")
+                break
+            rounds_run = round_number
+
+            print(f"Fix round {round_number}: trying {self.candidates} candidates...")
+            cancellation_token = CancellationToken()
+            tasks = [
+                asyncio.create_task(self._try_candidate(current_path, candidates_folder,
+                                                        f"candidate_r{round_number}_{index}", last_output,
+                                                        self._candidate_temperature(index), cancellation_token))
+                for index in range(self.candidates)
+            ]
+            candidates_tried += len(tasks)
+
+            winner, failed = None, []
+            pending = set(tasks)
+            try:
+                while pending and winner is None:
+                    timeout = max(deadline - time.monotonic(), 0) if deadline is not None else None
+                    done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break
+                    for task in done:
+                        if task.exception() is not None:
+                            print(f"Fix candidate errored: {task.exception()}")
+                            continue
+                        passed, candidate_path, output = task.result()
+                        if passed and winner is None:
+                            winner = (candidate_path, output)
+                        elif not passed:
+                            failed.append((candidate_path, output))
+            finally:
+                if pending:
+                    cancellation_token.cancel()
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+            if winner is not None:
+                candidate_path, output = winner
+                os.makedirs(new_folder_path, exist_ok=True)
+                fixed_code_path = f"{new_folder_path}/{file_name}.py"
+                shutil.copyfile(candidate_path, fixed_code_path)
+                return {"fixed": True, "code_path": fixed_code_path, "output": output,
+                        "rounds": rounds_run, "candidates_tried": candidates_tried}
+
+            if failed:
+                current_path, last_output = failed[0]
+
+        return {"fixed": False, "code_path": current_path, "output": last_output,
+                "rounds": rounds_run, "candidates_tried": candidates_tried}
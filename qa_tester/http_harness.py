@@ -0,0 +1,348 @@
+"""
+HTTP Harness Module
+
+This module implements HTTP smoke and load testing for generated web services. Running a
+FastAPI file as a script never serves a request, so when the generated code defines an
+ASGI app the QA Agent serves it and exercises every route it declares.
+
+The app is served by uvicorn on a free local port, in its own process. Driving it
+in-process through `httpx.ASGITransport` runs the generated code inside the orchestrator,
+so it is only used when explicitly selected; without uvicorn, HTTP testing is skipped
+with a warning. Each discovered route is smoke tested, then loaded with a
+configurable number of requests and concurrency; p50/p99 latency and requests/sec are
+recorded and compared with thresholds. A request succeeds when its status is one of the
+accepted statuses, 2xx and 3xx by default: a 404 or 422 from a smoke request fails QA.
+
+Configuration (environment variables):
+    HIVEMIND_HTTP_QA              Set to "0" to skip HTTP testing of ASGI apps
+    HIVEMIND_HTTP_MODE            "port" (uvicorn subprocess) or "inprocess" (opt-in). Defaults to "port"
+    HIVEMIND_HTTP_REQUESTS        Requests per route during the load test. Defaults to 50
+    HIVEMIND_HTTP_CONCURRENCY     Concurrent requests during the load test. Defaults to 10
+    HIVEMIND_HTTP_MAX_P99_MS      Highest acceptable p99 latency. Defaults to 1000
+    HIVEMIND_HTTP_MIN_RPS         Lowest acceptable requests/sec. Defaults to 0 (no limit)
+    HIVEMIND_HTTP_ACCEPT_STATUSES Statuses counted as successful, e.g. "200-399,422". Defaults to "200-399"
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import re
+import ast
+import sys
+import time
+import runpy
+import socket
+import asyncio
+import tempfile
+import statistics
+import importlib.util
+
+APP_CONSTRUCTORS = {"FastAPI", "Starlette"}
+ROUTE_METHODS = {"get", "post", "put", "patch", "delete"}
+PATH_PARAM_PATTERN = re.compile(r"\{[^}]+\}")
+DEFAULT_ACCEPTED_STATUSES = "200-399"
+# Server output shown when the server exits before serving
+SERVER_LOG_TAIL_CHARS = 4000
+
+
+def parse_statuses(spec):
+    """
+    Parses a list of HTTP statuses and status ranges.
+
+    Args:
+        spec (str): Comma separated statuses or inclusive ranges, e.g. "200-399,422"
+
+    Returns:
+        frozenset: The statuses
+    """
+    statuses = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        statuses.update(range(int(low), int(high or low) + 1))
+    return frozenset(statuses)
+
+
+def discover_asgi_app(code):
+    """
+    Finds the ASGI app defined by a module and the routes registered on it.
+
+    Args:
+        code (str): Module source code
+
+    Returns:
+        tuple: (app variable name, list of (method, path)), or (None, []) if no app is defined
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None, []
+
+    app_name = None
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            func = node.value.func
+            constructor = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+            if constructor in APP_CONSTRUCTORS and isinstance(node.targets[0], ast.Name):
+                app_name = node.targets[0].id
+                break
+    if app_name is None:
+        return None, []
+
+    routes = []
+    for node in ast.walk(tree):
+        calls = []
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            calls = [d for d in node.decorator_list if isinstance(d, ast.Call)]
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            calls = [node.value]
+        for call in calls:
+            func = call.func
+            if not (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id == app_name):
+                continue
+            if not call.args or not isinstance(call.args[0], ast.Constant) or not isinstance(call.args[0].value, str):
+                continue
+            path = call.args[0].value
+            if func.attr in ROUTE_METHODS:
+                routes.append((func.attr.upper(), path))
+            elif func.attr in ("api_route", "add_api_route"):
+                methods = ["GET"]
+                for keyword in call.keywords:
+                    if keyword.arg == "methods" and isinstance(keyword.value, (ast.List, ast.Tuple)):
+                        methods = [elt.value.upper() for elt in keyword.value.elts if isinstance(elt, ast.Constant)]
+                routes.extend((method, path) for method in methods)
+    return app_name, routes
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values, percentile):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percentile - 1]
+
+
+class HTTPLoadTester:
+    """
+    Serves a generated ASGI app and measures it under load.
+
+    Attributes:
+        mode (str): "port", or "inprocess" when explicitly selected
+        requests_per_route (int): Requests sent to each route during the load test
+        concurrency (int): Maximum requests in flight
+        max_p99_ms (float): Highest acceptable p99 latency in milliseconds
+        min_rps (float): Lowest acceptable throughput in requests/sec
+        startup_timeout (float): Seconds to wait for the server to accept requests
+        request_timeout (float): Per-request timeout in seconds
+        accepted_statuses (frozenset): Statuses counted as successful responses
+    """
+
+    def __init__(self, mode=None, requests_per_route=None, concurrency=None, max_p99_ms=None, min_rps=None,
+                 startup_timeout=15, request_timeout=5, python_executable=None, accepted_statuses=None):
+        self.mode = mode or os.getenv("HIVEMIND_HTTP_MODE", "port")
+        # A dependency environment provides uvicorn for the apps it was built for
+        self.python_executable = python_executable or sys.executable
+        # Checked in this interpreter; an environment's interpreter is trusted to have it
+        self.server_available = python_executable is not None or importlib.util.find_spec("uvicorn") is not None
+        self.requests_per_route = requests_per_route or int(os.getenv("HIVEMIND_HTTP_REQUESTS", "50"))
+        self.concurrency = concurrency or int(os.getenv("HIVEMIND_HTTP_CONCURRENCY", "10"))
+        self.max_p99_ms = max_p99_ms or float(os.getenv("HIVEMIND_HTTP_MAX_P99_MS", "1000"))
+        self.min_rps = min_rps if min_rps is not None else float(os.getenv("HIVEMIND_HTTP_MIN_RPS", "0"))
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.accepted_statuses = frozenset(accepted_statuses) if accepted_statuses is not None else parse_statuses(
+            os.getenv("HIVEMIND_HTTP_ACCEPT_STATUSES", DEFAULT_ACCEPTED_STATUSES))
+
+    async def _start_server(self, code_file_path, app_name, log):
+        """
+        Starts uvicorn on a free port and waits until it accepts connections.
+
+        Args:
+            code_file_path (str): Path to the generated code
+            app_name (str): Name of the app variable
+            log (file): Binary file receiving the server output. A pipe nobody reads would
+                block the server once its buffer fills
+
+        Returns:
+            tuple: (process, base_url)
+        """
+        port = _free_port()
+        code_dir, module_file = os.path.split(os.path.abspath(code_file_path))
+        module_name = os.path.splitext(module_file)[0]
+        process = await asyncio.create_subprocess_exec(
+            self.python_executable, "-m", "uvicorn", f"{module_name}:{app_name}",
+            "--host", "127.0.0.1", "--port", str(port), "--app-dir", code_dir, "--log-level", "warning",
+            cwd=code_dir, stdout=log, stderr=asyncio.subprocess.STDOUT,
+        )
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if process.returncode is not None:
+                log.seek(0)
+                output = log.read().decode("utf-8", errors="replace")[-SERVER_LOG_TAIL_CHARS:]
+                raise RuntimeError(f"Server exited with code {process.returncode} before serving:\n{output}")
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                await writer.wait_closed()
+                return process, f"http://127.0.0.1:{port}"
+            except OSError:
+                await asyncio.sleep(0.1)
+
+        process.kill()
+        await process.wait()
+        raise RuntimeError(f"Server did not accept connections within {self.startup_timeout}s")
+
+    async def _stop_server(self, process):
+        if process.returncode is None:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+    async def _exercise_route(self, client, method, path):
+        """
+        Smoke tests a route, then loads it.
+
+        Returns:
+            dict: Status of the smoke request, latencies, errors and throughput for the route
+        """
+        url = PATH_PARAM_PATTERN.sub("1", path)
+        request_kwargs = {"json": {}} if method in ("POST", "PUT", "PATCH") else {}
+
+        smoke = await client.request(method, url, **request_kwargs)
+        result = {"method": method, "path": path, "smoke_status": smoke.status_code, "latencies_ms": [], "errors": 0}
+        if smoke.status_code not in self.accepted_statuses:
+            result["errors"] = 1
+            result["error_detail"] = smoke.text[:2000]
+            return result
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one_request():
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **request_kwargs)
+                    failed = response.status_code not in self.accepted_statuses
+                except Exception:
+                    failed = True
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if failed:
+                    result["errors"] += 1
+                else:
+                    result["latencies_ms"].append(elapsed_ms)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(self.requests_per_route)))
+        result["elapsed_s"] = time.perf_counter() - started
+        return result
+
+    async def run(self, code_file_path):
+        """
+        Serves the app defined in `code_file_path` and load tests each of its routes.
+
+        Args:
+            code_file_path (str): Path to the generated code
+
+        Returns:
+            dict: "passed", "reason", "p50_ms", "p99_ms", "rps", "errors" and per-route "routes";
+                or None if the code does not define an ASGI app or uvicorn is not available
+        """
+        import httpx
+
+        with open(code_file_path, "r") as f:
+            app_name, routes = discover_asgi_app(f.read())
+        if app_name is None:
+            return None
+        if self.mode == "port" and not self.server_available:
+            print(f"Skipping HTTP QA of {code_file_path}: uvicorn is not installed "
+                  f"(HIVEMIND_HTTP_MODE=inprocess runs the app inside this process instead)")
+            return None
+        if not routes:
+            return {"passed": False, "reason": f"ASGI app {app_name!r} declares no routes", "routes": []}
+
+        process = None
+        log = None
+        try:
+            if self.mode == "inprocess":
+                # Opt-in only: the generated module runs in this process; at least keep it off the event loop
+                module_globals = await asyncio.to_thread(runpy.run_path, code_file_path, run_name="hivemind_http_qa")
+                client = httpx.AsyncClient(transport=httpx.ASGITransport(app=module_globals[app_name]),
+                                           base_url="http://testserver", timeout=self.request_timeout)
+            else:
+                log = tempfile.TemporaryFile()
+                process, base_url = await self._start_server(code_file_path, app_name, log)
+                limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+                client = httpx.AsyncClient(base_url=base_url, timeout=self.request_timeout, limits=limits)
+
+            async with client:
+                started = time.perf_counter()
+                route_results = [await self._exercise_route(client, method, path) for method, path in routes]
+                elapsed = time.perf_counter() - started
+        except Exception as e:
+            return {"passed": False, "reason": f"Could not serve the app: {e}", "routes": []}
+        finally:
+            if process is not None:
+                await self._stop_server(process)
+            if log is not None:
+                log.close()
+
+        latencies = sorted(latency for route in route_results for latency in route["latencies_ms"])
+        errors = sum(route["errors"] for route in route_results)
+        report = {
+            "mode": self.mode,
+            "routes": [{key: value for key, value in route.items() if key != "latencies_ms"} |
+                       {"p50_ms": _percentile(sorted(route["latencies_ms"]), 50),
+                        "p99_ms": _percentile(sorted(route["latencies_ms"]), 99)}
+                       for route in route_results],
+            "p50_ms": _percentile(latencies, 50),
+            "p99_ms": _percentile(latencies, 99),
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "errors": errors,
+        }
+
+        failing = [f"{route['method']} {route['path']} -> HTTP {route['smoke_status']}"
+                   for route in route_results if route["smoke_status"] not in self.accepted_statuses]
+        if failing:
+            report.update(passed=False, reason="Routes returned unexpected statuses: " + "; ".join(failing))
+        elif errors:
+            report.update(passed=False, reason=f"{errors} requests failed under load")
+        elif report["p99_ms"] is not None and report["p99_ms"] > self.max_p99_ms:
+            report.update(passed=False, reason=f"p99 latency {report['p99_ms']:.1f}ms exceeds {self.max_p99_ms}ms")
+        elif report["rps"] < self.min_rps:
+            report.update(passed=False, reason=f"Throughput {report['rps']:.1f} req/s is below {self.min_rps}")
+        else:
+            report.update(passed=True, reason="All routes served successfully")
+        return report
+
+
+def format_http_report(report):
+    """
+    Formats a load test report as execution output for assessment and the fix path.
+
+    Args:
+        report (dict): Report returned by `HTTPLoadTester.run`
+
+    Returns:
+        str: Human readable report
+    """
+    lines = [f"HTTP QA {'passed' if report['passed'] else 'FAILED'}: {report['reason']}"]
+    if report.get("p50_ms") is not None:
+        lines.append(f"p50 {report['p50_ms']:.1f}ms, p99 {report['p99_ms']:.1f}ms, {report['rps']:.1f} req/s")
+    for route in report.get("routes", []):
+        lines.append(f"  {route['method']} {route['path']}: HTTP {route['smoke_status']}, {route['errors']} errors")
+        if route.get("error_detail"):
+            lines.append(f"    {route['error_detail']}")
+    return "\n".join(lines)
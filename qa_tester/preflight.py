@@ -0,0 +1,190 @@
+"""
+Preflight Module
+
+This module implements static pre-flight checks that run on generated code before it is
+sent to the code executor. They catch, in milliseconds and without any subprocess or LLM
+call, failures that would otherwise cost a full execution and assessment:
+
+- Syntax errors
+- Leftover markdown artefacts (code fences, stripped language tags, broken shebangs)
+- Imports of modules that are not installed
+- Calls that start a server and block forever when the file is run as a script
+  (e.g. `uvicorn.run`)
+
+Failures are reported as precise, line-numbered messages that are fed straight into the
+fix path.
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import re
+import ast
+import sys
+import importlib.util
+from collections import Counter
+
+MARKDOWN_ARTEFACT_PATTERNS = [
+    (re.compile(r"^\s*```"), "leftover markdown code fence"),
+    (re.compile(r"^\s*(py|python3?|bash|sh|json|text)\s*$"), "stray language tag from a markdown fence"),
+    (re.compile(r"^#!\s*/usr/bin/env\s*3?\s*$"), "shebang without an interpreter (mangled markdown cleanup)"),
+]
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+BLOCKING_CALLS = {("uvicorn", "run"), ("hypercorn", "run"), ("waitress", "serve")}
+BLOCKING_METHODS = {"serve_forever", "run_forever"}
+
+preflight_stats = Counter()
+
+
+def _find_markdown_artefacts(code):
+    errors = []
+    for line_number, line in enumerate(code.splitlines(), start=1):
+        for pattern, description in MARKDOWN_ARTEFACT_PATTERNS:
+            if pattern.match(line):
+                errors.append(f"Line {line_number}: {description}: {line.strip()!r}")
+                break
+    return errors
+
+
+def _is_module_available(module_name, code_dir, available_modules=()):
+    if module_name in sys.stdlib_module_names or module_name in sys.builtin_module_names:
+        return True
+    if module_name in available_modules:
+        return True
+    if os.path.exists(os.path.join(code_dir, f"{module_name}.py")) or os.path.isdir(os.path.join(code_dir, module_name)):
+        return True
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _catches_import_errors(try_node):
+    for handler in try_node.handlers:
+        if handler.type is None:
+            return True
+        types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+        if any(isinstance(t, ast.Name) and t.id in IMPORT_ERRORS for t in types):
+            return True
+    return False
+
+
+def _optional_imports(tree):
+    """
+    Returns the import nodes inside a `try` whose handlers catch a failed import.
+    """
+    optional = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Try, getattr(ast, "TryStar", ast.Try))) and _catches_import_errors(node):
+            optional.update(id(child) for statement in node.body for child in ast.walk(statement))
+    return optional
+
+
+def _find_missing_imports(tree, code_dir, available_modules=()):
+    errors = []
+    seen = set()
+    # `try: import x / except ImportError:` handles the missing module itself
+    optional = _optional_imports(tree)
+    for node in ast.walk(tree):
+        if id(node) in optional:
+            continue
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            top_level = name.split(".")[0]
+            if top_level in seen:
+                continue
+            seen.add(top_level)
+            if not _is_module_available(top_level, code_dir, available_modules):
+                errors.append(f"Line {node.lineno}: module {top_level!r} is not installed")
+    return errors
+
+
+def _find_blocking_calls(tree):
+    """
+    Finds server start-up calls that run when the file is executed as a script
+    (at module level or under `if __name__ == "__main__":`). The QA Agent runs the file as a
+    script, so even a guarded call would hang the execution until its timeout; the
+    DEVELOPER_AGENT prompt asks for apps that are served separately instead.
+    """
+    errors = []
+
+    def visit(nodes):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                continue
+            for call in (n for n in ast.walk(node) if isinstance(n, ast.Call)):
+                func = call.func
+                if not isinstance(func, ast.Attribute):
+                    continue
+                owner = func.value.id if isinstance(func.value, ast.Name) else None
+                if (owner, func.attr) in BLOCKING_CALLS or func.attr in BLOCKING_METHODS:
+                    errors.append(f"Line {call.lineno}: {ast.unparse(func)}(...) starts a server that never exits "
+                                  f"when the file is run; remove it so the module only defines the app")
+
+    visit(tree.body)
+    return errors
+
+
+def preflight_check(code_file_path, available_modules=()):
+    """
+    Runs all static checks on a generated code file.
+
+    Args:
+        code_file_path (str): Path to the code file
+        available_modules (iterable, optional): Modules installed where the code will run
+            besides the host environment, e.g. in its dependency environment
+
+    Returns:
+        list: Error messages; empty if the code may go on to execution
+    """
+    with open(code_file_path, "r") as f:
+        code = f.read()
+
+    preflight_stats["checked"] += 1
+    errors = _find_markdown_artefacts(code)
+
+    try:
+        tree = ast.parse(code, filename=code_file_path)
+    except SyntaxError as e:
+        errors.append(f"Line {e.lineno}: SyntaxError: {e.msg}: {(e.text or '').strip()!r}")
+    else:
+        errors.extend(_find_missing_imports(tree, os.path.dirname(os.path.abspath(code_file_path)),
+                                            available_modules))
+        errors.extend(_find_blocking_calls(tree))
+
+    if errors:
+        preflight_stats["failed"] += 1
+        # Each failure skips one executor run. It saves no LLM call: the run would have ended in
+        # a traceback, a non-zero exit or a timeout, which the local assessment rules decide alone
+        preflight_stats["executor_calls_saved"] += 1
+        print(f"Pre-flight check failed for {code_file_path}:\n  " + "\n  ".join(errors))
+    return errors
+
+
+def format_preflight_errors(errors):
+    """
+    Formats pre-flight errors as execution output for the fix path.
+
+    Args:
+        errors (list): Messages returned by `preflight_check`
+
+    Returns:
+        str: Error report
+    """
+    return "Static pre-flight check failed before execution:\n" + "\n".join(errors)
+
+
+def get_preflight_stats():
+    """
+    Returns how many files were checked, how many failed and how many executor runs were saved.
+
+    Returns:
+        dict: Pre-flight counters
+    """
+    return dict(preflight_stats)
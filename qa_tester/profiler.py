@@ -0,0 +1,238 @@
+"""
+Profiler Module
+
+This module implements an optional, profiling-guided optimization stage for generated code.
+
+The code is run in a subprocess under cProfile and tracemalloc to find its hottest
+functions and peak allocation sites. These are passed to the Developer Agent's
+OPTIMIZE_CODE_AGENT prompt, and the rewrite is only kept if it is functionally
+equivalent (same exit code and output), passes the same QA as the original (execution,
+assessment and, for web apps, HTTP smoke and load tests) in the same dependency
+environment, and is measurably faster or smaller. Before/after numbers are stored with
+the run.
+
+The modules a script imports at top level are loaded before the clock starts, so the wall
+time measures the script's own work rather than the (noisy) import time of its libraries.
+
+Configuration (environment variables):
+    HIVEMIND_OPTIMIZE                  Set to "1" to enable the stage in the orchestrator
+    HIVEMIND_OPTIMIZE_MIN_IMPROVEMENT  Minimum relative gain to keep a rewrite. Defaults to 0.1
+    HIVEMIND_PROFILE_RUNS              Profiled runs per version; the median is used. Defaults to 3
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import statistics
+
+from coding_agent.coding_agent import CodeGenratingAgent
+from qa_tester.preflight import preflight_check
+from telemetry.telemetry import span
+
+# Runs a script under cProfile and tracemalloc and writes a JSON report.
+# argv: <code file> <report file>
+PROFILE_SCRIPT = r'''
+import sys, ast, json, time, runpy, cProfile, pstats, tracemalloc, os, importlib
+code_file, report_file = sys.argv[1], sys.argv[2]
+sys.argv = [code_file]
+sys.path.insert(0, os.path.dirname(code_file))
+with open(code_file) as f:
+    tree = ast.parse(f.read())
+for node in tree.body:
+    names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else (
+        [node.module] if isinstance(node, ast.ImportFrom) and node.module and not node.level else [])
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+profiler = cProfile.Profile()
+tracemalloc.start()
+started = time.perf_counter()
+exit_code = 0
+profiler.enable()
+try:
+    runpy.run_path(code_file, run_name="__main__")
+except SystemExit as e:
+    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+finally:
+    profiler.disable()
+wall_s = time.perf_counter() - started
+snapshot = tracemalloc.take_snapshot()
+_, peak_bytes = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+stats = pstats.Stats(profiler)
+hot = []
+for (filename, line, name), (cc, nc, tt, ct, callers) in stats.stats.items():
+    hot.append({"function": name, "file": os.path.basename(filename), "line": line,
+                "in_code": os.path.abspath(filename) == os.path.abspath(code_file),
+                "calls": nc, "self_s": tt, "cumulative_s": ct})
+hot.sort(key=lambda entry: (entry["in_code"], entry["cumulative_s"]), reverse=True)
+allocations = [{"site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                "size_kb": stat.size / 1024, "count": stat.count}
+               for stat in snapshot.statistics("lineno")[:10]]
+with open(report_file, "w") as f:
+    json.dump({"exit_code": exit_code, "wall_s": wall_s, "peak_kb": peak_bytes / 1024,
+               "hot_functions": hot[:10], "allocations": allocations}, f)
+'''
+
+
+async def profile_code(code_file_path, work_dir, timeout=60, python_executable=None):
+    """
+    Runs a script once under cProfile and tracemalloc.
+
+    Args:
+        code_file_path (str): Path to the code file
+        work_dir (str): Directory the script runs in
+        timeout (float, optional): Wall-clock limit in seconds. Defaults to 60
+        python_executable (str, optional): Interpreter of the code's dependency environment.
+            Defaults to the current one
+
+    Returns:
+        dict: "exit_code", "output", "wall_s", "peak_kb", "hot_functions" and "allocations"
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    with span("profile", kind="executor") as profile_span:
+        report = await _run_profiler(code_file_path, work_dir, timeout, python_executable or sys.executable)
+        profile_span.set(exit_code=report["exit_code"])
+        return report
+
+
+async def _run_profiler(code_file_path, work_dir, timeout, python_executable):
+    with tempfile.NamedTemporaryFile(suffix=".json", dir=work_dir, delete=False) as report_file:
+        report_path = report_file.name
+    try:
+        process = await asyncio.create_subprocess_exec(
+            python_executable, "-c", PROFILE_SCRIPT, os.path.abspath(code_file_path), report_path,
+            cwd=work_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return {"exit_code": 124, "output": "Timeout", "wall_s": None, "peak_kb": None,
+                    "hot_functions": [], "allocations": []}
+
+        output = stdout.decode("utf-8", errors="replace")
+        if process.returncode != 0 or os.path.getsize(report_path) == 0:
+            return {"exit_code": process.returncode or 1, "output": output + stderr.decode("utf-8", errors="replace"),
+                    "wall_s": None, "peak_kb": None, "hot_functions": [], "allocations": []}
+
+        with open(report_path, "r") as f:
+            report = json.load(f)
+        report["output"] = output
+        return report
+    finally:
+        os.remove(report_path)
+
+
+async def profile_repeatedly(code_file_path, work_dir, runs=None, python_executable=None):
+    """
+    Profiles a script several times and reports the median wall time and peak memory.
+
+    Args:
+        code_file_path (str): Path to the code file
+        work_dir (str): Directory the script runs in
+        runs (int, optional): Number of runs. Defaults to $HIVEMIND_PROFILE_RUNS or 3
+        python_executable (str, optional): Interpreter the script runs with. Defaults to the current one
+
+    Returns:
+        dict: Report of the last run, with "wall_s" and "peak_kb" replaced by the medians
+    """
+    runs = runs or int(os.getenv("HIVEMIND_PROFILE_RUNS", "3"))
+    reports = [await profile_code(code_file_path, work_dir, python_executable=python_executable)
+               for _ in range(runs)]
+    report = reports[-1]
+    if all(r["exit_code"] == 0 for r in reports):
+        report["wall_s"] = statistics.median(r["wall_s"] for r in reports)
+        report["peak_kb"] = statistics.median(r["peak_kb"] for r in reports)
+    return report
+
+
+def _summary(report):
+    return {key: report.get(key) for key in ("exit_code", "wall_s", "peak_kb", "hot_functions", "allocations")}
+
+
+async def optimize_code(code_file_path, work_dir, new_folder_path, file_name="code_optimized",
+                        report_path=None, min_improvement=None, qa_tester=None):
+    """
+    Profiles the code, asks the Developer Agent for an optimized rewrite and keeps it only
+    if it is equivalent, passes QA and is measurably faster or smaller. On any failure the
+    original code is kept.
+
+    Args:
+        code_file_path (str): Path to the working code
+        work_dir (str): Directory the code is profiled in
+        new_folder_path (str): Directory for the optimized code
+        file_name (str, optional): Name for the optimized file. Defaults to "code_optimized"
+        report_path (str, optional): Where to store the before/after report as JSON
+        min_improvement (float, optional): Minimum relative gain in wall time or peak memory.
+            Defaults to $HIVEMIND_OPTIMIZE_MIN_IMPROVEMENT or 0.1
+        qa_tester (QATester, optional): QA Agent that tested the original, using its dependency
+            environment; both versions are profiled and the rewrite is tested with it.
+            Defaults to a new QA Agent on the host interpreter
+
+    Returns:
+        dict: "kept", "reason", "code_path" (optimized or original), "before" and "after"
+    """
+    min_improvement = min_improvement or float(os.getenv("HIVEMIND_OPTIMIZE_MIN_IMPROVEMENT", "0.1"))
+    result = {"kept": False, "code_path": code_file_path, "before": None, "after": None}
+    if qa_tester is None:
+        from qa_tester.qa_tester import QATester
+        qa_tester = QATester()
+    python_executable = qa_tester.environment.python if qa_tester.environment is not None else None
+
+    try:
+        await _compare_rewrite(result, code_file_path, work_dir, new_folder_path, file_name, min_improvement,
+                               qa_tester, python_executable)
+    except Exception as e:
+        result.update(kept=False, code_path=code_file_path, reason=f"optimization failed: {e}")
+
+    print(f"Optimization {'kept' if result['kept'] else 'discarded'}: {result['reason']}")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(result, f, indent=2)
+    return result
+
+
+async def _compare_rewrite(result, code_file_path, work_dir, new_folder_path, file_name, min_improvement,
+                           qa_tester, python_executable):
+    before = await profile_repeatedly(code_file_path, work_dir, python_executable=python_executable)
+    result["before"] = _summary(before)
+    if before["exit_code"] != 0:
+        result["reason"] = "original code does not run cleanly under the profiler"
+        return
+
+    code_generator = CodeGenratingAgent()
+    _, optimized_path = await code_generator.optimize_code(code_file_path, before, new_folder_path, file_name)
+    if preflight_check(optimized_path, qa_tester.available_modules):
+        result["reason"] = "rewrite failed the pre-flight checks"
+        return
+
+    after = await profile_repeatedly(optimized_path, work_dir, python_executable=python_executable)
+    result["after"] = _summary(after)
+    if after["exit_code"] != 0 or after["output"] != before["output"]:
+        result["reason"] = "rewrite is not functionally equivalent (exit code or output differs)"
+        return
+
+    faster = after["wall_s"] <= before["wall_s"] * (1 - min_improvement)
+    smaller = after["peak_kb"] <= before["peak_kb"] * (1 - min_improvement)
+    if not (faster or smaller):
+        result["reason"] = f"no gain of at least {min_improvement:.0%} in wall time or peak memory"
+        return
+
+    # Equal output says little about a web app, which prints nothing; test it like the original
+    passed, output = await qa_tester.test_code(optimized_path)
+    if not passed:
+        result["reason"] = f"rewrite failed QA: {output.strip()[-300:]}"
+        return
+    result.update(kept=True, code_path=optimized_path,
+                  reason=f"wall {before['wall_s']:.4f}s -> {after['wall_s']:.4f}s, "
+                         f"peak {before['peak_kb']:.1f}KB -> {after['peak_kb']:.1f}KB")
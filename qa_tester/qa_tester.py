@@ -12,24 +12,26 @@ Date: 2025-02-04
 """
 
 import os
-import yaml
 from distutils.util import strtobool
 import asyncio
 
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from autogen_core import CancellationToken
 from autogen_core.models import UserMessage
 from autogen_core.code_executor import CodeBlock
 from autogen_ext.code_executors.local import LocalCommandLineCodeExecutor
 
 from coding_agent.coding_agent import CodeGenratingAgent
+from qa_tester.execution_assessor import assess_execution, record_decision
+from qa_tester.warm_pool_executor import WarmPoolCodeExecutor
+from qa_tester.http_harness import HTTPLoadTester, format_http_report
+
+from model_client.model_client import get_model_client
+from prompt_registry.prompt_registry import get_prompt
+from telemetry.telemetry import span
 
 import warnings
 warnings.filterwarnings("ignore")
 
-with open("prompts.yaml", "r") as file:
-    prompts = yaml.safe_load(file)
-
 
 class QATester:
     """
@@ -37,6 +39,7 @@ class QATester:
 
     This agent is responsible for:
     - Executing and testing generated code
+    - Serving generated web services and load testing their routes
     - Assessing code quality and functionality
     - Identifying and fixing code issues
     - Managing test environments
@@ -44,26 +47,59 @@ class QATester:
     Attributes:
         code_assessment_agent_prompt (str): Prompt template for code assessment
         work_dir (str): Directory for code execution
-        model_client (AzureOpenAIChatCompletionClient): Client for Azure OpenAI API
-        code_executor (LocalCommandLineCodeExecutor): Executor for running code tests
+        model_client (TracedChatCompletionClient): Shared client for the "qa" role (see model_client.model_client),
+            created on first use
+        code_executor (LocalCommandLineCodeExecutor | WarmPoolCodeExecutor): Executor for running code tests
+        environment (DependencyEnvironment): Environment the code runs in, or None for the host interpreter
     """
 
-    def __init__(self):
+    def __init__(self, work_dir="execution_sample", executor=None, model_client=None):
         """
         Initializes the QATester with required configurations and sets up the test environment.
+
+        Args:
+            work_dir (str, optional): Directory for code execution. Defaults to "execution_sample"
+            executor (str, optional): "local" for a fresh interpreter per test or "warm_pool" for
+                pre-warmed worker processes. Defaults to $HIVEMIND_EXECUTOR or "local".
+            model_client (optional): Chat client to use. Defaults to the shared "qa" client.
         """
-        self.code_assessment_agent_prompt = prompts["CODE_ASSESSMENT_AGENT"]["prompt"]
-        self.work_dir = "execution_sample"
+        self.code_assessment_agent_prompt = get_prompt("CODE_ASSESSMENT_AGENT")
+        self.work_dir = work_dir
         if not os.path.exists(self.work_dir):
             os.makedirs(self.work_dir, exist_ok=True)
-        self.model_client = AzureOpenAIChatCompletionClient(
-            azure_deployment="gpt-4o",
-            azure_endpoint=os.getenv("AZURE_API_BASE"),
-            model="gpt-4o",
-            api_version="2024-08-01-preview",
-            api_key=os.getenv("AZURE_API_KEY"),
-        )
-        self.code_executor = LocalCommandLineCodeExecutor(work_dir=self.work_dir)
+        self._model_client = model_client
+        executor = executor or os.getenv("HIVEMIND_EXECUTOR", "local")
+        if executor == "warm_pool":
+            self.code_executor = WarmPoolCodeExecutor(work_dir=self.work_dir)
+        else:
+            self.code_executor = LocalCommandLineCodeExecutor(work_dir=self.work_dir)
+        self.environment = None
+
+    def use_environment(self, environment):
+        """
+        Runs code in a dependency environment (see `environments.environments`) from now on.
+        The warm pool only serves the host interpreter, so a local executor is used instead.
+
+        Args:
+            environment (DependencyEnvironment): Environment to use, or None to keep the current executor
+        """
+        self.environment = environment
+        if environment is not None:
+            self.code_executor = LocalCommandLineCodeExecutor(work_dir=self.work_dir,
+                                                              virtual_env_context=environment.context)
+
+    @property
+    def model_client(self):
+        if self._model_client is None:
+            self._model_client = get_model_client("qa")
+        return self._model_client
+
+    @property
+    def available_modules(self):
+        """
+        Modules the code can import besides the host environment's.
+        """
+        return self.environment.modules if self.environment is not None else set()
     
     def read_code(self, file_path):
         """
@@ -89,42 +125,123 @@ class QATester:
         Returns:
             TextMessage: Assessment results from the AI model
         """
-        output_verification = await self.model_client.create([UserMessage(content=self.code_assessment_agent_prompt.format(code_string=code_string), source="user")])
+        output_verification = await self.model_client.create([UserMessage(content=self.code_assessment_agent_prompt.format(code_string=code_string), source="user")],
+                                                              prompt_name="CODE_ASSESSMENT_AGENT")
         return output_verification
     
-    async def qa_tester(self, code_file_path):
+    async def assess(self, executed_code):
+        """
+        Decides whether an execution succeeded, using the LLM only for ambiguous results.
+
+        Args:
+            executed_code (ExecutionResult): Result returned by `qa_tester`
+
+        Returns:
+            bool: True if the code executed successfully
+        """
+        verdict, reason = assess_execution(executed_code.exit_code, executed_code.output)
+        if verdict is not None:
+            record_decision("rule", verdict, reason)
+            return verdict
+
+        output_verification = await self.code_assesment_agent(executed_code.output)
+        verdict = bool(strtobool(output_verification.content.strip()))
+        record_decision("llm", verdict, reason)
+        return verdict
+
+    async def http_qa(self, code_file_path):
+        """
+        Serves a generated ASGI app and smoke/load tests its routes.
+
+        Args:
+            code_file_path (str): Path to the code file to test
+
+        Returns:
+            dict: Load test report (see `HTTPLoadTester.run`), or None if the code defines no ASGI app
+        """
+        if os.getenv("HIVEMIND_HTTP_QA", "1") == "0":
+            return None
+        with span("http_qa", kind="executor") as http_span:
+            python_executable = self.environment.python if self.environment is not None else None
+            report = await HTTPLoadTester(python_executable=python_executable).run(code_file_path)
+            if report is not None:
+                http_span.set(passed=report["passed"], p50_ms=report.get("p50_ms"), p99_ms=report.get("p99_ms"),
+                              rps=report.get("rps"))
+            return report
+
+    async def test_code(self, code_file_path, cancellation_token=None):
+        """
+        Executes the code, assesses the result and, for web services, exercises their routes.
+
+        Args:
+            code_file_path (str): Path to the code file to test
+            cancellation_token (CancellationToken, optional): Token to abort the execution
+
+        Returns:
+            tuple: (passed, output of the execution and HTTP checks)
+        """
+        executed_code = await self.qa_tester(code_file_path, cancellation_token=cancellation_token)
+        passed = await self.assess(executed_code)
+        output = executed_code.output
+        if not passed:
+            return passed, output
+
+        http_report = await self.http_qa(code_file_path)
+        if http_report is not None:
+            print(f"HTTP QA for {code_file_path}: {http_report['reason']}")
+            passed = http_report["passed"]
+            output = f"{output}\n{format_http_report(http_report)}"
+        return passed, output
+
+    async def qa_tester(self, code_file_path, cancellation_token=None):
         """
         Executes code tests in an isolated environment.
 
         Args:
             code_file_path (str): Path to the code file to test
+            cancellation_token (CancellationToken, optional): Token to abort the execution
 
         Returns:
             ExecutionResult: Results of code execution including output and errors
         """
         code_string = self.read_code(code_file_path)
-        result = await self.code_executor.execute_code_blocks(
-            code_blocks=[
-                CodeBlock(language="python", code=code_string),
-            ],
-            cancellation_token=CancellationToken(),
-        )
+        with span("execute", kind="executor", executor=type(self.code_executor).__name__) as execute_span:
+            result = await self.code_executor.execute_code_blocks(
+                code_blocks=[
+                    CodeBlock(language="python", code=code_string),
+                ],
+                cancellation_token=cancellation_token or CancellationToken(),
+            )
+            execute_span.set(exit_code=result.exit_code)
         return result
     
-    def code_fixer(self, buggy_code_file_path):
+    async def code_fixer_async(self, buggy_code_file_path, new_folder_path="code_refactor", file_name="code_refactored"):
         """
         Fixes identified bugs in the code using the Developer Agent.
 
         Args:
             buggy_code_file_path (str): Path to the code file containing bugs
+            new_folder_path (str, optional): Directory for the fixed code. Defaults to "code_refactor"
+            file_name (str, optional): Name for the fixed file. Defaults to "code_refactored"
 
         Returns:
             tuple: (fixed code output, path to fixed code file)
         """
         code_generator = CodeGenratingAgent("Fix the bug in this code and provide me the correct code.")
-        refactored_code, new_code_path = asyncio.run(code_generator.refactor_code(buggy_code_file_path))
+        refactored_code, new_code_path = await code_generator.refactor_code(buggy_code_file_path, new_folder_path, file_name)
 
-        fixed_code_block = self.read_code(new_code_path)
-        fixed_executed_code = asyncio.run(self.qa_tester(new_code_path))
+        fixed_executed_code = await self.qa_tester(new_code_path)
 
-        return fixed_executed_code.output, new_code_path
\ No newline at end of file
+        return fixed_executed_code.output, new_code_path
+
+    def code_fixer(self, buggy_code_file_path):
+        """
+        Synchronous wrapper around `code_fixer_async`.
+
+        Args:
+            buggy_code_file_path (str): Path to the code file containing bugs
+
+        Returns:
+            tuple: (fixed code output, path to fixed code file)
+        """
+        return asyncio.run(self.code_fixer_async(buggy_code_file_path))
\ No newline at end of file
@@ -0,0 +1,420 @@
+"""
+Warm Pool Executor Module
+
+This module implements a code executor backed by a pool of pre-warmed Python worker
+processes. Starting an interpreter and re-importing heavy libraries such as fastapi or
+pydantic dominates the runtime of short tests, so each worker imports the common
+libraries once and then runs many jobs.
+
+Every job runs in a fresh `__main__` namespace (local modules imported from the job's
+work_dir are dropped afterwards), with its stdout/stderr captured at the file descriptor
+level. Workers are limited in memory, CPU time and wall-clock time, and are recycled
+after a fixed number of jobs or whenever a job crashes, times out or is cancelled.
+
+The executor returns results shaped like the `CommandLineCodeResult` of
+`LocalCommandLineCodeExecutor`, so the QA Agent can switch between the two transparently.
+
+Configuration (environment variables):
+    HIVEMIND_WARM_POOL_SIZE         Number of worker processes. Defaults to 2
+    HIVEMIND_WARM_POOL_PRELOAD      Comma separated modules to preload
+    HIVEMIND_WARM_POOL_MAX_JOBS     Jobs per worker before it is recycled. Defaults to 50
+    HIVEMIND_WARM_POOL_MEMORY_MB    Address space limit per worker. Defaults to 2048
+    HIVEMIND_WARM_POOL_CPU_SECONDS  CPU time limit per job. Defaults to 60
+
+Author: RPM Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import sys
+import time
+import queue
+import runpy
+import asyncio
+import hashlib
+import tempfile
+import threading
+import importlib
+import weakref
+import traceback
+import multiprocessing
+from typing import Optional
+from dataclasses import dataclass
+
+from autogen_core.code_executor import CodeResult
+from autogen_ext.code_executors.local import LocalCommandLineCodeExecutor
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the wall-clock timeout applies
+    resource = None
+
+DEFAULT_PRELOAD = ("json", "asyncio", "typing", "dataclasses", "pydantic", "fastapi", "starlette", "httpx")
+TIMEOUT_EXIT_CODE = 124
+# Seconds between two checks for cancellation while a job runs
+CANCEL_POLL_INTERVAL_S = 0.1
+
+
+@dataclass
+class CommandLineCodeResult(CodeResult):
+    """
+    Result of a code execution, with the file the code was run from (mirrors the result
+    of `LocalCommandLineCodeExecutor`, which autogen_ext does not export).
+    """
+    code_file: Optional[str]
+
+
+def _set_cpu_limit(seconds):
+    """
+    Limits the CPU time of the current job to `seconds` beyond what the worker has already used.
+
+    Returns:
+        tuple: The previous (soft, hard) limit, for `_restore_cpu_limit`, or None without rlimits
+    """
+    if resource is None:
+        return None
+    previous = resource.getrlimit(resource.RLIMIT_CPU)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime) + 1 + int(seconds)
+    # Only the soft limit is lowered: raising a hard limit needs privileges, and it would lift
+    # a cap set on the worker from outside
+    hard = previous[1]
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    return previous
+
+
+def _restore_cpu_limit(previous):
+    """
+    Restores the CPU time limit saved by `_set_cpu_limit`.
+    """
+    if previous is not None:
+        resource.setrlimit(resource.RLIMIT_CPU, previous)
+
+
+def _run_job(code_file, work_dir, cpu_time_limit, baseline_modules):
+    """
+    Runs one script inside the worker and returns (exit_code, output).
+    """
+    exit_code = 0
+    with tempfile.TemporaryFile() as capture:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved_stdout, saved_stderr = os.dup(1), os.dup(2)
+        os.dup2(capture.fileno(), 1)
+        os.dup2(capture.fileno(), 2)
+        saved_cwd, saved_argv, saved_path = os.getcwd(), sys.argv, list(sys.path)
+        saved_cpu_limit = None
+        try:
+            os.chdir(work_dir)
+            sys.argv = [code_file]
+            sys.path.insert(0, work_dir)
+            saved_cpu_limit = _set_cpu_limit(cpu_time_limit)
+            runpy.run_path(code_file, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            _restore_cpu_limit(saved_cpu_limit)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_stdout, 1)
+            os.dup2(saved_stderr, 2)
+            os.close(saved_stdout)
+            os.close(saved_stderr)
+            os.chdir(saved_cwd)
+            sys.argv, sys.path[:] = saved_argv, saved_path
+            for name in set(sys.modules) - baseline_modules:
+                module_file = getattr(sys.modules[name], "__file__", None) or ""
+                if os.path.abspath(module_file).startswith(work_dir + os.sep):
+                    del sys.modules[name]
+
+        capture.seek(0)
+        output = capture.read().decode("utf-8", errors="replace")
+    return exit_code, output
+
+
+def _worker_main(conn, preload, memory_limit_mb):
+    """
+    Entry point of a worker process: preload modules, then serve jobs until told to stop.
+    """
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    for module_name in preload:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            pass
+    baseline_modules = set(sys.modules)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        code_file, work_dir, cpu_time_limit = job
+        conn.send(_run_job(code_file, work_dir, cpu_time_limit, baseline_modules))
+
+
+class _Worker:
+    """
+    Parent-side handle of a single warm worker process.
+    """
+
+    def __init__(self, context, preload, memory_limit_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, preload, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_run = 0
+
+    def run(self, code_file, work_dir, timeout, cpu_time_limit, cancelled=None):
+        """
+        Runs a job and returns (exit_code, output, healthy). An unhealthy worker must be discarded.
+        A job that is cancelled through the `cancelled` event leaves its worker unhealthy.
+        """
+        self.jobs_run += 1
+        deadline = time.monotonic() + timeout
+        try:
+            self.conn.send((code_file, work_dir, cpu_time_limit))
+            while not self.conn.poll(max(min(CANCEL_POLL_INTERVAL_S, deadline - time.monotonic()), 0)):
+                if cancelled is not None and cancelled.is_set():
+                    return 1, "\n Cancelled", False
+                if time.monotonic() >= deadline:
+                    return TIMEOUT_EXIT_CODE, "\n Timeout", False
+            exit_code, output = self.conn.recv()
+            return exit_code, output, True
+        except (EOFError, OSError):
+            self.process.join(1)
+            return 1, f"Worker process died (exit code {self.process.exitcode}); resource limit exceeded?", False
+
+    def close(self, graceful=True):
+        """
+        Stops the worker; a busy worker (timed out or cancelled) is killed right away.
+        """
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+            self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WarmInterpreterPool:
+    """
+    A pool of pre-warmed worker processes shared by all executors. Jobs waiting for a
+    worker wait in the event loop; only running jobs occupy a thread.
+
+    Attributes:
+        size (int): Maximum number of worker processes
+        preload (tuple): Modules imported by each worker at startup
+        max_jobs_per_worker (int): Jobs after which a worker is recycled
+        memory_limit_mb (int): Address space limit of each worker
+        cpu_time_limit (int): CPU seconds allowed per job
+    """
+
+    def __init__(self, size=None, preload=None, max_jobs_per_worker=None, memory_limit_mb=None,
+                 cpu_time_limit=None, python_executable=None):
+        """
+        Initializes the pool. Workers are started lazily on first use.
+
+        Args:
+            size (int, optional): Number of workers. Defaults to $HIVEMIND_WARM_POOL_SIZE or 2
+            preload (list, optional): Modules to preload. Defaults to $HIVEMIND_WARM_POOL_PRELOAD
+                or common web/data libraries
+            max_jobs_per_worker (int, optional): Recycle threshold. Defaults to $HIVEMIND_WARM_POOL_MAX_JOBS or 50
+            memory_limit_mb (int, optional): Memory limit. Defaults to $HIVEMIND_WARM_POOL_MEMORY_MB or 2048
+            cpu_time_limit (int, optional): CPU seconds per job. Defaults to $HIVEMIND_WARM_POOL_CPU_SECONDS or 60
+            python_executable (str, optional): Interpreter used for the workers. Defaults to the current one
+        """
+        env_preload = os.getenv("HIVEMIND_WARM_POOL_PRELOAD")
+        self.size = size or int(os.getenv("HIVEMIND_WARM_POOL_SIZE", "2"))
+        self.preload = tuple(preload or (env_preload.split(",") if env_preload else DEFAULT_PRELOAD))
+        self.max_jobs_per_worker = max_jobs_per_worker or int(os.getenv("HIVEMIND_WARM_POOL_MAX_JOBS", "50"))
+        self.memory_limit_mb = memory_limit_mb or int(os.getenv("HIVEMIND_WARM_POOL_MEMORY_MB", "2048"))
+        self.cpu_time_limit = cpu_time_limit or int(os.getenv("HIVEMIND_WARM_POOL_CPU_SECONDS", "60"))
+        self._context = multiprocessing.get_context("spawn")
+        if python_executable:
+            self._context.set_executable(python_executable)
+        self._idle = queue.Queue()
+        # One semaphore per event loop, since asyncio primitives are bound to a loop
+        self._slots = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _new_worker(self):
+        worker = _Worker(self._context, self.preload, self.memory_limit_mb)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _discard(self, worker, graceful=True):
+        worker.close(graceful)
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def warm_up(self):
+        """
+        Starts all workers ahead of the first job.
+        """
+        while len(self._workers) < self.size:
+            self._idle.put(self._new_worker())
+
+    def _get_slots(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            slots = self._slots.get(loop)
+            if slots is None:
+                slots = self._slots[loop] = asyncio.Semaphore(self.size)
+        return slots
+
+    def _run_on_worker(self, code_file, work_dir, timeout, cancelled):
+        try:
+            worker = self._idle.get_nowait()
+        except queue.Empty:
+            worker = self._new_worker()
+
+        exit_code, output, healthy = worker.run(code_file, work_dir, timeout, self.cpu_time_limit, cancelled)
+
+        if healthy and worker.jobs_run < self.max_jobs_per_worker:
+            self._idle.put(worker)
+        else:
+            self._discard(worker, graceful=healthy)
+        return exit_code, output
+
+    async def run(self, code_file, work_dir, timeout, cancelled=None):
+        """
+        Runs a script on an idle worker once one of the `size` slots is free. A timed out or
+        cancelled job's worker is killed, freeing its slot; a fresh worker takes its place on demand.
+
+        Args:
+            code_file (str): Absolute path of the script
+            work_dir (str): Absolute path of the working directory
+            timeout (float): Wall-clock limit in seconds
+            cancelled (threading.Event, optional): Set to abort the job
+
+        Returns:
+            tuple: (exit_code, output)
+        """
+        cancelled = cancelled or threading.Event()
+        async with self._get_slots():
+            job = asyncio.ensure_future(asyncio.to_thread(self._run_on_worker, code_file, work_dir, timeout,
+                                                          cancelled))
+            try:
+                return await asyncio.shield(job)
+            except asyncio.CancelledError:
+                # The job runs on in its worker unless told to stop; the slot is held until the
+                # worker is killed, within CANCEL_POLL_INTERVAL_S
+                cancelled.set()
+                await asyncio.wait([job])
+                raise
+
+    def shutdown(self):
+        """
+        Stops every worker process.
+        """
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+        self._idle = queue.Queue()
+
+
+class WarmPoolCodeExecutor:
+    """
+    Drop-in replacement for `LocalCommandLineCodeExecutor` that runs Python blocks on a
+    `WarmInterpreterPool`. Non-Python blocks are delegated to a local command line executor.
+
+    Attributes:
+        work_dir (str): Directory the code is written to and executed in
+        timeout (int): Wall-clock limit per code block in seconds
+    """
+
+    def __init__(self, work_dir, pool=None, timeout=60):
+        """
+        Args:
+            work_dir (str): Directory for code execution
+            pool (WarmInterpreterPool, optional): Pool to use. Defaults to the shared pool.
+            timeout (int, optional): Wall-clock limit per block in seconds. Defaults to 60
+        """
+        self.work_dir = os.path.abspath(work_dir)
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.timeout = timeout
+        self._pool = pool
+        self._fallback_executor = LocalCommandLineCodeExecutor(work_dir=self.work_dir, timeout=timeout)
+
+    async def execute_code_blocks(self, code_blocks, cancellation_token):
+        """
+        Executes code blocks in order, stopping at the first failure.
+
+        Args:
+            code_blocks (list): CodeBlocks to run
+            cancellation_token (CancellationToken): Token to abort execution
+
+        Returns:
+            CommandLineCodeResult: Exit code, combined output and the last code file
+        """
+        pool = self._pool or get_warm_pool()
+        outputs = []
+        exit_code = 0
+        code_file = None
+
+        for code_block in code_blocks:
+            if cancellation_token.is_cancelled():
+                return CommandLineCodeResult(exit_code=1, output="".join(outputs) + "\n Cancelled", code_file=code_file)
+
+            if code_block.language.lower() not in ("python", "py", "python3"):
+                result = await self._fallback_executor.execute_code_blocks([code_block], cancellation_token)
+                exit_code, code_file = result.exit_code, result.code_file
+                outputs.append(result.output)
+            else:
+                code_hash = hashlib.md5(code_block.code.encode("utf-8")).hexdigest()
+                code_file = os.path.join(self.work_dir, f"tmp_code_{code_hash}.py")
+                with open(code_file, "w") as f:
+                    f.write(code_block.code)
+                # Cancelling the token or the task kills the job's worker
+                cancelled = threading.Event()
+                cancellation_token.add_callback(cancelled.set)
+                exit_code, output = await pool.run(code_file, self.work_dir, self.timeout, cancelled)
+                outputs.append(output)
+
+            if exit_code != 0:
+                break
+
+        return CommandLineCodeResult(exit_code=exit_code, output="".join(outputs), code_file=code_file)
+
+
+_warm_pool = None
+_warm_pool_lock = threading.Lock()
+
+
+def get_warm_pool():
+    """
+    Returns the process-wide warm interpreter pool, creating it on first use.
+
+    Returns:
+        WarmInterpreterPool: The shared pool
+    """
+    global _warm_pool
+    with _warm_pool_lock:
+        if _warm_pool is None:
+            _warm_pool = WarmInterpreterPool()
+        return _warm_pool
@@ -0,0 +1,117 @@
+"""
+Service API Module
+
+This module implements the local HTTP API of the pipeline service (see service/service.py).
+
+Endpoints:
+    POST   /jobs                  Queue a pipeline run; 429 with Retry-After when the queue is full
+    GET    /jobs                  Most recent jobs, optionally filtered by ?status=
+    GET    /jobs/{job_id}         Status and result of a job
+    DELETE /jobs/{job_id}         Cancel a queued or running job
+    GET    /jobs/{job_id}/logs    Log of a job as plain text, streamed until it finishes
+                                  (?follow=false returns what has been logged so far)
+    GET    /stats                 Queue depth, throughput and worker utilization (JSON)
+    GET    /metrics               The same gauges and the telemetry metrics (Prometheus text)
+    GET    /health                Liveness
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import contextlib
+from typing import Literal, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from service.job_queue import QueueFullError, TERMINAL_STATES
+
+# Seconds a client is asked to wait after a refused submission
+RETRY_AFTER_S = 5
+
+
+class JobRequest(BaseModel):
+    """
+    A pipeline run to queue. Unset options take the pipeline's defaults.
+    """
+    query: str = Field(min_length=1, description="Code requirements")
+    run_deployment: bool = Field(default=False, description="Package and deploy the result")
+    generation_mode: Optional[Literal["assistant", "direct", "stream"]] = None
+    optimize: Optional[bool] = None
+    retention: Literal["keep", "on_success", "always"] = "keep"
+    file_name: str = Field(default="test_sample", pattern=r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def create_app(service):
+    """
+    Builds the API of a service. The service is started and stopped with the app.
+
+    Args:
+        service (PipelineService): Service the API drives
+
+    Returns:
+        FastAPI: The application
+    """
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await service.start()
+        try:
+            yield
+        finally:
+            await service.stop()
+
+    app = FastAPI(title="Hivemind pipeline service", lifespan=lifespan)
+
+    def get_job(job_id):
+        job = service.queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    @app.post("/jobs", status_code=202)
+    async def submit_job(request: JobRequest):
+        options = request.model_dump(exclude={"query"}, exclude_none=True)
+        try:
+            return service.submit(request.query, **options)
+        except QueueFullError as e:
+            return JSONResponse(status_code=429, content={"detail": str(e)},
+                                headers={"Retry-After": str(RETRY_AFTER_S)})
+
+    @app.get("/jobs")
+    async def list_jobs(status: Optional[str] = None, limit: int = 100):
+        return service.queue.list_jobs(status, limit)
+
+    @app.get("/jobs/{job_id}")
+    async def read_job(job_id: str):
+        return get_job(job_id)
+
+    @app.delete("/jobs/{job_id}")
+    async def cancel_job(job_id: str):
+        if get_job(job_id)["status"] in TERMINAL_STATES:
+            raise HTTPException(status_code=409, detail=f"Job {job_id} has already finished")
+        return service.cancel(job_id)
+
+    @app.get("/jobs/{job_id}/logs")
+    async def read_logs(job_id: str, follow: bool = True):
+        get_job(job_id)
+
+        async def lines():
+            async for line in service.follow_logs(job_id, follow):
+                yield line + "\n"
+
+        return StreamingResponse(lines(), media_type="text/plain")
+
+    @app.get("/stats")
+    async def read_stats():
+        return service.stats()
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def read_metrics():
+        return PlainTextResponse(service.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "workers": service.workers}
+
+    return app
@@ -0,0 +1,302 @@
+"""
+Job Queue Module
+
+This module implements the durable job queue of the pipeline service, stored in SQLite
+next to the other run state. A job is one pipeline run: its query, run options, status,
+result and log lines. Jobs survive restarts; jobs that were running when the service
+stopped are queued again and, because a job's id is also its run id, resume from their
+checkpoints instead of starting over.
+
+Job states:
+    queued      Waiting for a worker
+    running     Claimed by a worker
+    succeeded   The pipeline returned a result
+    failed      The pipeline raised; the error is stored
+    cancelled   Cancelled before or while running
+
+Configuration (environment variables):
+    HIVEMIND_SERVICE_DB   SQLite file. Defaults to "<HIVEMIND_WORKSPACE_DIR or runs>/jobs.sqlite"
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    logged_at REAL NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_logs_job ON job_logs (job_id, id);
+"""
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+# Window over which throughput is reported
+THROUGHPUT_WINDOW_S = 60
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue is at its maximum depth.
+    """
+
+
+class JobQueue:
+    """
+    Durable FIFO of pipeline jobs with their logs.
+
+    Attributes:
+        path (str): SQLite file of the queue
+    """
+
+    def __init__(self, path=None):
+        """
+        Opens (and creates if needed) the queue.
+
+        Args:
+            path (str, optional): SQLite file. Defaults to $HIVEMIND_SERVICE_DB or
+                "<HIVEMIND_WORKSPACE_DIR or runs>/jobs.sqlite"
+        """
+        self.path = path or os.getenv("HIVEMIND_SERVICE_DB") or os.path.join(
+            os.getenv("HIVEMIND_WORKSPACE_DIR", "runs"), "jobs.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    @staticmethod
+    def _job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def submit(self, query, options=None, max_depth=None):
+        """
+        Queues a job.
+
+        Args:
+            query (str): User query
+            options (dict, optional): Run options passed to `orchestrator.orchestrate_async`
+            max_depth (int, optional): Refuse the job when this many jobs are already queued
+
+        Returns:
+            dict: The queued job
+
+        Raises:
+            QueueFullError: If the queue is at `max_depth`
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock, self._connection:
+            if max_depth is not None:
+                depth = self._connection.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if depth >= max_depth:
+                    raise QueueFullError(f"{depth} jobs are queued, the maximum is {max_depth}")
+            self._connection.execute(
+                "INSERT INTO jobs (id, query, options, status, submitted_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, query, json.dumps(options or {}), time.time()))
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row)
+
+    def claim(self, worker):
+        """
+        Marks the oldest queued job as running.
+
+        Args:
+            worker (str): Name of the claiming worker
+
+        Returns:
+            dict: The claimed job, or None if the queue is empty
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY submitted_at LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, worker = ?, attempts = attempts + 1 WHERE id = ?",
+                (time.time(), worker, row["id"]))
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return self._job(row)
+
+    def finish(self, job_id, status, result=None, error=None):
+        """
+        Records the outcome of a running job.
+
+        Args:
+            job_id (str): Job id
+            status (str): "succeeded", "failed" or "cancelled"
+            result (dict, optional): Result of the pipeline
+            error (str, optional): Error of a failed job
+        """
+        if status not in TERMINAL_STATES:
+            raise ValueError(f"Unknown final status {status!r}")
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), json.dumps(result, default=str) if result is not None else None, error, job_id))
+
+    def requeue(self, job_id):
+        """
+        Puts a running job back in the queue, e.g. when the service shuts down while running it.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE jobs SET status = 'queued', worker = NULL WHERE id = ? AND status = 'running'",
+                                     (job_id,))
+
+    def request_cancel(self, job_id):
+        """
+        Cancels a queued job, or flags a running one for its worker to cancel.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            dict: The job after the request, or None if it does not exist
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ?, cancel_requested = 1 "
+                "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            self._connection.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                                     (job_id,))
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row)
+
+    def recover(self):
+        """
+        Prepares the queue after a restart: running jobs are queued again, unless their
+        cancellation was requested.
+
+        Returns:
+            int: Number of jobs queued again
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE status = 'running' AND cancel_requested = 1",
+                (time.time(),))
+            return self._connection.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running'").rowcount
+
+    def get(self, job_id):
+        """
+        Returns a job, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row)
+
+    def list_jobs(self, status=None, limit=100):
+        """
+        Returns the most recently submitted jobs.
+
+        Args:
+            status (str, optional): Only jobs in this state
+            limit (int, optional): Maximum number of jobs. Defaults to 100
+
+        Returns:
+            list: Jobs, newest first
+        """
+        with self._lock:
+            if status is None:
+                rows = self._connection.execute("SELECT * FROM jobs ORDER BY submitted_at DESC LIMIT ?",
+                                                (limit,)).fetchall()
+            else:
+                rows = self._connection.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY submitted_at DESC LIMIT ?", (status, limit)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def active_ids(self):
+        """
+        Returns the ids of the jobs that are queued or running.
+        """
+        with self._lock:
+            rows = self._connection.execute("SELECT id FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return {row[0] for row in rows}
+
+    def append_log(self, job_id, lines):
+        """
+        Appends output lines to a job's log.
+
+        Args:
+            job_id (str): Job id
+            lines (list): Lines without trailing newlines
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT INTO job_logs (job_id, logged_at, line) VALUES (?, ?, ?)",
+                                         [(job_id, now, line) for line in lines])
+
+    def logs(self, job_id, after=0):
+        """
+        Returns the log lines of a job written after a given line.
+
+        Args:
+            job_id (str): Job id
+            after (int, optional): Id of the last line already read. Defaults to 0
+
+        Returns:
+            list: (line id, time, line) tuples in order
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, logged_at, line FROM job_logs WHERE job_id = ? AND id > ? ORDER BY id",
+                (job_id, after)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def stats(self):
+        """
+        Reports queue depth and throughput.
+
+        Returns:
+            dict: Jobs per state, jobs finished per minute over the last minute, and the
+                median queue wait and run time of those jobs
+        """
+        since = time.time() - THROUGHPUT_WINDOW_S
+        with self._lock:
+            counts = dict(self._connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            recent = self._connection.execute(
+                "SELECT started_at - submitted_at, finished_at - started_at FROM jobs "
+                "WHERE finished_at >= ? AND started_at IS NOT NULL ORDER BY finished_at", (since,)).fetchall()
+
+        def median(values):
+            values = sorted(values)
+            return values[len(values) // 2] if values else None
+
+        return {"jobs": {status: counts.get(status, 0) for status in ("queued", "running") + TERMINAL_STATES},
+                "depth": counts.get("queued", 0),
+                "finished_per_min": len(recent) * 60 / THROUGHPUT_WINDOW_S,
+                "wait_s_p50": median(row[0] for row in recent),
+                "run_s_p50": median(row[1] for row in recent)}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
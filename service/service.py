@@ -0,0 +1,427 @@
+"""
+Pipeline Service Module
+
+This module runs the pipeline as a long-lived service. Instead of paying interpreter
+startup, agent imports, client setup and sandbox warm-up for every query, one process
+keeps the shared model clients (and their connection pools and schedulers), the warm
+interpreter pool and the Azure CLI probes alive, and runs jobs taken from a durable queue
+(see service/job_queue.py) on a pool of async workers.
+
+- Jobs are submitted over a local HTTP API (see service/api.py); submitting while the
+  queue is at its maximum depth is refused, so clients back off instead of piling up work
+- Each worker runs one pipeline at a time, so at most `workers` pipelines are in flight
+- Queued and running jobs can be cancelled; a running job's stages are cancelled and
+  awaited like any halted run
+- Output printed while a job runs is captured into that job's log, which can be streamed
+- Queue depth, throughput and the telemetry metrics are served by the API
+- Jobs interrupted by a shutdown are queued again and resume from their checkpoints
+- After each job, old run workspaces (code, fixes, zips, checkpoints) beyond a keep count
+  or age, and dependency environments unused for a while, are deleted, so a long-running
+  service does not fill the disk
+
+By default the service calls Azure OpenAI and the real Azure CLI. `--backend local` runs it
+against local stand-ins instead: the replaying model client and the stub `az` of
+model_client/replay.py, which answer every query with recorded responses.
+
+Usage:
+    python -m service.service [--host 127.0.0.1] [--port 8000] [--workers 4] [--max-queue 100]
+                              [--backend azure|local]
+
+Configuration (environment variables):
+    HIVEMIND_SERVICE_WORKERS      Concurrent pipelines. Defaults to 4
+    HIVEMIND_SERVICE_MAX_QUEUE    Maximum queued jobs. Defaults to 100
+    HIVEMIND_SERVICE_BACKEND      "azure" or "local" (stand-ins for Azure). Defaults to "azure"
+    HIVEMIND_SERVICE_RECORDING    Recorded scenario replayed by the local backend. Defaults to "default"
+    HIVEMIND_FAKE_LLM_LATENCY     Seconds per call of the local fake LLM. Defaults to 0.05
+    HIVEMIND_SERVICE_KEEP_RUNS    Run workspaces kept; "0" keeps all. Defaults to 200
+    HIVEMIND_SERVICE_RUN_MAX_AGE_S  Delete run workspaces older than this. Defaults to no age limit
+    HIVEMIND_SERVICE_ENV_MAX_AGE_S  Delete dependency environments unused for this long. Defaults to 7 days
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import contextvars
+
+from service.job_queue import JobQueue, TERMINAL_STATES
+from telemetry.telemetry import span, get_telemetry
+
+# Seconds an idle worker waits before looking at the queue again; submissions wake it earlier
+POLL_INTERVAL_S = 1.0
+LOG_POLL_INTERVAL_S = 0.25
+# Dependency environments unused for this long are deleted after a job
+ENV_MAX_AGE_S = 7 * 24 * 3600
+
+_current_job = contextvars.ContextVar("hivemind_job", default=None)
+
+
+class JobLogStream:
+    """
+    Stands in for sys.stdout while the service runs: text printed by a task (or thread)
+    running a job is appended to that job's log, and echoed with the job id as prefix.
+
+    Attributes:
+        stream: The stream replaced
+        queue (JobQueue): Queue the logs are stored in
+    """
+
+    def __init__(self, stream, queue):
+        self.stream = stream
+        self.queue = queue
+        self._partial = {}
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        job_id = _current_job.get()
+        if job_id is None:
+            return self.stream.write(text)
+        with self._lock:
+            *lines, rest = (self._partial.pop(job_id, "") + text).split("\n")
+            if rest:
+                self._partial[job_id] = rest
+        if lines:
+            self.queue.append_log(job_id, lines)
+            self.stream.write("".join(f"[{job_id[:8]}] {line}\n" for line in lines))
+        return len(text)
+
+    def flush_job(self, job_id):
+        """
+        Stores the unterminated last line of a job's output.
+        """
+        with self._lock:
+            rest = self._partial.pop(job_id, "")
+        if rest:
+            self.queue.append_log(job_id, [rest])
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def use_local_stand_ins():
+    """
+    Points the pipeline at local stand-ins for Azure: model calls are answered by the
+    replaying model client and `az` resolves to the stub CLI.
+    """
+    from model_client.replay import FAKE_AZ_DIR, RECORDINGS_PATH, load_recording, replay_client_factory
+    from model_client.model_client import set_model_client_factory
+
+    os.environ["PATH"] = FAKE_AZ_DIR + os.pathsep + os.environ.get("PATH", "")
+    os.environ.setdefault("AZURE_APP_SERVICE_RG", "hivemind-local-rg")
+    os.environ.setdefault("AZURE_APP_SERVICE_NAME", "hivemind-local-app")
+    # The recordings answer the single structured-output call of the "direct" mode
+    os.environ.setdefault("HIVEMIND_GENERATION_MODE", "direct")
+    set_model_client_factory(replay_client_factory(
+        load_recording(RECORDINGS_PATH, os.getenv("HIVEMIND_SERVICE_RECORDING", "default")),
+        latency_s=float(os.getenv("HIVEMIND_FAKE_LLM_LATENCY", "0.05"))))
+    print(f"Using local stand-ins for Azure (replayed model responses, stub az in {FAKE_AZ_DIR})")
+
+
+class PipelineService:
+    """
+    Runs queued pipeline jobs on a pool of async workers.
+
+    Attributes:
+        queue (JobQueue): Durable job queue
+        workers (int): Number of workers, i.e. concurrent pipelines
+        max_depth (int): Maximum number of queued jobs
+        runner (callable): `async runner(query, run_id=..., **options)`, `orchestrate_async` by default
+        started_at (float): Epoch time the service started
+        keep_runs (int): Run workspaces kept after each job, or None to keep all
+        run_max_age_s (float): Age after which run workspaces are deleted, or None
+        env_max_age_s (float): Idle time after which dependency environments are deleted
+    """
+
+    def __init__(self, queue=None, workers=None, max_depth=None, runner=None):
+        """
+        Args:
+            queue (JobQueue, optional): Job queue. Defaults to a queue at $HIVEMIND_SERVICE_DB
+            workers (int, optional): Concurrent pipelines. Defaults to $HIVEMIND_SERVICE_WORKERS or 4
+            max_depth (int, optional): Maximum queued jobs. Defaults to $HIVEMIND_SERVICE_MAX_QUEUE or 100
+            runner (callable, optional): Coroutine function running one job. Defaults to
+                `orchestrator.orchestrate_async`
+        """
+        self.queue = queue or JobQueue()
+        self.workers = workers or int(os.getenv("HIVEMIND_SERVICE_WORKERS", "4"))
+        self.max_depth = max_depth or int(os.getenv("HIVEMIND_SERVICE_MAX_QUEUE", "100"))
+        self.runner = runner
+        self.keep_runs = int(os.getenv("HIVEMIND_SERVICE_KEEP_RUNS", "200")) or None
+        run_max_age_s = os.getenv("HIVEMIND_SERVICE_RUN_MAX_AGE_S")
+        self.run_max_age_s = float(run_max_age_s) if run_max_age_s else None
+        self.env_max_age_s = float(os.getenv("HIVEMIND_SERVICE_ENV_MAX_AGE_S", str(ENV_MAX_AGE_S)))
+        self.started_at = None
+        self._wake = None
+        self._worker_tasks = []
+        self._running = {}
+        self._cancelled = set()
+        self._log_stream = None
+
+    async def warm_up(self):
+        """
+        Imports the agents and creates the shared model clients, the warm interpreter pool
+        and the Azure CLI probe results before the first job needs them.
+        """
+        from qa_tester.qa_tester import QATester  # noqa: F401, imports autogen
+        from qa_tester.warm_pool_executor import get_warm_pool
+        from deployment_agent.deployment_agent import DeploymentAgent  # noqa: F401
+        from deployment_agent.az_cli import AzureCLIError, get_az_probe
+        from model_client.model_client import get_model_client
+        from prompt_registry.prompt_registry import get_prompts
+
+        with span("service_warmup") as warmup_span:
+            get_prompts()
+            # Clients are bound to the running loop, which is the one the jobs run on
+            for role in ("developer", "qa", "deployment"):
+                get_model_client(role)
+            if os.getenv("HIVEMIND_EXECUTOR", "local") == "warm_pool":
+                await asyncio.to_thread(get_warm_pool().warm_up)
+            try:
+                cli = await get_az_probe().cli_status()
+                login = await get_az_probe().login_status() if cli is not None else None
+            except AzureCLIError as e:
+                cli, login = None, None
+                print(f"Azure CLI probe failed: {e}")
+            warmup_span.set(az=cli is not None, logged_in=bool(login and login["logged_in"]))
+
+    async def start(self, warm_up=True):
+        """
+        Recovers interrupted jobs, warms up shared resources and starts the workers. Must be
+        called on the event loop the service runs on.
+
+        Args:
+            warm_up (bool, optional): Run `warm_up` first. Defaults to True
+        """
+        if self.runner is None:
+            from orchestrator import orchestrate_async
+            self.runner = orchestrate_async
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Queued {recovered} interrupted jobs again")
+        if warm_up:
+            await self.warm_up()
+        self._log_stream = JobLogStream(sys.stdout, self.queue)
+        sys.stdout = self._log_stream
+        self._wake = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._work(f"worker-{number}"), name=f"service:worker-{number}")
+                              for number in range(self.workers)]
+        self.started_at = time.time()
+        print(f"Pipeline service started with {self.workers} workers")
+
+    async def stop(self):
+        """
+        Stops the workers. Running jobs are cancelled and queued again, so they resume from
+        their checkpoints when the service is started again.
+        """
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._log_stream is not None:
+            sys.stdout = self._log_stream.stream
+            self._log_stream = None
+        print("Pipeline service stopped")
+
+    def submit(self, query, **options):
+        """
+        Queues a pipeline run.
+
+        Args:
+            query (str): User query
+            **options: Run options passed to the runner (run_deployment, generation_mode, ...)
+
+        Returns:
+            dict: The queued job
+
+        Raises:
+            QueueFullError: If `max_depth` jobs are already queued
+        """
+        job = self.queue.submit(query, options, max_depth=self.max_depth)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued job, or cancels the running pipeline of a job.
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            dict: The job, or None if it does not exist
+        """
+        job = self.queue.request_cancel(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancelled.add(job_id)
+            task.cancel()
+        return job
+
+    async def _work(self, name):
+        while True:
+            # Cleared before claiming, so a submission between the two is not missed
+            self._wake.clear()
+            job = self.queue.claim(name)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=POLL_INTERVAL_S)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job, name)
+            try:
+                await asyncio.to_thread(self.prune)
+            except OSError as e:
+                print(f"Pruning workspaces failed: {e}")
+
+    async def _execute(self, job):
+        _current_job.set(job["id"])
+        try:
+            # The job id is the run id, so a job queued again resumes from its checkpoints
+            return await self.runner(job["query"], run_id=job["id"], **job["options"])
+        finally:
+            self._log_stream.flush_job(job["id"])
+
+    async def _run_job(self, job, worker):
+        job_id = job["id"]
+        print(f"{worker} started job {job_id} (attempt {job['attempts']}): {job['query']!r}")
+        task = asyncio.create_task(self._execute(job), name=f"job:{job_id}")
+        self._running[job_id] = task
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if job_id not in self._cancelled:
+                # The service is stopping, not the job
+                self.queue.requeue(job_id)
+                raise
+            self.queue.finish(job_id, "cancelled")
+            print(f"Job {job_id} cancelled")
+        except Exception as e:
+            self.queue.finish(job_id, "failed", error=f"{type(e).__name__}: {e}")
+            print(f"Job {job_id} failed: {e}")
+        else:
+            self.queue.finish(job_id, "succeeded", result=result)
+            print(f"Job {job_id} finished")
+        finally:
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+
+    def prune(self):
+        """
+        Deletes the run workspaces beyond `keep_runs` or older than `run_max_age_s`, except
+        those of queued and running jobs (which resume from them), and the dependency
+        environments unused for `env_max_age_s`.
+
+        Returns:
+            dict: "runs" and "environments" deleted
+        """
+        from workspace.workspace import prune_workspaces
+        from environments.environments import get_environment_cache
+
+        runs = prune_workspaces(keep_last=self.keep_runs, max_age_seconds=self.run_max_age_s,
+                                exclude=self.queue.active_ids())
+        cache = get_environment_cache()
+        environments = cache.prune(self.env_max_age_s) if cache is not None else []
+        if runs or environments:
+            print(f"Pruned {len(runs)} run workspaces and {len(environments)} dependency environments")
+        return {"runs": runs, "environments": environments}
+
+    async def follow_logs(self, job_id, follow=True):
+        """
+        Yields the log lines of a job, waiting for new ones until it finishes.
+
+        Args:
+            job_id (str): Job id
+            follow (bool, optional): Keep waiting for lines while the job is not finished.
+                Defaults to True
+
+        Yields:
+            str: Log lines
+        """
+        after = 0
+        while True:
+            # Read the status first: once a job is finished, all of its lines are stored
+            job = self.queue.get(job_id)
+            for line_id, _, line in self.queue.logs(job_id, after):
+                after = line_id
+                yield line
+            if job is None or not follow or job["status"] in TERMINAL_STATES:
+                return
+            await asyncio.sleep(LOG_POLL_INTERVAL_S)
+
+    def stats(self):
+        """
+        Reports queue depth, throughput and worker utilization.
+
+        Returns:
+            dict: `JobQueue.stats` plus workers, busy workers, maximum depth, uptime and the
+                LLM scheduler metrics
+        """
+        from model_client.model_client import get_scheduler_metrics
+
+        stats = self.queue.stats()
+        stats.update(workers=self.workers, busy=len(self._running), max_depth=self.max_depth,
+                     uptime_s=time.time() - self.started_at if self.started_at else 0.0,
+                     scheduler=get_scheduler_metrics())
+        return stats
+
+    def render_prometheus(self):
+        """
+        Renders the queue gauges followed by the telemetry metrics in the Prometheus text format.
+
+        Returns:
+            str: Metrics text
+        """
+        stats = self.queue.stats()
+        lines = ["# TYPE hivemind_service_jobs gauge"]
+        lines.extend(f'hivemind_service_jobs{{status="{status}"}} {count}' for status, count in stats["jobs"].items())
+        lines.append("# TYPE hivemind_service_busy_workers gauge")
+        lines.append(f"hivemind_service_busy_workers {len(self._running)}")
+        lines.append("# TYPE hivemind_service_workers gauge")
+        lines.append(f"hivemind_service_workers {self.workers}")
+        lines.append("# TYPE hivemind_service_finished_per_minute gauge")
+        lines.append(f"hivemind_service_finished_per_minute {stats['finished_per_min']}")
+        return "\n".join(lines) + "\n" + get_telemetry().render_prometheus()
+
+
+def serve(host="127.0.0.1", port=8000, workers=None, max_depth=None, backend=None):
+    """
+    Runs the service and its HTTP API until interrupted.
+
+    Args:
+        host (str, optional): Interface to bind. Defaults to "127.0.0.1"
+        port (int, optional): Port. Defaults to 8000
+        workers (int, optional): Concurrent pipelines. Defaults to $HIVEMIND_SERVICE_WORKERS or 4
+        max_depth (int, optional): Maximum queued jobs. Defaults to $HIVEMIND_SERVICE_MAX_QUEUE or 100
+        backend (str, optional): "local" or "azure". Defaults to $HIVEMIND_SERVICE_BACKEND or "azure"
+    """
+    import uvicorn
+    from service.api import create_app
+
+    backend = backend or os.getenv("HIVEMIND_SERVICE_BACKEND", "azure")
+    if backend == "local":
+        use_local_stand_ins()
+    elif backend != "azure":
+        raise ValueError(f"Unknown backend {backend!r}, expected 'local' or 'azure'")
+    service = PipelineService(workers=workers, max_depth=max_depth)
+    uvicorn.run(create_app(service), host=host, port=port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Hivemind pipeline as a service.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port of the HTTP API")
+    parser.add_argument("--workers", type=int, help="Concurrent pipelines")
+    parser.add_argument("--max-queue", type=int, help="Maximum queued jobs before submissions are refused")
+    parser.add_argument("--backend", choices=["azure", "local"],
+                        help="Run against Azure (default) or against local stand-ins for Azure")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_queue, args.backend)
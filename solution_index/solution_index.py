@@ -0,0 +1,273 @@
+"""
+Solution Index Module
+
+This module keeps a local store of verified solutions: the query, final code, verdict and
+build metrics of every run whose code passed testing. Before generating code, the
+orchestrator looks the query up in an offline TF-IDF index over the normalized queries of
+the store; a close enough match serves its verified code, which then only has to pass
+the (cheap) re-test instead of going through generation and fixing again.
+
+Queries are normalized (lower case, stemmed, punctuation and filler words removed) and
+compared as unigrams and bigrams by cosine similarity. Numbers are not fuzzy: "fibonacci up to 100"
+never matches "fibonacci up to 50", because serving the other program would be wrong.
+
+The store is a SQLite file bounded to a maximum number of solutions, evicting the least
+recently used ones. The in-memory index is built from it when it is opened and kept up
+to date with the solutions added by the process.
+
+Configuration (environment variables):
+    HIVEMIND_SOLUTION_INDEX            Set to "0" to disable the index
+    HIVEMIND_SOLUTION_INDEX_PATH       SQLite file. Defaults to "<HIVEMIND_WORKSPACE_DIR or runs>/solutions.sqlite"
+    HIVEMIND_SOLUTION_INDEX_SIZE       Maximum number of solutions. Defaults to 1000
+    HIVEMIND_SOLUTION_THRESHOLD        Minimum cosine similarity of a match. Defaults to 0.85
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import threading
+from collections import Counter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    normalized TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    code TEXT NOT NULL,
+    verified INTEGER NOT NULL,
+    metrics TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+"""
+# Words that do not change what program a query asks for
+STOP_WORDS = frozenset("""
+a an the to of and or in on for with that which please me my i you can could would should
+will just simple small some this it is be using use python script program code
+""".split())
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SUFFIXES = ("ing", "ed", "es", "s", "e")
+
+
+def _stem(token):
+    """
+    Strips a common inflection so that e.g. "prints", "printing" and "print" compare equal.
+    """
+    if len(token) > 4 and not token.isdigit():
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                return token[:-len(suffix)]
+    return token
+
+
+def normalize_query(query):
+    """
+    Normalizes a query to its significant words.
+
+    Args:
+        query (str): User query
+
+    Returns:
+        list: Lower-case, stemmed tokens without punctuation or filler words
+    """
+    return [_stem(token) for token in TOKEN_PATTERN.findall(query.lower()) if token not in STOP_WORDS]
+
+
+def _features(tokens):
+    return Counter(tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])])
+
+
+def _numbers(tokens):
+    return tuple(token for token in tokens if token.isdigit())
+
+
+class SolutionIndex:
+    """
+    Verified solutions searchable by query similarity.
+
+    Attributes:
+        path (str): SQLite file of the store
+        max_entries (int): Maximum number of solutions kept
+        threshold (float): Minimum cosine similarity of a match
+        lookups (int): Lookups made by this process
+        hits (int): Lookups answered with a stored solution
+        saved_s (float): Build time (generation and fixing) of the served solutions
+    """
+
+    def __init__(self, path=None, max_entries=None, threshold=None):
+        """
+        Opens (and creates if needed) the store and builds the index from it.
+
+        Args:
+            path (str, optional): SQLite file. Defaults to $HIVEMIND_SOLUTION_INDEX_PATH or
+                "<HIVEMIND_WORKSPACE_DIR or runs>/solutions.sqlite"
+            max_entries (int, optional): Maximum solutions. Defaults to $HIVEMIND_SOLUTION_INDEX_SIZE or 1000
+            threshold (float, optional): Minimum similarity. Defaults to $HIVEMIND_SOLUTION_THRESHOLD or 0.85
+        """
+        self.path = path or os.getenv("HIVEMIND_SOLUTION_INDEX_PATH") or os.path.join(
+            os.getenv("HIVEMIND_WORKSPACE_DIR", "runs"), "solutions.sqlite")
+        self.max_entries = max_entries or int(os.getenv("HIVEMIND_SOLUTION_INDEX_SIZE", "1000"))
+        self.threshold = threshold if threshold is not None else float(os.getenv("HIVEMIND_SOLUTION_THRESHOLD", "0.85"))
+        self.lookups = 0
+        self.hits = 0
+        self.saved_s = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+            rows = self._connection.execute("SELECT normalized FROM solutions").fetchall()
+        # normalized query -> term counts; document frequencies over all stored queries
+        self._documents = {}
+        self._document_frequency = Counter()
+        for row in rows:
+            self._index(row["normalized"])
+
+    def _index(self, normalized):
+        features = _features(normalized.split())
+        self._documents[normalized] = features
+        self._document_frequency.update(features.keys())
+
+    def _unindex(self, normalized):
+        features = self._documents.pop(normalized, None)
+        if features is not None:
+            self._document_frequency.subtract(features.keys())
+
+    def _vector(self, features):
+        total = len(self._documents) + 1
+        vector = {term: count * (math.log(total / (1 + self._document_frequency[term])) + 1)
+                  for term, count in features.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items()} if norm else {}
+
+    def _similarity(self, vector, features):
+        other = self._vector(features)
+        return sum(weight * other.get(term, 0.0) for term, weight in vector.items())
+
+    def lookup(self, query):
+        """
+        Finds the stored solution most similar to a query.
+
+        Args:
+            query (str): User query
+
+        Returns:
+            dict: "query", "code", "verified", "metrics" and "similarity" of the best match at or
+                above the threshold, or None
+        """
+        tokens = normalize_query(query)
+        normalized = " ".join(tokens)
+        with self._lock:
+            self.lookups += 1
+            best, best_similarity = None, 0.0
+            if tokens:
+                vector = self._vector(_features(tokens))
+                numbers = _numbers(tokens)
+                for candidate, features in self._documents.items():
+                    if _numbers(candidate.split()) != numbers:
+                        continue
+                    similarity = 1.0 if candidate == normalized else self._similarity(vector, features)
+                    if similarity > best_similarity:
+                        best, best_similarity = candidate, similarity
+            if best is None or best_similarity < self.threshold:
+                return None
+
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE solutions SET hits = hits + 1, last_used_at = ? WHERE normalized = ?", (time.time(), best))
+                row = self._connection.execute("SELECT * FROM solutions WHERE normalized = ?", (best,)).fetchone()
+            if row is None:
+                return None
+            metrics = json.loads(row["metrics"])
+            self.hits += 1
+            self.saved_s += metrics.get("build_s", 0.0)
+        return {"query": row["query"], "code": row["code"], "verified": bool(row["verified"]),
+                "metrics": metrics, "similarity": best_similarity}
+
+    def add(self, query, code, verified=True, metrics=None):
+        """
+        Stores a solution that passed testing, replacing one for the same normalized query and
+        evicting the least recently used solutions beyond `max_entries`.
+
+        Args:
+            query (str): User query
+            code (str): Final, tested code
+            verified (bool, optional): Whether the code passed on the first test. Defaults to True
+            metrics (dict, optional): Build metrics, e.g. "build_s" (generation and fixing time)
+        """
+        tokens = normalize_query(query)
+        if not tokens:
+            return
+        normalized = " ".join(tokens)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO solutions (normalized, query, code, verified, metrics, created_at, "
+                "last_used_at, hits) VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (normalized, query, code, int(verified), json.dumps(metrics or {}), now, now))
+            if normalized not in self._documents:
+                self._index(normalized)
+            evicted = self._connection.execute(
+                "SELECT normalized FROM solutions ORDER BY last_used_at DESC LIMIT -1 OFFSET ?",
+                (self.max_entries,)).fetchall()
+            for row in evicted:
+                self._connection.execute("DELETE FROM solutions WHERE normalized = ?", (row["normalized"],))
+                self._unindex(row["normalized"])
+
+    def remove(self, query):
+        """
+        Removes the solution stored for a query, e.g. one that was served and then failed its re-test.
+
+        Args:
+            query (str): Query of the stored solution (the "query" returned by `lookup`)
+
+        Returns:
+            bool: Whether a solution was removed
+        """
+        normalized = " ".join(normalize_query(query))
+        with self._lock, self._connection:
+            removed = self._connection.execute("DELETE FROM solutions WHERE normalized = ?", (normalized,)).rowcount
+            self._unindex(normalized)
+        return bool(removed)
+
+    def stats(self):
+        """
+        Reports the hit rate and build time saved by this process.
+
+        Returns:
+            dict: Lookups, hits, hit rate, seconds saved and number of stored solutions
+        """
+        with self._lock:
+            return {"lookups": self.lookups, "hits": self.hits,
+                    "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                    "saved_s": self.saved_s, "entries": len(self._documents)}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_solution_index = None
+
+
+def get_solution_index():
+    """
+    Returns the process-wide solution index, opening it on first use.
+
+    Returns:
+        SolutionIndex: Shared index, or None if disabled with HIVEMIND_SOLUTION_INDEX=0
+    """
+    global _solution_index
+    if os.getenv("HIVEMIND_SOLUTION_INDEX", "1") == "0":
+        return None
+    if _solution_index is None:
+        _solution_index = SolutionIndex()
+    return _solution_index
@@ -0,0 +1,454 @@
+"""
+Telemetry Module
+
+This module implements structured tracing for the pipeline. Every orchestrator stage
+(code, test, fix, zip, deploy, ...), every model call and every executor run is recorded
+as a span with its wall time, outcome and attributes such as queue time, prompt/completion
+tokens and cache hits. Spans carry the id of the run they belong to and of their parent
+span, so a run's time and token spend can be broken down afterwards.
+
+Spans are appended to a local JSONL file and aggregated in memory; the aggregates can be
+served as Prometheus text metrics. A summary of p50/p95 wall time per stage is available
+from the command line:
+
+    python -m telemetry.telemetry summary [--file runs/telemetry.jsonl] [--run-id <run_id>]
+
+Configuration (environment variables):
+    HIVEMIND_TELEMETRY          Set to "0" to stop writing spans to the JSONL file
+    HIVEMIND_TELEMETRY_FILE     JSONL file. Defaults to "<HIVEMIND_WORKSPACE_DIR or runs>/telemetry.jsonl"
+    HIVEMIND_METRICS_PORT       Port of the Prometheus text endpoint started by the orchestrator CLI
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+import contextlib
+import contextvars
+from collections import defaultdict, deque
+
+_run_id = contextvars.ContextVar("hivemind_run_id", default=None)
+_current_span = contextvars.ContextVar("hivemind_span", default=None)
+
+
+def _percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Span:
+    """
+    A timed unit of work.
+
+    Attributes:
+        name (str): Stage or operation name, e.g. "code" or "CODE_ASSESSMENT_AGENT"
+        kind (str): "run", "stage", "llm" or "executor"
+        run_id (str): Run the span belongs to
+        span_id (str): Unique id of the span
+        parent_id (str): Id of the enclosing span, if any
+        attributes (dict): Measurements and outcome details
+    """
+
+    def __init__(self, name, kind="stage", parent=None, **attributes):
+        self.name = name
+        self.kind = kind
+        self.run_id = _run_id.get()
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.status = "ok"
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.wall_s = None
+
+    def set(self, **attributes):
+        """
+        Sets attributes on the span.
+        """
+        self.attributes.update(attributes)
+
+    def add(self, key, value):
+        """
+        Adds `value` to a numeric attribute, e.g. queue time accumulated over retries.
+        """
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def end(self, error=None):
+        """
+        Stops the clock and hands the span to the telemetry sink.
+        """
+        self.wall_s = time.perf_counter() - self._started
+        if error is not None:
+            self.status = "error"
+            self.attributes["error"] = f"{type(error).__name__}: {error}"[:500]
+        get_telemetry().record(self)
+
+    def to_dict(self):
+        return {"run_id": self.run_id, "span_id": self.span_id, "parent_id": self.parent_id,
+                "kind": self.kind, "name": self.name, "started_at": self.started_at,
+                "wall_s": self.wall_s, "status": self.status, **self.attributes}
+
+
+class Telemetry:
+    """
+    Writes finished spans to a JSONL file and keeps in-memory aggregates for metrics.
+
+    Attributes:
+        path (str): JSONL file spans are appended to
+        enabled (bool): Whether spans are written to the file
+    """
+
+    def __init__(self, path=None, enabled=None, max_samples=1000):
+        """
+        Args:
+            path (str, optional): JSONL file. Defaults to $HIVEMIND_TELEMETRY_FILE or
+                "<HIVEMIND_WORKSPACE_DIR or runs>/telemetry.jsonl"
+            enabled (bool, optional): Write spans to the file. Defaults to $HIVEMIND_TELEMETRY != "0"
+            max_samples (int, optional): Wall times kept per span name for quantiles. Defaults to 1000
+        """
+        self.path = path or os.getenv("HIVEMIND_TELEMETRY_FILE") or os.path.join(
+            os.getenv("HIVEMIND_WORKSPACE_DIR", "runs"), "telemetry.jsonl")
+        self.enabled = enabled if enabled is not None else os.getenv("HIVEMIND_TELEMETRY", "1") != "0"
+        self._lock = threading.Lock()
+        self._durations = defaultdict(lambda: deque(maxlen=max_samples))
+        self._duration_sums = defaultdict(float)
+        self._outcomes = defaultdict(int)
+        self._tokens = defaultdict(int)
+        self._cache = defaultdict(int)
+        self._queue_seconds = defaultdict(float)
+
+    def record(self, span):
+        """
+        Aggregates a finished span and appends it to the JSONL file.
+
+        Args:
+            span (Span): Finished span
+        """
+        record = span.to_dict()
+        with self._lock:
+            key = (span.kind, span.name)
+            self._durations[key].append(span.wall_s)
+            self._duration_sums[key] += span.wall_s
+            self._outcomes[key + (span.status,)] += 1
+            if span.kind == "llm":
+                cached = bool(record.get("cached"))
+                self._cache[(span.name, "hit" if cached else "miss")] += 1
+                if not cached:
+                    self._tokens[(span.name, "prompt")] += record.get("prompt_tokens") or 0
+                    self._tokens[(span.name, "completion")] += record.get("completion_tokens") or 0
+                self._queue_seconds[span.name] += record.get("queue_s") or 0.0
+
+            if self.enabled:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def render_prometheus(self):
+        """
+        Renders the in-memory aggregates in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = ["# TYPE hivemind_span_duration_seconds summary"]
+        with self._lock:
+            for (kind, name), samples in sorted(self._durations.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                ordered = sorted(samples)
+                for quantile in (0.5, 0.95):
+                    lines.append(f'hivemind_span_duration_seconds{{{labels},quantile="{quantile}"}} '
+                                 f'{_percentile(ordered, quantile)}')
+                lines.append(f"hivemind_span_duration_seconds_sum{{{labels}}} {self._duration_sums[(kind, name)]}")
+                lines.append(f"hivemind_span_duration_seconds_count{{{labels}}} {len(ordered)}")
+
+            lines.append("# TYPE hivemind_spans_total counter")
+            for (kind, name, status), count in sorted(self._outcomes.items()):
+                lines.append(f'hivemind_spans_total{{kind="{kind}",name="{name}",status="{status}"}} {count}')
+
+            lines.append("# TYPE hivemind_llm_tokens_total counter")
+            for (prompt, token_type), count in sorted(self._tokens.items()):
+                lines.append(f'hivemind_llm_tokens_total{{prompt="{prompt}",type="{token_type}"}} {count}')
+
+            lines.append("# TYPE hivemind_llm_cache_total counter")
+            for (prompt, result), count in sorted(self._cache.items()):
+                lines.append(f'hivemind_llm_cache_total{{prompt="{prompt}",result="{result}"}} {count}')
+
+            lines.append("# TYPE hivemind_llm_queue_seconds_total counter")
+            for prompt, seconds in sorted(self._queue_seconds.items()):
+                lines.append(f'hivemind_llm_queue_seconds_total{{prompt="{prompt}"}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+
+_telemetry = None
+
+
+def get_telemetry():
+    """
+    Returns the process-wide telemetry sink, creating it on first use.
+
+    Returns:
+        Telemetry: Shared telemetry sink
+    """
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry()
+    return _telemetry
+
+
+def reset_telemetry(path=None, enabled=None):
+    """
+    Replaces the process-wide telemetry sink, e.g. to give each benchmark its own file.
+
+    Args:
+        path (str, optional): JSONL file of the new sink
+        enabled (bool, optional): Write spans to the file
+
+    Returns:
+        Telemetry: The new sink
+    """
+    global _telemetry
+    _telemetry = Telemetry(path=path, enabled=enabled)
+    return _telemetry
+
+
+def current_span():
+    """
+    Returns the innermost open span of the current task, or None.
+    """
+    return _current_span.get()
+
+
+@contextlib.contextmanager
+def run_context(run_id):
+    """
+    Ties every span opened inside the block (including in tasks it starts) to `run_id`.
+
+    Args:
+        run_id (str): Identifier of the run
+    """
+    token = _run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _run_id.reset(token)
+
+
+@contextlib.contextmanager
+def span(name, kind="stage", **attributes):
+    """
+    Records the enclosed block as a span. Works in both sync and async code.
+
+    Args:
+        name (str): Stage or operation name
+        kind (str, optional): "run", "stage", "llm" or "executor". Defaults to "stage"
+        **attributes: Initial attributes
+
+    Yields:
+        Span: The open span, to attach measurements and outcome with `set`
+    """
+    current = Span(name, kind, parent=_current_span.get(), **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        _current_span.reset(token)
+        current.end(error=e)
+        raise
+    _current_span.reset(token)
+    current.end()
+
+
+def _usage_attributes(result):
+    usage = getattr(result, "usage", None)
+    return {"prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "cached": bool(getattr(result, "cached", False)),
+            "finish_reason": getattr(result, "finish_reason", None)}
+
+
+class TracedChatCompletionClient:
+    """
+    Wraps a chat completion client so every call is recorded as an "llm" span named after
+    its prompt, with token usage, cache hits and (from the scheduler) queue time.
+    """
+
+    accepts_prompt_name = True
+
+    def __init__(self, client, deployment=None):
+        """
+        Args:
+            client: The underlying chat completion client
+            deployment (str, optional): Deployment name recorded on every span
+        """
+        self._client = client
+        self._deployment = deployment
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _inner_kwargs(self, prompt_name, kwargs):
+        if getattr(self._client, "accepts_prompt_name", False):
+            return dict(kwargs, prompt_name=prompt_name)
+        return kwargs
+
+    async def create(self, messages, prompt_name=None, **kwargs):
+        """
+        Performs and records a model call.
+
+        Args:
+            messages (list): Prompt messages
+            prompt_name (str, optional): Prompt type from prompts.yaml
+            **kwargs: Passed through to the wrapped client's `create`
+
+        Returns:
+            CreateResult: Model response
+        """
+        with span(prompt_name or "unnamed", kind="llm", deployment=self._deployment) as llm_span:
+            result = await self._client.create(messages, **self._inner_kwargs(prompt_name, kwargs))
+            llm_span.set(**_usage_attributes(result))
+            return result
+
+    async def create_stream(self, messages, prompt_name=None, **kwargs):
+        """
+        Streams and records a model call. Queue time is part of the time to first chunk.
+
+        Yields:
+            str chunks, then the final CreateResult
+        """
+        # The span is not made current: a generator may be finalized outside the caller's context
+        stream_span = Span(prompt_name or "unnamed", "llm", parent=_current_span.get(),
+                           deployment=self._deployment, stream=True)
+        error = None
+        try:
+            async for chunk in self._client.create_stream(messages, **self._inner_kwargs(prompt_name, kwargs)):
+                if "first_chunk_s" not in stream_span.attributes:
+                    stream_span.set(first_chunk_s=time.perf_counter() - stream_span._started)
+                if not isinstance(chunk, str):
+                    stream_span.set(**_usage_attributes(chunk))
+                yield chunk
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            stream_span.end(error=error)
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serves `render_prometheus()` at http://<host>:<port>/metrics from a daemon thread.
+
+    Args:
+        port (int, optional): Port. Defaults to $HIVEMIND_METRICS_PORT
+        host (str, optional): Interface to bind. Defaults to "127.0.0.1"
+
+    Returns:
+        ThreadingHTTPServer: The running server, or None if no port is configured
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    port = port or os.getenv("HIVEMIND_METRICS_PORT")
+    if not port:
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_telemetry().render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics at http://{host}:{port}/metrics")
+    return server
+
+
+def summarize(path=None, run_id=None):
+    """
+    Summarizes recorded spans per stage and per prompt.
+
+    Args:
+        path (str, optional): JSONL file. Defaults to the telemetry file
+        run_id (str, optional): Only include spans of this run
+
+    Returns:
+        dict: Per (kind, name) count, errors, p50/p95/total wall time, and for model calls
+            tokens, cache hits and queue time
+    """
+    path = path or get_telemetry().path
+    groups = defaultdict(list)
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if run_id is None or record.get("run_id") == run_id:
+                groups[f"{record['kind']}:{record['name']}"].append(record)
+
+    summary = {}
+    for key, records in sorted(groups.items()):
+        ordered = sorted(r["wall_s"] for r in records)
+        entry = {"count": len(records),
+                 "errors": sum(r["status"] != "ok" for r in records),
+                 "p50_s": _percentile(ordered, 0.5),
+                 "p95_s": _percentile(ordered, 0.95),
+                 "total_s": sum(ordered)}
+        if key.startswith("llm:"):
+            billed = [r for r in records if not r.get("cached")]
+            entry.update(cache_hits=len(records) - len(billed),
+                         prompt_tokens=sum(r.get("prompt_tokens") or 0 for r in billed),
+                         completion_tokens=sum(r.get("completion_tokens") or 0 for r in billed),
+                         queue_s=sum(r.get("queue_s") or 0.0 for r in records))
+        summary[key] = entry
+    return summary
+
+
+def format_summary(summary):
+    """
+    Formats `summarize()` output as a table.
+
+    Args:
+        summary (dict): Output of `summarize`
+
+    Returns:
+        str: Human readable table
+    """
+    def seconds(value):
+        return "-" if value is None else f"{value:.3f}"
+
+    lines = [f"{'span':<40} {'count':>6} {'errors':>6} {'p50_s':>9} {'p95_s':>9} {'total_s':>9} "
+             f"{'tokens':>9} {'cached':>6}"]
+    for key, entry in summary.items():
+        tokens = entry.get("prompt_tokens", 0) + entry.get("completion_tokens", 0) if "prompt_tokens" in entry else ""
+        lines.append(f"{key:<40} {entry['count']:>6} {entry['errors']:>6} {seconds(entry['p50_s']):>9} "
+                     f"{seconds(entry['p95_s']):>9} {seconds(entry['total_s']):>9} {tokens:>9} "
+                     f"{entry.get('cache_hits', ''):>6}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline telemetry")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subcommands.add_parser("summary", help="Report p50/p95 wall time per stage")
+    summary_parser.add_argument("--file", help="Telemetry JSONL file")
+    summary_parser.add_argument("--run-id", help="Only include spans of this run")
+    summary_parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        result = summarize(args.file, args.run_id)
+        print(json.dumps(result, indent=2) if args.json else format_summary(result))
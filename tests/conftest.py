@@ -0,0 +1,20 @@
+"""
+Shared pytest setup: the packages are imported from the repository root, as the
+orchestrator does, and spans recorded by the code under test go to a temporary file
+instead of runs/telemetry.jsonl.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telemetry.telemetry import reset_telemetry
+
+
+@pytest.fixture(autouse=True)
+def telemetry(tmp_path):
+    yield reset_telemetry(path=str(tmp_path / "telemetry.jsonl"))
+    reset_telemetry(enabled=False)
@@ -0,0 +1,92 @@
+import os
+import json
+import asyncio
+
+from deployment_agent.az_cli import AzureCLIProbe, parse_az_version, render_deploy_command
+
+FAKE_AZ_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_client", "fake_az")
+
+
+class SlowProbe:
+    def __init__(self):
+        self.runs = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "value", 60.0
+
+
+def test_concurrent_callers_share_one_probe_and_its_cached_result():
+    async def run():
+        probe, slow = AzureCLIProbe(), SlowProbe()
+        callers = [asyncio.create_task(probe._cached("cli", slow)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        slow.release.set()
+        assert await asyncio.gather(*callers) == ["value"] * 3
+        assert await probe._cached("cli", slow) == "value"
+        assert slow.runs == 1
+
+    asyncio.run(run())
+
+
+def test_probe_runs_on_while_a_caller_waits_and_stops_when_none_does():
+    async def run():
+        probe, slow = AzureCLIProbe(), SlowProbe()
+        first = asyncio.create_task(probe._cached("cli", slow))
+        second = asyncio.create_task(probe._cached("cli", slow))
+        await asyncio.sleep(0.01)
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        assert not slow.cancelled
+
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        assert slow.cancelled
+        assert not probe._inflight
+
+    asyncio.run(run())
+
+
+def test_deploy_command_values_are_not_split_or_interpreted():
+    command = render_deploy_command(resource_group="rg", app_name="app; rm -rf /", zip_file_path="/tmp/my code.zip")
+    assert command[:3] == ["az", "webapp", "deploy"]
+    assert "app; rm -rf /" in command and "/tmp/my code.zip" in command
+    assert render_deploy_command("deploy --to {app_name}", app_name="a b") == ["deploy", "--to", "a b"]
+
+
+def test_parse_az_version():
+    assert parse_az_version('{"azure-cli": "2.67.0", "azure-cli-core": "2.67.0"}') == (2, 67, 0)
+    assert parse_az_version("azure-cli                         2.61.1\n\ncore  2.61.1") == (2, 61, 1)
+    assert parse_az_version("command not found") is None
+
+
+def test_probes_run_the_cli_once_while_cached(tmp_path, monkeypatch):
+    log = tmp_path / "az.jsonl"
+    monkeypatch.setenv("PATH", FAKE_AZ_DIR + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("HIVEMIND_FAKE_AZ_LATENCY", "0")
+    monkeypatch.setenv("HIVEMIND_FAKE_AZ_LOG", str(log))
+
+    async def run():
+        probe = AzureCLIProbe()
+        cli = await probe.cli_status()
+        login = await probe.login_status()
+        assert cli["version"] == (2, 67, 0)
+        assert login["logged_in"]
+        await probe.cli_status()
+        await probe.ensure_login()
+        probe.invalidate("login")
+        await probe.login_status()
+
+    asyncio.run(run())
+    commands = [json.loads(line)["args"][:2] for line in log.read_text().splitlines()]
+    assert commands == [["version", "--output"], ["account", "get-access-token"], ["account", "get-access-token"]]
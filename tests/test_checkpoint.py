@@ -0,0 +1,42 @@
+import pytest
+
+from workspace.checkpoint import CheckpointStore, inputs_hash
+
+
+def test_completed_stages_are_reloaded_with_the_same_inputs(tmp_path):
+    code_file = tmp_path / "code.py"
+    code_file.write_text("print('hello')\n")
+    store = CheckpointStore(str(tmp_path), run_id="run-1")
+    store.begin("build an api", {"optimize": False})
+    store.record("generate", inputs_hash("build an api"), {"code_file": str(code_file)}, files=[str(code_file)])
+
+    reloaded = CheckpointStore(str(tmp_path))
+    assert reloaded.exists and reloaded.state["run_id"] == "run-1"
+    assert reloaded.completed("generate", inputs_hash("build an api")) == {"code_file": str(code_file)}
+    assert reloaded.completed("generate", inputs_hash("build a cli")) is None
+    assert reloaded.completed("test", inputs_hash("build an api")) is None
+
+
+def test_changed_or_removed_files_invalidate_a_stage(tmp_path):
+    code_file = tmp_path / "code.py"
+    code_file.write_text("print('hello')\n")
+    store = CheckpointStore(str(tmp_path), run_id="run-1")
+    store.record("generate", inputs_hash(1), {}, files=[str(code_file)])
+
+    code_file.write_text("print('changed')\n")
+    assert store.completed("generate", inputs_hash(1)) is None
+    code_file.unlink()
+    assert store.completed("generate", inputs_hash(1)) is None
+
+
+def test_a_checkpoint_is_only_resumed_for_its_own_query(tmp_path):
+    CheckpointStore(str(tmp_path), run_id="run-1").begin("build an api", {})
+    store = CheckpointStore(str(tmp_path))
+    store.begin("build an api", {"optimize": True})
+    with pytest.raises(ValueError):
+        store.begin("build a cli", {})
+
+
+def test_inputs_hash_ignores_key_order():
+    assert inputs_hash({"a": 1, "b": 2}) == inputs_hash({"b": 2, "a": 1})
+    assert inputs_hash("code", 1) != inputs_hash("code", 2)
@@ -0,0 +1,137 @@
+import json
+import asyncio
+import textwrap
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("autogen_core")
+pytest.importorskip("pydantic")
+
+from coding_agent.coding_agent import CodeGenratingAgent, CodePatch, GeneratedCode
+
+# Long enough for an error-focused patch (HIVEMIND_FIX_PATCH_MIN_LINES)
+BUGGY = textwrap.dedent('''\
+    def total(values):
+        return sum(value for value in values) / len(values)
+    ''') + "\n".join(f"HELPER_{index} = {index}" for index in range(40)) + textwrap.dedent('''
+
+    if __name__ == "__main__":
+        print(total([]))
+    ''')
+TRACEBACK = '''Traceback (most recent call last):
+  File "/work/code_generated.py", line 44, in <module>
+  File "/work/code_generated.py", line 2, in total
+ZeroDivisionError: division by zero
+'''
+FIXED_TOTAL = "def total(values):\n    return sum(values) / len(values) if values else 0.0\n"
+
+
+class ModelClient:
+    """
+    Answers every call with the next of `contents` and records the calls.
+    """
+
+    def __init__(self, *contents):
+        self.contents = list(contents)
+        self.calls = []
+
+    async def create(self, messages, prompt_name=None, extra_create_args=None):
+        self.calls.append({"prompt": messages[0].content, "prompt_name": prompt_name,
+                           "extra_create_args": extra_create_args or {}})
+        return SimpleNamespace(content=self.contents.pop(0), usage=None, finish_reason="stop")
+
+
+def test_direct_generation_makes_one_structured_call():
+    client = ModelClient(json.dumps({"code": "print('hello')\n"}))
+    agent = CodeGenratingAgent("print hello", model_client=client)
+
+    assert asyncio.run(agent.direct_generate()) == "print('hello')\n"
+    assert len(client.calls) == 1
+    assert client.calls[0]["prompt_name"] == "DEVELOPER_AGENT"
+    assert "print hello" in client.calls[0]["prompt"]
+    assert client.calls[0]["extra_create_args"] == {"response_format": GeneratedCode}
+
+
+def test_located_errors_are_fixed_with_a_patch_of_the_failing_definition(tmp_path):
+    buggy = tmp_path / "code_generated.py"
+    buggy.write_text(BUGGY)
+    client = ModelClient(json.dumps({"edits": [{"name": "total", "code": FIXED_TOTAL}], "imports": []}))
+    agent = CodeGenratingAgent(model_client=client)
+
+    code, path, mode = asyncio.run(agent.fix_code(str(buggy), str(tmp_path / "fixed"), "code_fixed",
+                                                  error_output=TRACEBACK))
+
+    assert mode == "patch"
+    assert code == BUGGY.replace("def total(values):\n    return sum(value for value in values) / len(values)\n",
+                                 FIXED_TOTAL)
+    with open(path) as f:
+        assert f.read() == code
+    call = client.calls[0]
+    assert call["prompt_name"] == "REFACTOR_PATCH_AGENT"
+    assert call["extra_create_args"]["response_format"] is CodePatch
+    # Only the failing definition is sent, not the whole file
+    assert "HELPER_30" not in call["prompt"] and "ZeroDivisionError" in call["prompt"]
+
+
+def test_a_patch_that_does_not_apply_falls_back_to_a_whole_file_fix(tmp_path):
+    buggy = tmp_path / "code_generated.py"
+    buggy.write_text(BUGGY)
+    whole_file = "print(0.0)\n"
+    client = ModelClient(json.dumps({"edits": [{"name": "total", "code": "def average(values):\n    pass\n"}]}),
+                         f"```python\n{whole_file}```")
+    agent = CodeGenratingAgent(model_client=client)
+
+    code, path, mode = asyncio.run(agent.fix_code(str(buggy), str(tmp_path / "fixed"), "code_fixed",
+                                                  error_output=TRACEBACK))
+
+    assert (code, mode) == (whole_file, "whole_file")
+    assert [call["prompt_name"] for call in client.calls] == ["REFACTOR_PATCH_AGENT", "REFACTOR_CODE_AGENT"]
+
+
+class StreamingClient:
+    """
+    Streams each of `completions` in small chunks, one completion per call, and records how
+    many chunks of each were read before the stream was closed.
+    """
+
+    def __init__(self, *completions):
+        self.completions = list(completions)
+        self.read = []
+
+    def create_stream(self, messages, prompt_name=None):
+        completion = self.completions.pop(0)
+        self.read.append(0)
+
+        async def stream():
+            for start in range(0, len(completion), 8):
+                self.read[-1] += 1
+                yield completion[start:start + 8]
+            yield SimpleNamespace(content=completion)
+
+        return stream()
+
+
+def test_streaming_retries_an_abandoned_completion_and_stops_at_the_closing_fence(tmp_path):
+    prose = "Sure! Here is a function that does exactly what you asked for, with comments.\n" * 20
+    code = "def double(value):\n    return value * 2\n"
+    client = StreamingClient(prose, "```python\n" + code + "```\n" + "trailing prose " * 50)
+    agent = CodeGenratingAgent("double a number", model_client=client)
+
+    path = tmp_path / "code.py"
+    assert asyncio.run(agent.stream_code("prompt", str(path))) == code
+    assert path.read_text() == code
+    # Both completions were abandoned well before their end
+    assert client.read[0] < len(prose) // 8
+    assert client.read[1] <= len("```python\n" + code + "```\n") // 8 + 1
+
+
+def test_streaming_gives_up_after_max_attempts(tmp_path):
+    from coding_agent.streaming import StreamAborted
+
+    prose = "I cannot write this code, but here is an explanation of the approach.\n" * 5
+    client = StreamingClient(prose, prose)
+    agent = CodeGenratingAgent("double a number", model_client=client)
+    with pytest.raises(StreamAborted):
+        asyncio.run(agent.stream_code("prompt", str(tmp_path / "code.py"), max_attempts=2))
+    assert len(client.read) == 2 and not client.completions
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from environments.environments import (ENVIRONMENT_FILE, EnvironmentBuildError, EnvironmentCache, environment_key,
+                                       infer_requirements, resolve_requirements)
+
+
+def test_prune_deletes_environments_unused_for_a_while(tmp_path):
+    cache = EnvironmentCache(root=str(tmp_path))
+    old = time.time() - 3600
+    for name in ("unused", "recent", "abc.build-123"):
+        os.makedirs(tmp_path / name)
+    os.utime(tmp_path / "unused", (old, old))
+    os.utime(tmp_path / "abc.build-123", (old, old))
+
+    assert cache.prune(600) == ["unused"]
+    assert sorted(os.listdir(tmp_path)) == ["abc.build-123", "recent"]
+
+
+def test_requirements_are_inferred_from_third_party_imports(tmp_path):
+    (tmp_path / "helpers.py").write_text("")
+    code = tmp_path / "main.py"
+    code.write_text("import os, json\nimport yaml\nfrom fastapi import FastAPI\nfrom . import sibling\n"
+                    "from helpers import thing\nimport numpy.linalg\n")
+    assert infer_requirements(str(code)) == ["fastapi", "numpy", "PyYAML", "uvicorn"]
+
+
+def test_requirements_are_pinned_to_the_newest_wheel(tmp_path):
+    for file_name in ("fastapi-0.110.0-py3-none-any.whl", "fastapi-0.115.7-py3-none-any.whl",
+                      "pyyaml-6.0.2.tar.gz", "README.txt"):
+        (tmp_path / file_name).write_text("")
+    pinned = resolve_requirements(["fastapi", "PyYAML", "pytest", "not-a-real-distribution-xyz"],
+                                  wheelhouse=str(tmp_path))
+    # Not in the wheelhouse: pinned to the host's version, or left unpinned
+    assert pinned == ["fastapi==0.115.7", "PyYAML==6.0.2", f"pytest=={pytest.__version__}",
+                      "not-a-real-distribution-xyz"]
+    assert environment_key(["b==1", "a==2"]) == environment_key(["a==2", "b==1"])
+    assert environment_key(["a==2"]) != environment_key(["a==3"])
+
+
+class FakeBuilds:
+    def __init__(self, fail=False):
+        self.builds = 0
+        self.fail = fail
+
+    def __call__(self, path, key, pinned):
+        self.builds += 1
+        os.makedirs(path)
+        # Widens the window in which concurrent callers could start a second build
+        time.sleep(0.05)
+        if self.fail:
+            raise EnvironmentBuildError("pip install failed")
+        with open(os.path.join(path, ENVIRONMENT_FILE), "w") as f:
+            json.dump({"key": key, "requirements": pinned, "lock": pinned, "modules": ["fastapi"]}, f)
+
+
+def test_concurrent_callers_share_one_build_and_later_ones_hit_the_cache(tmp_path, monkeypatch):
+    cache = EnvironmentCache(root=str(tmp_path))
+    builds = FakeBuilds()
+    monkeypatch.setattr(cache, "_build", builds)
+
+    with ThreadPoolExecutor(4) as pool:
+        environments = list(pool.map(lambda _: cache.ensure(["fastapi==0.115.7"]), range(4)))
+    assert builds.builds == 1
+    assert {environment.path for environment in environments} == {environments[0].path}
+    assert environments[0].modules == {"fastapi"}
+    assert cache.stats["builds"] == 1 and cache.stats["hits"] == 3
+    assert os.listdir(tmp_path) == [os.path.basename(environments[0].path)]
+
+
+def test_a_failed_build_leaves_nothing_behind(tmp_path, monkeypatch):
+    cache = EnvironmentCache(root=str(tmp_path))
+    monkeypatch.setattr(cache, "_build", FakeBuilds(fail=True))
+    with pytest.raises(EnvironmentBuildError):
+        cache.ensure(["fastapi==0.115.7"])
+    assert os.listdir(tmp_path) == []
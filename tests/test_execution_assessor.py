@@ -0,0 +1,32 @@
+from collections import Counter
+
+import pytest
+
+from qa_tester import execution_assessor
+from qa_tester.execution_assessor import assess_execution, get_assessment_stats, record_decision
+
+
+@pytest.mark.parametrize("exit_code, output, verdict", [
+    (124, "", False),
+    (0, "partial output\n Timeout", False),
+    (1, "", False),
+    (0, 'Traceback (most recent call last):\n  File "x.py", line 1\nKeyError: 1\n', False),
+    (0, "ValueError: bad input\n", False),
+    (0, "Server ready\n", True),
+    (0, "", True),
+    (0, "Handled the error case correctly\n", None),
+    (0, "1 warning emitted\n", None),
+])
+def test_assess_execution(exit_code, output, verdict):
+    assert assess_execution(exit_code, output)[0] is verdict
+
+
+def test_fallback_rate_counts_llm_decisions(monkeypatch):
+    monkeypatch.setattr(execution_assessor, "assessment_stats", Counter())
+    record_decision("rule", True, "clean exit")
+    record_decision("rule", False, "traceback in output")
+    record_decision("rule", True, "clean exit")
+    record_decision("llm", True, "ambiguous")
+    stats = get_assessment_stats()
+    assert stats["rule_pass"] == 2 and stats["rule_fail"] == 1 and stats["llm_pass"] == 1
+    assert stats["fallback_rate"] == 0.25
@@ -0,0 +1,118 @@
+import ast
+import textwrap
+
+import pytest
+
+from qa_tester.fix_context import PatchError, apply_patch, build_fix_context, extract_context, parse_error
+
+CODE = textwrap.dedent('''\
+    import json
+
+    LIMIT = 10
+
+
+    def load(text):
+        return json.loads(text)
+
+
+    class Store:
+        def __init__(self):
+            self.items = []
+
+        def add(self, item):
+            if len(self.items) >= LIMIT:
+                raise ValueError("full")
+            self.items.append(item)
+
+        def describe(self):
+            return """
+    Items:
+    """ + ", ".join(self.items)
+
+
+    if __name__ == "__main__":
+        store = Store()
+        store.add(load("1"))
+    ''')
+
+TRACEBACK = '''Traceback (most recent call last):
+  File "/work/tmp_code_abc123.py", line 27, in <module>
+    store.add(load("1"))
+  File "/work/tmp_code_abc123.py", line 17, in add
+    self.items.append(item)
+  File "/usr/lib/python3.11/json/__init__.py", line 346, in loads
+AttributeError: 'NoneType' object has no attribute 'append'
+'''
+
+
+def test_parse_error_keeps_only_frames_of_the_generated_code():
+    error = parse_error(TRACEBACK, "code/code_generated.py")
+    assert error["type"] == "AttributeError"
+    assert error["message"] == "'NoneType' object has no attribute 'append'"
+    assert error["lines"] == [27, 17]
+    assert parse_error("all good", "code/code_generated.py") is None
+
+
+def test_extract_context_targets_the_innermost_definition_and_its_dependencies():
+    context = extract_context(CODE, [27, 17])
+    assert context["targets"] == ["Store.add"]
+    assert "def add(self, item):" in context["definitions"]
+    assert "LIMIT = 10" in context["dependencies"]
+    assert context["imports"] == "import json"
+    assert extract_context(CODE, [27]) is None
+
+
+def test_build_fix_context_skips_small_files(monkeypatch):
+    monkeypatch.setenv("HIVEMIND_FIX_PATCH_MIN_LINES", "10")
+    context = build_fix_context(CODE, "code_generated.py", TRACEBACK)
+    assert context["targets"] == "Store.add"
+    assert context["error"].startswith("AttributeError: ")
+    monkeypatch.setenv("HIVEMIND_FIX_PATCH_MIN_LINES", "1000")
+    assert build_fix_context(CODE, "code_generated.py", TRACEBACK) is None
+
+
+def test_apply_patch_replaces_a_method_at_its_indentation():
+    patched = apply_patch(CODE, {"edits": [{"name": "Store.add", "code": (
+        "def add(self, item):\n"
+        "    if len(self.items) >= LIMIT:\n"
+        "        return False\n"
+        "    self.items.append(item)\n"
+        "    return True\n")}]})
+    assert "        return False\n" in patched
+    assert 'raise ValueError("full")' not in patched
+    # Untouched definitions, including the string literal lines, are unchanged
+    assert '    def describe(self):\n        return """\nItems:\n""" + ", ".join(self.items)' in patched
+    namespace = {}
+    exec(compile(patched.replace('if __name__ == "__main__":', "if False:"), "patched", "exec"), namespace)
+    assert namespace["Store"]().add("x") is True
+
+
+def test_apply_patch_keeps_multi_line_strings_of_a_reindented_method():
+    edit = ('    def describe(self):\n'
+            '        return """\n'
+            'Items:\n'
+            '""" + "; ".join(self.items)\n')
+    patched = apply_patch(CODE, {"edits": [{"name": "Store.describe", "code": edit}]})
+    assert '        return """\nItems:\n""" + "; ".join(self.items)' in patched
+
+
+def test_apply_patch_adds_new_helpers_before_the_main_guard_and_missing_imports():
+    patched = apply_patch(CODE, {
+        "edits": [{"name": "dump", "code": "def dump(value, path):\n    return os.path.basename(path), json.dumps(value)\n"}],
+        "imports": ["import json", "import os"],
+    })
+    lines = patched.splitlines()
+    assert lines.count("import json") == 1
+    assert lines.index("import os") == 1
+    assert lines.index("def dump(value, path):") < lines.index('if __name__ == "__main__":')
+    ast.parse(patched)
+
+
+@pytest.mark.parametrize("edit, message", [
+    ({"name": "load", "code": "def load(text)\n    return None\n"}, "does not parse"),
+    ({"name": "load", "code": "def other(text):\n    return None\n"}, "exactly that one definition"),
+    ({"name": "Missing.add", "code": "def add(self):\n    pass\n"}, "Class of 'Missing.add' not found"),
+])
+def test_apply_patch_rejects_malformed_edits(edit, message):
+    with pytest.raises(PatchError, match=message):
+        apply_patch(CODE, {"edits": [edit]})
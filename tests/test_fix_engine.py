@@ -0,0 +1,91 @@
+import os
+import asyncio
+
+import pytest
+
+pytest.importorskip("autogen_core")
+
+from qa_tester.fix_engine import FixEngine
+
+
+class Generator:
+    """
+    Writes candidate `index` of each round from `answers[round][index]`: (code, seconds to generate).
+    """
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.requests = []
+        self.cancelled = []
+
+    async def fix_code(self, code_file_path, new_folder_path, file_name, error_output=None, temperature=None,
+                       stream=False):
+        self.requests.append((os.path.basename(code_file_path), error_output))
+        round_number, index = (int(part) for part in file_name[len("candidate_r"):].split("_"))
+        code, delay = self.answers[round_number - 1][index]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(file_name)
+            raise
+        os.makedirs(new_folder_path, exist_ok=True)
+        path = os.path.join(new_folder_path, f"{file_name}.py")
+        with open(path, "w") as f:
+            f.write(code)
+        return code, path, "whole_file"
+
+
+class QATester:
+    available_modules = None
+
+    async def test_code(self, code_file_path, cancellation_token=None):
+        with open(code_file_path) as f:
+            code = f.read()
+        passed = "broken" not in code
+        return passed, "ok" if passed else f"failed: {code.strip()}"
+
+
+def make_engine(answers, **kwargs):
+    engine = FixEngine(QATester(), candidates=len(answers[0]), **kwargs)
+    engine.code_generator = Generator(answers)
+    return engine
+
+
+def test_first_passing_candidate_wins_and_the_others_are_cancelled(tmp_path):
+    buggy = tmp_path / "code.py"
+    buggy.write_text("print(broken)\n")
+    engine = make_engine([[("print('slow')\n", 5), ("print('fast')\n", 0.01), ("print(broken)\n", 0)]])
+
+    result = asyncio.run(engine.fix(str(buggy), new_folder_path=str(tmp_path / "code_refactor"),
+                                    error_output="NameError"))
+
+    assert result["fixed"] and result["rounds"] == 1 and result["candidates_tried"] == 3
+    with open(result["code_path"]) as f:
+        assert f.read() == "print('fast')\n"
+    assert engine.code_generator.cancelled == ["candidate_r1_0"]
+
+
+def test_next_round_starts_from_a_failed_candidate(tmp_path):
+    buggy = tmp_path / "code.py"
+    buggy.write_text("print(broken)\n")
+    engine = make_engine([[("print(broken_1)\n", 0)], [("print(broken_2)\n", 0)]], max_rounds=2)
+
+    result = asyncio.run(engine.fix(str(buggy), new_folder_path=str(tmp_path / "code_refactor"),
+                                    error_output="NameError"))
+
+    assert not result["fixed"] and result["rounds"] == 2
+    assert engine.code_generator.requests == [("code.py", "NameError"),
+                                              ("candidate_r1_0.py", "failed: print(broken_1)")]
+    assert result["output"] == "failed: print(broken_2)"
+
+
+def test_budget_stops_the_loop(tmp_path):
+    buggy = tmp_path / "code.py"
+    buggy.write_text("print(broken)\n")
+    engine = make_engine([[("print('too late')\n", 5)]], budget_seconds=0.2)
+
+    result = asyncio.run(asyncio.wait_for(
+        engine.fix(str(buggy), new_folder_path=str(tmp_path / "code_refactor")), timeout=3))
+
+    assert not result["fixed"] and result["rounds"] == 1
+    assert engine.code_generator.cancelled == ["candidate_r1_0"]
@@ -0,0 +1,123 @@
+import sys
+import asyncio
+
+import pytest
+
+from qa_tester.http_harness import HTTPLoadTester, discover_asgi_app, parse_statuses
+
+APP = '''
+from fastapi import FastAPI
+
+app = FastAPI()
+
+@app.get("/items/{item_id}")
+def read_item(item_id: int):
+    return {"id": item_id}
+
+@app.api_route("/ping", methods=["GET", "HEAD"])
+def ping():
+    return "pong"
+'''
+
+# Stands in for uvicorn: floods its output, which used to fill a pipe nobody read, then serves
+FAKE_UVICORN = '''
+import sys
+import socket
+
+port = int(sys.argv[sys.argv.index("--port") + 1])
+sys.stdout.write("x" * 1_000_000)
+sys.stdout.flush()
+server = socket.create_server(("127.0.0.1", port))
+while True:
+    connection, _ = server.accept()
+    connection.close()
+'''
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = f"HTTP {status_code}"
+
+
+class Client:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    async def request(self, method, url, **kwargs):
+        return Response(self.status_code)
+
+
+def fake_uvicorn(code_dir, main):
+    # A regular package in the code directory shadows an installed uvicorn
+    (code_dir / "uvicorn").mkdir()
+    (code_dir / "uvicorn" / "__init__.py").write_text("")
+    (code_dir / "uvicorn" / "__main__.py").write_text(main)
+
+
+def test_discover_asgi_app_finds_the_app_and_its_routes():
+    assert discover_asgi_app(APP) == ("app", [("GET", "/items/{item_id}"), ("GET", "/ping"), ("HEAD", "/ping")])
+    assert discover_asgi_app("print('hello')") == (None, [])
+
+
+def test_parse_statuses():
+    assert parse_statuses("200-299, 404") == frozenset(range(200, 300)) | {404}
+
+
+@pytest.mark.parametrize("status, errors", [(200, 0), (302, 0), (404, 1), (422, 1), (500, 1)])
+def test_only_accepted_statuses_pass_the_smoke_test(status, errors):
+    tester = HTTPLoadTester(requests_per_route=3, concurrency=2)
+    result = asyncio.run(tester._exercise_route(Client(status), "GET", "/items/{item_id}"))
+    assert result["errors"] == errors
+    assert len(result["latencies_ms"]) == (3 if errors == 0 else 0)
+
+
+def test_accepted_statuses_can_be_widened():
+    tester = HTTPLoadTester(requests_per_route=3, accepted_statuses=parse_statuses("200-399,422"))
+    result = asyncio.run(tester._exercise_route(Client(422), "POST", "/items"))
+    assert result["errors"] == 0
+
+
+def test_server_output_does_not_block_startup(tmp_path):
+    fake_uvicorn(tmp_path, FAKE_UVICORN)
+    (tmp_path / "main.py").write_text(APP)
+    tester = HTTPLoadTester(python_executable=sys.executable, startup_timeout=10)
+
+    async def run():
+        with open(tmp_path / "server.log", "w+b") as log:
+            process, base_url = await tester._start_server(str(tmp_path / "main.py"), "app", log)
+            await tester._stop_server(process)
+        return base_url
+
+    assert asyncio.run(run()).startswith("http://127.0.0.1:")
+
+
+def test_early_server_exit_reports_its_output(tmp_path):
+    fake_uvicorn(tmp_path, "raise SystemExit('cannot import main:app')")
+    (tmp_path / "main.py").write_text(APP)
+    tester = HTTPLoadTester(python_executable=sys.executable, startup_timeout=10)
+
+    async def run():
+        with open(tmp_path / "server.log", "w+b") as log:
+            await tester._start_server(str(tmp_path / "main.py"), "app", log)
+
+    with pytest.raises(RuntimeError, match="cannot import main:app"):
+        asyncio.run(run())
+
+
+def test_served_app_passes_only_when_every_route_answers_successfully(tmp_path):
+    for module in ("fastapi", "httpx", "uvicorn"):
+        pytest.importorskip(module)
+    code_file = tmp_path / "main.py"
+    tester = HTTPLoadTester(requests_per_route=5, concurrency=2)
+
+    code_file.write_text(APP)
+    report = asyncio.run(tester.run(str(code_file)))
+    assert report["passed"], report["reason"]
+    assert report["errors"] == 0
+
+    code_file.write_text(APP.replace('return "pong"', 'raise HTTPException(404)').replace(
+        "import FastAPI", "import FastAPI, HTTPException"))
+    report = asyncio.run(tester.run(str(code_file)))
+    assert not report["passed"]
+    assert "GET /ping -> HTTP 404" in report["reason"]
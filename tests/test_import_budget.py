@@ -0,0 +1,42 @@
+import statistics
+
+import pytest
+
+from benchmarks.import_budget import BUDGETS_MS, DEFERRED_PACKAGES, measure_import
+
+# Shared CI machines are slower and noisier than the machine the budgets were set on
+HEADROOM = 3
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def measurements(tmp_path_factory):
+    work_dir = str(tmp_path_factory.mktemp("importtime"))
+    results = {}
+    for module in BUDGETS_MS:
+        try:
+            # The first interpreter also compiles the bytecode, so it is not measured
+            measure_import(module, work_dir)
+        except RuntimeError as e:
+            if "ModuleNotFoundError" in str(e):
+                results[module] = e
+                continue
+            raise
+        results[module] = [measure_import(module, work_dir) for _ in range(RUNS)]
+    return results
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_entry_point_imports_within_budget(measurements, module):
+    if isinstance(measurements[module], Exception):
+        pytest.skip(f"dependencies of {module} are not installed")
+    median = statistics.median(measurement["total_ms"] for measurement in measurements[module])
+    assert median <= BUDGETS_MS[module] * HEADROOM, f"{module} imports in {median:.1f} ms"
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_entry_point_defers_heavy_packages(measurements, module):
+    if isinstance(measurements[module], Exception):
+        pytest.skip(f"dependencies of {module} are not installed")
+    loaded = {name.split(".")[0] for name in measurements[module][-1]["imports"]}
+    assert not loaded & set(DEFERRED_PACKAGES)
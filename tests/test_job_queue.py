@@ -0,0 +1,76 @@
+import pytest
+
+from service.job_queue import JobQueue, QueueFullError
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    yield queue
+    queue.close()
+
+
+def test_jobs_are_claimed_in_submission_order_and_finished(queue):
+    first = queue.submit("first", {"run_deployment": False})
+    second = queue.submit("second")
+
+    claimed = queue.claim("worker-0")
+    assert claimed["id"] == first["id"]
+    assert claimed["status"] == "running" and claimed["attempts"] == 1
+    assert claimed["options"] == {"run_deployment": False}
+    assert queue.active_ids() == {first["id"], second["id"]}
+
+    queue.finish(first["id"], "succeeded", result={"deployed": False})
+    assert queue.get(first["id"])["result"] == {"deployed": False}
+    assert queue.active_ids() == {second["id"]}
+    assert queue.claim("worker-0")["id"] == second["id"]
+    assert queue.claim("worker-0") is None
+
+
+def test_full_queue_refuses_submissions(queue):
+    queue.submit("a", max_depth=2)
+    queue.submit("b", max_depth=2)
+    with pytest.raises(QueueFullError):
+        queue.submit("c", max_depth=2)
+    assert queue.stats()["depth"] == 2
+
+
+def test_cancelling_a_queued_job_finishes_it_and_a_running_one_is_flagged(queue):
+    queued = queue.submit("queued")
+    running = queue.submit("running")
+    queue.claim("worker-0")
+    queue.claim("worker-1")
+    queued_again = queue.submit("still queued")
+
+    assert queue.request_cancel(queued_again["id"])["status"] == "cancelled"
+    flagged = queue.request_cancel(running["id"])
+    assert flagged["status"] == "running" and flagged["cancel_requested"]
+    with pytest.raises(ValueError):
+        queue.finish(queued["id"], "done")
+
+
+def test_recover_requeues_running_jobs_unless_cancelled(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(path)
+    interrupted = queue.submit("interrupted")
+    cancelled = queue.submit("cancelled")
+    queue.claim("worker-0")
+    queue.claim("worker-1")
+    queue.request_cancel(cancelled["id"])
+    queue.close()
+
+    queue = JobQueue(path)
+    assert queue.recover() == 1
+    assert queue.get(interrupted["id"])["status"] == "queued"
+    assert queue.get(cancelled["id"])["status"] == "cancelled"
+    assert queue.claim("worker-0")["attempts"] == 2
+    queue.close()
+
+
+def test_logs_are_read_after_the_last_line_seen(queue):
+    job = queue.submit("job")
+    queue.append_log(job["id"], ["one", "two"])
+    lines = queue.logs(job["id"])
+    assert [line for _, _, line in lines] == ["one", "two"]
+    queue.append_log(job["id"], ["three"])
+    assert [line for _, _, line in queue.logs(job["id"], after=lines[-1][0])] == ["three"]
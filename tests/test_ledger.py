@@ -0,0 +1,65 @@
+from deployment_agent.ledger import DeploymentLedger
+
+
+def test_only_a_successful_deploy_of_the_same_artifact_counts_as_live(tmp_path):
+    ledger = DeploymentLedger(str(tmp_path / "deployments.sqlite"))
+    assert ledger.current("rg", "app") is None
+    assert not ledger.is_deployed("rg", "app", "hash-1")
+
+    ledger.record("rg", "app", "hash-1", "code.zip", "az webapp deploy", 0)
+    assert ledger.is_deployed("rg", "app", "hash-1")
+    assert not ledger.is_deployed("rg", "app", "hash-2")
+    assert not ledger.is_deployed("rg", "other-app", "hash-1")
+
+    ledger.record("rg", "app", "hash-2", "code.zip", "az webapp deploy", 1)
+    assert ledger.current("rg", "app")["artifact_hash"] == "hash-2"
+    assert not ledger.is_deployed("rg", "app", "hash-1")
+    assert not ledger.is_deployed("rg", "app", "hash-2")
+    ledger.close()
+
+
+def test_history_keeps_every_attempt_and_survives_reopening(tmp_path):
+    path = str(tmp_path / "deployments.sqlite")
+    ledger = DeploymentLedger(path)
+    ledger.record("rg", "app", "hash-1", "a.zip", "deploy", 0)
+    ledger.record("rg", "app", "hash-2", "b.zip", "deploy", 1)
+    ledger.record("rg", "other-app", "hash-3", "c.zip", "deploy", 0)
+    ledger.close()
+
+    ledger = DeploymentLedger(path)
+    assert [entry["artifact_hash"] for entry in ledger.history()] == ["hash-3", "hash-2", "hash-1"]
+    assert [entry["artifact_hash"] for entry in ledger.history(app_name="app", limit=1)] == ["hash-2"]
+    assert ledger.is_deployed("rg", "other-app", "hash-3")
+    ledger.close()
+
+
+def test_deploy_many_skips_artifacts_that_are_already_live(tmp_path, monkeypatch):
+    import asyncio
+    import json
+    import os
+
+    from deployment_agent import az_cli, ledger as ledger_module
+    from deployment_agent.deployment_agent import deploy_many
+    from model_client.replay import FAKE_AZ_DIR
+
+    log = tmp_path / "az.jsonl"
+    monkeypatch.setenv("PATH", FAKE_AZ_DIR + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("HIVEMIND_FAKE_AZ_LATENCY", "0")
+    monkeypatch.setenv("HIVEMIND_FAKE_AZ_LOG", str(log))
+    monkeypatch.setattr(az_cli, "_probe", None)
+    monkeypatch.setattr(ledger_module, "_ledger", DeploymentLedger(str(tmp_path / "deployments.sqlite")))
+
+    zip_path = tmp_path / "code.zip"
+    zip_path.write_bytes(b"package")
+    targets = [{"zip_path": str(zip_path), "resource_group": "rg", "app_name": app} for app in ("a", "b")]
+    # The working directory does not exist yet, the agent creates it
+    work_dir = str(tmp_path / "deploy" / "execution")
+
+    first = asyncio.run(deploy_many(targets, work_dir=work_dir))
+    assert [(result["status"], result["skipped"]) for result in first] == [("ok", False)] * 2
+    second = asyncio.run(deploy_many(targets, work_dir=work_dir))
+    assert [(result["status"], result["skipped"]) for result in second] == [("ok", True)] * 2
+
+    deploys = [json.loads(line)["args"][:2] for line in log.read_text().splitlines()]
+    assert deploys.count(["webapp", "deploy"]) == 2
+    ledger_module._ledger.close()
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("diskcache")
+pytest.importorskip("autogen_core")
+
+from autogen_core.models import CreateResult, RequestUsage, UserMessage
+
+from llm_cache.llm_cache import CachedChatCompletionClient, LLMResponseCache
+
+PROMPTS = {"DEVELOPER_AGENT": {"prompt": "{user_query}", "cache": True},
+           "CODE_ASSESSMENT_AGENT": {"prompt": "{code_string}", "cache": False}}
+
+
+class Client:
+    def __init__(self, finish_reason="stop"):
+        self.calls = 0
+        self.finish_reason = finish_reason
+
+    async def create(self, messages, **kwargs):
+        self.calls += 1
+        return CreateResult(finish_reason=self.finish_reason, content=f"answer {self.calls}",
+                            usage=RequestUsage(prompt_tokens=10, completion_tokens=5), cached=False)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(directory=str(tmp_path / "cache"))
+    yield cache
+    cache._store.close()
+
+
+def cached_client(client, cache, deployment="gpt-4o"):
+    return CachedChatCompletionClient(client, model="gpt-4o", azure_deployment=deployment,
+                                      api_version="2024-08-01-preview", prompts=PROMPTS, cache=cache)
+
+
+def test_repeated_prompts_are_served_from_the_cache(cache):
+    client = Client()
+    messages = [UserMessage(content="fibonacci", source="user")]
+
+    async def run():
+        wrapped = cached_client(client, cache)
+        first = await wrapped.create(messages, prompt_name="DEVELOPER_AGENT")
+        second = await wrapped.create(messages, prompt_name="DEVELOPER_AGENT")
+        other = await wrapped.create([UserMessage(content="primes", source="user")], prompt_name="DEVELOPER_AGENT")
+        elsewhere = await cached_client(client, cache, deployment="gpt-4o-mini").create(
+            messages, prompt_name="DEVELOPER_AGENT")
+        return first, second, other, elsewhere
+
+    first, second, other, elsewhere = asyncio.run(run())
+    assert (first.cached, second.cached) == (False, True)
+    assert second.content == first.content == "answer 1"
+    assert other.content == "answer 2" and elsewhere.content == "answer 3"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert stats["per_prompt"]["DEVELOPER_AGENT"] == {"hits": 1, "misses": 3}
+
+
+def test_opted_out_prompts_tool_calls_and_truncated_results_are_not_cached(cache, monkeypatch):
+    messages = [UserMessage(content="fibonacci", source="user")]
+
+    async def calls(client, repeat=2, **kwargs):
+        wrapped = cached_client(client, cache)
+        for _ in range(repeat):
+            await wrapped.create(messages, **kwargs)
+        return client.calls
+
+    assert asyncio.run(calls(Client(), prompt_name="CODE_ASSESSMENT_AGENT")) == 2
+    assert asyncio.run(calls(Client())) == 2
+    assert asyncio.run(calls(Client(), prompt_name="DEVELOPER_AGENT", tools=["search"])) == 2
+    assert asyncio.run(calls(Client(finish_reason="length"), prompt_name="DEVELOPER_AGENT")) == 2
+    monkeypatch.setenv("HIVEMIND_LLM_CACHE", "0")
+    assert asyncio.run(calls(Client(), prompt_name="DEVELOPER_AGENT")) == 2
+    assert cache.stats()["entries"] == 0
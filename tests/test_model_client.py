@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from model_client import model_client
+from model_client.model_client import load_model_config, reset_model_clients, resolve_deployment
+
+MODELS = """
+deployments:
+    gpt-4o:
+        azure_deployment: gpt-4o
+        model: gpt-4o
+        api_version: 2024-08-01-preview
+    gpt-4o-mini:
+        azure_deployment: gpt-4o-mini
+        model: gpt-4o-mini
+        api_version: 2024-08-01-preview
+agents:
+    developer: gpt-4o
+    qa: gpt-4o-mini
+"""
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    path = tmp_path / "models.yaml"
+    path.write_text(MODELS)
+    monkeypatch.setenv("HIVEMIND_MODEL_CONFIG", str(path))
+    reset_model_clients()
+    yield load_model_config()
+    model_client.set_model_client_factory(None)
+
+
+def test_roles_resolve_to_their_deployment(config, monkeypatch):
+    assert resolve_deployment("developer")[0] == "gpt-4o"
+    assert resolve_deployment("qa")[1]["model"] == "gpt-4o-mini"
+    # Roles without an entry use the first deployment
+    assert resolve_deployment("deployment")[0] == "gpt-4o"
+    monkeypatch.setenv("HIVEMIND_DEPLOYMENT_DEVELOPER", "gpt-4o-mini")
+    assert resolve_deployment("developer")[0] == "gpt-4o-mini"
+    monkeypatch.setenv("HIVEMIND_DEPLOYMENT_DEVELOPER", "gpt-5")
+    with pytest.raises(KeyError):
+        resolve_deployment("developer")
+
+
+def test_config_is_read_once(config):
+    assert load_model_config() is config
+    assert config["http"] == {} and config["scheduler"] == {}
+
+
+def test_roles_on_the_same_deployment_share_one_client_per_event_loop(config, monkeypatch):
+    # The response cache wrapped around every client needs autogen_core and pydantic
+    pytest.importorskip("autogen_core.models")
+    pytest.importorskip("pydantic")
+    monkeypatch.setenv("HIVEMIND_DEPLOYMENT_QA", "gpt-4o")
+    built = []
+    model_client.set_model_client_factory(lambda role, settings: built.append(role) or object())
+
+    async def clients():
+        return model_client.get_model_client("developer"), model_client.get_model_client("qa")
+
+    developer, qa = asyncio.run(clients())
+    assert developer is qa and built == ["developer"]
+    assert asyncio.run(clients())[0] is not developer
@@ -0,0 +1,53 @@
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip("autogen_agentchat")
+
+import orchestrator
+from orchestrator import load_queries, orchestrate_batch
+
+
+def write_queries(path, lines):
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines) + "\n")
+    return str(path)
+
+
+def test_queries_are_read_from_strings_and_objects(tmp_path):
+    path = write_queries(tmp_path / "queries.jsonl", ["first", {"id": "b", "query": "second"}, {"query": "third"}])
+    assert load_queries(path) == [{"id": "1", "query": "first"}, {"id": "b", "query": "second"},
+                                  {"id": "3", "query": "third"}]
+
+    bad = write_queries(tmp_path / "bad.jsonl", [{"id": "x"}])
+    with pytest.raises(ValueError, match="Line 1"):
+        load_queries(bad)
+
+
+def test_batch_bounds_concurrency_and_reports_failures_in_order(tmp_path, monkeypatch):
+    in_flight, peak, calls = [0], [0], []
+
+    async def fake_orchestrate(query, run_deployment=False, **options):
+        calls.append((query, run_deployment, options))
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        try:
+            await asyncio.sleep(0.02)
+            if query == "broken":
+                raise RuntimeError("generation failed")
+            return {"zip_path": f"{query}.zip"}
+        finally:
+            in_flight[0] -= 1
+
+    monkeypatch.setattr(orchestrator, "orchestrate_async", fake_orchestrate)
+    queries = [f"query {index}" for index in range(6)]
+    queries[2] = "broken"
+    path = write_queries(tmp_path / "queries.jsonl", queries)
+
+    results = asyncio.run(orchestrate_batch(path, max_concurrency=2, generation_mode="direct"))
+    assert peak[0] == 2
+    assert [result["query"] for result in results] == queries
+    assert [result["status"] for result in results] == ["ok", "ok", "error", "ok", "ok", "ok"]
+    assert results[2]["error"] == "generation failed"
+    assert results[0]["zip_path"] == "query 0.zip"
+    assert all(call[1:] == (False, {"generation_mode": "direct"}) for call in calls)
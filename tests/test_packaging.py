@@ -0,0 +1,56 @@
+import os
+import zipfile
+
+import pytest
+
+from helper import create_project_zip
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "code"
+    (project / "__pycache__").mkdir(parents=True)
+    (project / "__pycache__" / "app.cpython-311.pyc").write_bytes(b"cache")
+    (project / ".venv").mkdir()
+    (project / ".venv" / "pyvenv.cfg").write_text("home = /usr\n")
+    (project / "app.py").write_text("print('hello')\n")
+    (project / "requirements.txt").write_text("fastapi\n")
+    (project / ".env").write_text("SECRET=1\n")
+    return project
+
+
+def test_archive_skips_caches_secrets_and_virtual_environments(project, tmp_path):
+    zip_path = str(tmp_path / "code.zip")
+    create_project_zip(str(project), zip_path)
+    with zipfile.ZipFile(zip_path) as archive:
+        assert sorted(archive.namelist()) == ["app.py", "requirements.txt"]
+
+
+def test_unchanged_content_reuses_the_archive(project, tmp_path):
+    zip_path = str(tmp_path / "code.zip")
+    first = create_project_zip(str(project), zip_path)
+    written_at = os.path.getmtime(zip_path)
+    os.utime(zip_path, (written_at - 100, written_at - 100))
+
+    assert create_project_zip(str(project), zip_path) == first
+    assert os.path.getmtime(zip_path) == written_at - 100
+
+    (project / "app.py").write_text("print('changed')\n")
+    assert create_project_zip(str(project), zip_path) != first
+    assert os.path.getmtime(zip_path) > written_at - 100
+
+
+def test_identical_content_gives_identical_archives(project, tmp_path):
+    create_project_zip(str(project), str(tmp_path / "a.zip"))
+    os.utime(project / "app.py", (0, 0))
+    create_project_zip(str(project), str(tmp_path / "b.zip"))
+    assert (tmp_path / "a.zip").read_bytes() == (tmp_path / "b.zip").read_bytes()
+
+
+def test_nothing_to_package_is_an_error(tmp_path):
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "empty" / ".env").write_text("SECRET=1\n")
+    with pytest.raises(ValueError):
+        create_project_zip(str(tmp_path / "empty"))
+    with pytest.raises(FileNotFoundError):
+        create_project_zip(str(tmp_path / "missing"))
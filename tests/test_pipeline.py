@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from pipeline.pipeline import StageGraph
+
+
+def test_independent_stages_overlap_and_dependents_get_their_results():
+    async def run():
+        graph, started = StageGraph(), {}
+        loop = asyncio.get_running_loop()
+
+        def stage(name, value, delay=0.1):
+            async def func(inputs):
+                started[name] = loop.time()
+                await asyncio.sleep(delay)
+                return value + sum(inputs.values())
+            return func
+
+        graph.add("code", stage("code", 1))
+        graph.add("probe", stage("probe", 10))
+        graph.add("deploy", stage("deploy", 100), after=["code", "probe"])
+        results = await graph.run()
+        return results, started
+
+    results, started = asyncio.run(run())
+    assert results == {"code": 1, "probe": 10, "deploy": 111}
+    assert abs(started["code"] - started["probe"]) < 0.05
+    assert started["deploy"] - started["code"] >= 0.1
+
+
+def test_speculative_failures_only_reach_their_dependents():
+    async def fail(inputs):
+        raise RuntimeError("no az")
+
+    async def ok(inputs):
+        return "ok"
+
+    async def run():
+        graph = StageGraph()
+        graph.add("probe", fail, speculative=True)
+        graph.add("code", ok)
+        assert await graph.run() == {"code": "ok"}
+        assert str(graph.errors["probe"]) == "no az"
+
+        graph = StageGraph()
+        graph.add("probe", fail, speculative=True)
+        graph.add("deploy", ok, after=["probe"])
+        with pytest.raises(RuntimeError, match="no az"):
+            await graph.run()
+
+    asyncio.run(run())
+
+
+def test_halt_cancels_unfinished_stages_before_run_returns():
+    async def run():
+        graph, cancelled = StageGraph(), []
+
+        async def slow(inputs):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append("warmup")
+                raise
+
+        async def test(inputs):
+            graph.halt()
+            return False
+
+        graph.add("warmup", slow, speculative=True)
+        graph.add("test", test)
+        results = await graph.run()
+        return graph, results, cancelled
+
+    graph, results, cancelled = asyncio.run(run())
+    assert graph.halted and graph.cancelled == ["warmup"]
+    assert results == {"test": False}
+    assert cancelled == ["warmup"]
+
+
+def test_stages_must_be_added_after_their_dependencies():
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add("deploy", None, after=["code"])
@@ -0,0 +1,84 @@
+import textwrap
+
+from qa_tester.preflight import preflight_check
+
+
+def check(tmp_path, code, available_modules=()):
+    path = tmp_path / "code.py"
+    path.write_text(textwrap.dedent(code))
+    return preflight_check(str(path), available_modules)
+
+
+def test_clean_code_passes(tmp_path):
+    assert check(tmp_path, """
+        import json
+
+        def main():
+            print(json.dumps({"ok": True}))
+
+        if __name__ == "__main__":
+            main()
+    """) == []
+
+
+def test_syntax_errors_and_markdown_artefacts_are_reported(tmp_path):
+    errors = check(tmp_path, "```python\nprint('hi')\n```\n")
+    assert any("markdown code fence" in error for error in errors)
+    assert any("SyntaxError" in error for error in errors)
+
+
+def test_missing_modules_are_reported_unless_available(tmp_path):
+    code = "import hivemind_surely_missing_module\n"
+    assert check(tmp_path, code) == ["Line 1: module 'hivemind_surely_missing_module' is not installed"]
+    assert check(tmp_path, code, available_modules={"hivemind_surely_missing_module"}) == []
+
+
+def test_local_modules_count_as_installed(tmp_path):
+    (tmp_path / "helpers.py").write_text("VALUE = 1\n")
+    assert check(tmp_path, "from helpers import VALUE\n") == []
+
+
+def test_server_start_is_reported_even_under_main_guard(tmp_path):
+    errors = check(tmp_path, """
+        import uvicorn
+        from fastapi import FastAPI
+
+        app = FastAPI()
+
+        if __name__ == "__main__":
+            uvicorn.run(app, host="0.0.0.0", port=8000)
+    """, available_modules={"uvicorn", "fastapi"})
+    assert len(errors) == 1 and "uvicorn.run(...) starts a server" in errors[0]
+
+
+def test_server_start_inside_a_function_is_allowed(tmp_path):
+    assert check(tmp_path, """
+        import uvicorn
+
+        def serve(app):
+            uvicorn.run(app)
+    """, available_modules={"uvicorn"}) == []
+
+
+def test_imports_guarded_by_an_import_error_handler_are_optional(tmp_path):
+    assert check(tmp_path, """
+        try:
+            import hivemind_surely_missing_module
+        except ImportError:
+            hivemind_surely_missing_module = None
+
+        try:
+            from hivemind_other_missing_module import fast_path
+        except (ModuleNotFoundError, AttributeError):
+            fast_path = None
+    """) == []
+
+
+def test_imports_guarded_by_other_handlers_are_checked(tmp_path):
+    errors = check(tmp_path, """
+        try:
+            import hivemind_surely_missing_module
+        except ValueError:
+            pass
+    """)
+    assert errors == ["Line 3: module 'hivemind_surely_missing_module' is not installed"]
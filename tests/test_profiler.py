@@ -0,0 +1,86 @@
+import os
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip("autogen_core")
+
+from qa_tester import profiler
+
+ORIGINAL = "import time\n\ntime.sleep(0.3)\nprint(sum(range(10)))\n"
+FASTER = "print(sum(range(10)))\n"
+
+
+class QATester:
+    available_modules = None
+    environment = None
+
+    def __init__(self, passed=True):
+        self.passed = passed
+        self.tested = []
+
+    async def test_code(self, code_file_path):
+        self.tested.append(code_file_path)
+        return self.passed, "ok" if self.passed else "GET / -> HTTP 500"
+
+
+@pytest.fixture
+def rewrite(monkeypatch):
+    """
+    Makes the Developer Agent answer optimization requests with `rewrite.code`.
+    """
+    class Generator:
+        code = FASTER
+
+        async def optimize_code(self, code_file_path, profile_report, new_folder_path, file_name="code_optimized"):
+            os.makedirs(new_folder_path, exist_ok=True)
+            path = os.path.join(new_folder_path, f"{file_name}.py")
+            with open(path, "w") as f:
+                f.write(Generator.code)
+            return Generator.code, path
+
+    monkeypatch.setenv("HIVEMIND_PROFILE_RUNS", "1")
+    monkeypatch.setattr(profiler, "CodeGenratingAgent", Generator)
+    return Generator
+
+
+def optimize(tmp_path, qa_tester):
+    code_file = tmp_path / "code.py"
+    code_file.write_text(ORIGINAL)
+    return asyncio.run(profiler.optimize_code(str(code_file), str(tmp_path), str(tmp_path / "optimized"),
+                                              report_path=str(tmp_path / "report.json"), qa_tester=qa_tester))
+
+
+def test_faster_equivalent_rewrite_that_passes_qa_is_kept(tmp_path, rewrite):
+    qa_tester = QATester()
+    result = optimize(tmp_path, qa_tester)
+    assert result["kept"], result["reason"]
+    assert result["code_path"] == qa_tester.tested[0] == str(tmp_path / "optimized" / "code_optimized.py")
+    assert result["after"]["wall_s"] < result["before"]["wall_s"]
+    with open(tmp_path / "report.json") as f:
+        assert json.load(f)["kept"]
+
+
+def test_rewrite_failing_qa_keeps_the_original(tmp_path, rewrite):
+    result = optimize(tmp_path, QATester(passed=False))
+    assert not result["kept"] and result["code_path"] == str(tmp_path / "code.py")
+    assert result["reason"] == "rewrite failed QA: GET / -> HTTP 500"
+
+
+def test_rewrite_with_different_output_is_not_tested(tmp_path, rewrite):
+    rewrite.code = "print(46)\n"
+    qa_tester = QATester()
+    result = optimize(tmp_path, qa_tester)
+    assert not result["kept"] and "not functionally equivalent" in result["reason"]
+    assert qa_tester.tested == []
+
+
+def test_errors_keep_the_original(tmp_path, rewrite, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(profiler, "profile_repeatedly", fail)
+    result = optimize(tmp_path, QATester())
+    assert not result["kept"] and result["code_path"] == str(tmp_path / "code.py")
+    assert result["reason"] == "optimization failed: disk full"
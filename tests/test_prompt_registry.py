@@ -0,0 +1,53 @@
+import pytest
+import yaml
+
+from prompt_registry.prompt_registry import (PromptRegistryError, get_prompt, get_prompts, reset_prompts,
+                                             template_fields)
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    reset_prompts()
+    yield
+    reset_prompts()
+
+
+def write_prompts(tmp_path, **changes):
+    prompts = get_prompts()
+    prompts = {name: dict(entry) for name, entry in prompts.items()}
+    for name, entry in changes.items():
+        if entry is None:
+            del prompts[name]
+        else:
+            prompts[name].update(entry)
+    path = tmp_path / "prompts.yaml"
+    path.write_text(yaml.safe_dump(prompts))
+    return str(path)
+
+
+def test_shipped_prompts_are_valid_and_loaded_once():
+    assert get_prompts() is get_prompts()
+    assert "{user_query}" in get_prompt("DEVELOPER_AGENT")
+
+
+def test_prompts_file_can_be_overridden(tmp_path, monkeypatch):
+    path = write_prompts(tmp_path, DEVELOPER_AGENT={"prompt": "Write: {user_query}"})
+    monkeypatch.setenv("HIVEMIND_PROMPTS_FILE", path)
+    assert get_prompt("DEVELOPER_AGENT") == "Write: {user_query}"
+
+
+@pytest.mark.parametrize("changes, problem", [
+    ({"DEVELOPER_AGENT": None}, "missing prompt DEVELOPER_AGENT"),
+    ({"DEVELOPER_AGENT": {"prompt": "Write: {query}"}}, "template fields differ"),
+    ({"DEVELOPER_AGENT": {"priority": "urgent"}}, "unknown priority 'urgent'"),
+    ({"DEVELOPER_AGENT": {"cache": "yes"}}, "cache must be true or false"),
+    ({"CODE_ASSESSMENT_AGENT": {"prompt": "Assess {0}"}}, "named fields"),
+])
+def test_malformed_prompts_fail_at_load(tmp_path, changes, problem):
+    path = write_prompts(tmp_path, **changes)
+    with pytest.raises(PromptRegistryError, match=problem):
+        get_prompts(path)
+
+
+def test_template_fields():
+    assert template_fields("{code} uses {{braces}} and {error.args[0]}") == {"code", "error"}
@@ -0,0 +1,71 @@
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip("autogen_core")
+
+from autogen_core.models import UserMessage
+
+from model_client.replay import ReplayChatCompletionClient, load_recording
+
+PROMPTS = {
+    "GREETING": {"prompt": "Say hello to {name} politely."},
+    "FAREWELL": {"prompt": "Say goodbye to {name}."},
+    "UNRECORDED": {"prompt": "Never answered {name}."},
+}
+
+
+def message(text):
+    return [UserMessage(content=text, source="user")]
+
+
+def test_requests_are_matched_to_their_prompt_and_answered_in_a_cycle():
+    client = ReplayChatCompletionClient({"GREETING": ["hi", "hey"], "FAREWELL": ["bye"]}, PROMPTS, latency_s=0)
+
+    async def run():
+        return [(await client.create(message(text))).content
+                for text in ("Say   hello to\nAda politely.", "Say goodbye to Ada.", "Say hello to Bob politely.",
+                             "Say hello to Eve politely.")]
+
+    assert asyncio.run(run()) == ["hi", "bye", "hey", "hi"]
+    assert client.calls == {"GREETING": 3, "FAREWELL": 1}
+
+
+def test_unknown_or_unrecorded_prompts_are_refused():
+    client = ReplayChatCompletionClient({"GREETING": ["hi"]}, PROMPTS, latency_s=0)
+    with pytest.raises(KeyError, match="any prompt template"):
+        client.identify_prompt(message("Something else entirely"))
+    with pytest.raises(KeyError, match="UNRECORDED"):
+        client.identify_prompt(message("Never answered Ada."))
+
+
+def test_streaming_yields_chunks_then_the_full_result():
+    client = ReplayChatCompletionClient({"GREETING": ["x" * 70]}, PROMPTS, latency_s=0)
+
+    async def run():
+        return [item async for item in client.create_stream(message("Say hello to Ada politely."), chunk_chars=32)]
+
+    *chunks, result = asyncio.run(run())
+    assert [len(chunk) for chunk in chunks] == [32, 32, 6]
+    assert result.content == "x" * 70 and result.usage.completion_tokens == 17
+
+
+def test_scenarios_only_override_the_prompts_they_list(tmp_path):
+    path = tmp_path / "responses.json"
+    path.write_text(json.dumps({"default": {"GREETING": ["hi"], "FAREWELL": ["bye"]},
+                                "rude": {"GREETING": ["go away"]}}))
+    assert load_recording(str(path)) == {"GREETING": ["hi"], "FAREWELL": ["bye"]}
+    assert load_recording(str(path), "rude") == {"GREETING": ["go away"], "FAREWELL": ["bye"]}
+    assert load_recording(str(path), "missing") == {"GREETING": ["hi"], "FAREWELL": ["bye"]}
+
+
+def test_shipped_recordings_answer_prompts_of_the_registry():
+    from prompt_registry.prompt_registry import get_prompts
+    from model_client.replay import RECORDINGS_PATH
+
+    with open(RECORDINGS_PATH) as f:
+        scenarios = json.load(f)
+    prompts = get_prompts()
+    for scenario in scenarios:
+        assert set(load_recording(RECORDINGS_PATH, scenario)) <= set(prompts)
@@ -0,0 +1,123 @@
+import asyncio
+
+from model_client.scheduler import LLMScheduler, ScheduledChatCompletionClient
+
+
+class Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class HangingClient:
+    """
+    Answers after `delay` seconds; the default never answers in time.
+    """
+
+    def __init__(self, delay=3600):
+        self.delay = delay
+
+    async def create(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        return "done"
+
+    async def create_stream(self, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        yield "done"
+
+
+def test_cancelled_calls_release_their_slots():
+    async def run():
+        scheduler = LLMScheduler(initial_concurrency=2)
+        hanging = ScheduledChatCompletionClient(HangingClient(), scheduler, prompts={})
+        calls = [asyncio.create_task(hanging.create([Message("hi")])) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert scheduler.metrics()["in_flight"] == 2
+        for call in calls:
+            call.cancel()
+        await asyncio.gather(*calls, return_exceptions=True)
+        assert scheduler.metrics()["in_flight"] == 0
+
+        fast = ScheduledChatCompletionClient(HangingClient(delay=0), scheduler, prompts={})
+        assert await asyncio.wait_for(fast.create([Message("hi")]), timeout=2) == "done"
+        assert scheduler.metrics()["counters"]["cancelled"] == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_streams_release_their_slots():
+    async def run():
+        scheduler = LLMScheduler(initial_concurrency=1)
+        hanging = ScheduledChatCompletionClient(HangingClient(), scheduler, prompts={})
+
+        async def consume():
+            async for _ in hanging.create_stream([Message("hi")]):
+                pass
+
+        call = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+        assert scheduler.metrics()["in_flight"] == 0
+
+        fast = ScheduledChatCompletionClient(HangingClient(delay=0), scheduler, prompts={})
+        assert await asyncio.wait_for(fast.create([Message("hi")]), timeout=2) == "done"
+
+    asyncio.run(run())
+
+
+def test_rate_limited_call_halves_concurrency():
+    class RateLimitError(Exception):
+        status_code = 429
+        response = None
+
+    class ThrottledOnce:
+        calls = 0
+
+        async def create(self, messages, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise RateLimitError()
+            return "done"
+
+    async def run():
+        scheduler = LLMScheduler(initial_concurrency=4)
+        client = ScheduledChatCompletionClient(ThrottledOnce(), scheduler, prompts={})
+        result = await asyncio.wait_for(client.create([Message("hi")]), timeout=5)
+        assert result == "done"
+        assert scheduler.concurrency == 2
+        assert scheduler.metrics()["counters"]["rate_limited"] == 1
+
+    asyncio.run(run())
+
+
+def test_queued_calls_start_by_priority_then_in_arrival_order():
+    async def run():
+        scheduler = LLMScheduler(initial_concurrency=1)
+        await scheduler.acquire("generation", 10)
+        started = []
+
+        async def call(priority, name):
+            await scheduler.acquire(priority, 10)
+            started.append(name)
+            await scheduler.release(10)
+
+        waiting = [asyncio.create_task(call(priority, name)) for priority, name in
+                   (("generation", "gen-1"), ("fix", "fix-1"), ("assessment", "assess"), ("fix", "fix-2"))]
+        await asyncio.sleep(0.05)
+        assert started == [] and scheduler.metrics()["queue_depth"] == 4
+        await scheduler.release(10)
+        await asyncio.gather(*waiting)
+        return started
+
+    assert asyncio.run(run()) == ["assess", "fix-1", "fix-2", "gen-1"]
+
+
+def test_healthy_calls_raise_concurrency_up_to_its_bound():
+    async def run():
+        scheduler = LLMScheduler(initial_concurrency=2, max_concurrency=3)
+        for _ in range(20):
+            await scheduler.acquire("generation", 10)
+            await scheduler.release(10, used_tokens=10)
+        return scheduler.concurrency
+
+    assert asyncio.run(run()) == 3
@@ -0,0 +1,108 @@
+import os
+import asyncio
+
+import pytest
+
+from service.job_queue import JobQueue
+from service.service import PipelineService
+
+
+class FakeRunner:
+    def __init__(self):
+        self.calls = []
+        self.cancelled = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, query, run_id, **options):
+        self.calls.append((query, run_id, options))
+        print(f"running {query}")
+        if query == "fail":
+            raise RuntimeError("stage failed")
+        if query == "block":
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(run_id)
+                raise
+        return {"query": query}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("HIVEMIND_WORKSPACE_DIR", str(tmp_path / "runs"))
+    monkeypatch.setenv("HIVEMIND_DEPENDENCY_ENVS", "0")
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    yield PipelineService(queue=queue, workers=2, max_depth=10, runner=FakeRunner())
+    queue.close()
+
+
+async def wait_for_status(service, job_id, status):
+    for _ in range(200):
+        if service.queue.get(job_id)["status"] == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {service.queue.get(job_id)['status']}, not {status}")
+
+
+def test_jobs_run_with_their_options_and_capture_their_output(service):
+    async def run():
+        await service.start(warm_up=False)
+        try:
+            done = service.submit("hello", generation_mode="direct")
+            failed = service.submit("fail")
+            await wait_for_status(service, done["id"], "succeeded")
+            await wait_for_status(service, failed["id"], "failed")
+        finally:
+            await service.stop()
+        return done, failed
+
+    done, failed = asyncio.run(run())
+    assert ("hello", done["id"], {"generation_mode": "direct"}) in service.runner.calls
+    assert service.queue.get(done["id"])["result"] == {"query": "hello"}
+    assert service.queue.get(failed["id"])["error"] == "RuntimeError: stage failed"
+    assert [line for _, _, line in service.queue.logs(done["id"])] == ["running hello"]
+
+
+def test_cancelling_a_running_job_cancels_its_pipeline(service):
+    async def run():
+        await service.start(warm_up=False)
+        try:
+            job = service.submit("block")
+            await wait_for_status(service, job["id"], "running")
+            await asyncio.sleep(0.01)
+            service.cancel(job["id"])
+            await wait_for_status(service, job["id"], "cancelled")
+            assert service.stats()["busy"] == 0
+        finally:
+            await service.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert service.runner.cancelled == [job["id"]]
+
+
+def test_stopping_queues_a_running_job_again(service):
+    async def run():
+        await service.start(warm_up=False)
+        try:
+            job = service.submit("block")
+            await wait_for_status(service, job["id"], "running")
+            await asyncio.sleep(0.01)
+        finally:
+            await service.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert service.queue.get(job["id"])["status"] == "queued"
+    assert service.runner.cancelled == [job["id"]]
+
+
+def test_prune_keeps_the_workspaces_of_active_jobs(service, tmp_path):
+    service.keep_runs = 1
+    active = service.submit("queued")
+    for run_id in ("old", "newer", active["id"]):
+        os.makedirs(tmp_path / "runs" / run_id)
+    os.utime(tmp_path / "runs" / "old", (0, 0))
+
+    assert service.prune() == {"runs": ["old"], "environments": []}
+    assert sorted(os.listdir(tmp_path / "runs")) == sorted(["newer", active["id"]])
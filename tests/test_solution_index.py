@@ -0,0 +1,48 @@
+import pytest
+
+from solution_index.solution_index import SolutionIndex, normalize_query
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SolutionIndex(str(tmp_path / "solutions.sqlite"), max_entries=3, threshold=0.6)
+    yield index
+    index.close()
+
+
+def test_normalize_query_drops_filler_words_and_inflections():
+    assert normalize_query("Please write a Python script that prints the Fibonacci numbers!") == \
+        normalize_query("write script printing fibonacci number")
+
+
+def test_rephrased_query_is_served_but_other_numbers_are_not(index):
+    index.add("Write a script that prints the fibonacci numbers up to 100", "print(1)", metrics={"build_s": 12.0})
+    match = index.lookup("Please write a python program printing fibonacci numbers up to 100")
+    assert match["code"] == "print(1)" and match["similarity"] >= 0.6
+    assert index.lookup("Write a script that prints the fibonacci numbers up to 50") is None
+    assert index.lookup("Build a FastAPI todo list service") is None
+    stats = index.stats()
+    assert (stats["lookups"], stats["hits"], stats["saved_s"]) == (3, 1, 12.0)
+
+
+def test_least_recently_used_solutions_are_evicted(index):
+    for number, query in enumerate(["sort a list", "reverse a string", "parse a csv file"]):
+        index.add(query, f"print({number})")
+    index.lookup("sort a list")
+    index.add("merge two dictionaries", "print(3)")
+    assert index.lookup("reverse a string") is None
+    assert index.lookup("sort a list")["code"] == "print(0)"
+    assert index.stats()["entries"] == 3
+
+
+def test_solutions_survive_reopening_and_can_be_removed(tmp_path):
+    path = str(tmp_path / "solutions.sqlite")
+    index = SolutionIndex(path)
+    index.add("reverse a string", "print('gnirts')")
+    index.close()
+
+    index = SolutionIndex(path)
+    assert index.lookup("reverse a string")["code"] == "print('gnirts')"
+    assert index.remove("reverse a string")
+    assert index.lookup("reverse a string") is None
+    index.close()
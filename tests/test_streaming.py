@@ -0,0 +1,73 @@
+import pytest
+
+from coding_agent.streaming import IncrementalCodeWriter, StreamAborted, completed_prefix, strip_code_fences
+
+FASTAPI_COMPLETION = '''```python
+from fastapi import FastAPI
+
+app = FastAPI()
+
+
+@app.get("/")
+def read_root():
+    return {"message": "Hello"}
+
+
+@app.get("/fibonacci")
+@app.get("/fib")
+def fibonacci(limit: int = 100):
+    series = [1, 1]
+    while series[-1] + series[-2] <= limit:
+        series.append(series[-1] + series[-2])
+    return {"series": series}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
+```
+Some trailing prose the writer never reads.'''
+
+
+def stream(completion, chunk_size, path, check_every_chars=1):
+    writer = IncrementalCodeWriter(str(path), check_every_chars=check_every_chars)
+    try:
+        for start in range(0, len(completion), chunk_size):
+            if writer.feed(completion[start:start + chunk_size]):
+                break
+        return writer.finish()
+    finally:
+        writer.close()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 23, 4096])
+def test_decorated_definitions_stream_without_aborting(tmp_path, chunk_size):
+    code = stream(FASTAPI_COMPLETION, chunk_size, tmp_path / "app.py")
+    assert code == strip_code_fences(FASTAPI_COMPLETION)
+    assert (tmp_path / "app.py").read_text() == code
+
+
+def test_prefix_never_ends_inside_a_decorator_run():
+    code = 'import os\n\n@first\n@second(1)\ndef f():\n    return 1\n'
+    assert completed_prefix(code) == "import os\n\n"
+    assert completed_prefix(code + "\nx = f(") == code + "\n"
+
+
+def test_prefix_keeps_compound_statements_whole():
+    code = "try:\n    x = 1\nexcept ValueError:\n    x = 2\ny = 3\n"
+    assert completed_prefix(code) == "try:\n    x = 1\nexcept ValueError:\n    x = 2\n"
+
+
+def test_prose_aborts_early(tmp_path):
+    with pytest.raises(StreamAborted, match="prose"):
+        stream("Here is the code you asked for:\n```python\nx = 1\n```", 5, tmp_path / "code.py")
+
+
+def test_truncated_stream_aborts_when_it_ends(tmp_path):
+    with pytest.raises(StreamAborted, match="syntax error"):
+        stream("def f():\n    return (1,\n", 4, tmp_path / "code.py", check_every_chars=10_000)
+
+
+def test_strip_code_fences_leaves_code_untouched():
+    assert strip_code_fences("```python\nprint('python')\n```\nprose") == "print('python')\n"
+    assert strip_code_fences("x = 'python'\n") == "x = 'python'\n"
@@ -0,0 +1,62 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from telemetry.telemetry import TracedChatCompletionClient, run_context, span, summarize
+
+
+class Client:
+    def __init__(self, cached=False):
+        self.cached = cached
+
+    async def create(self, messages, **kwargs):
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+                               cached=self.cached, finish_reason="stop")
+
+    async def create_stream(self, messages, **kwargs):
+        yield "print("
+        yield "1)"
+        yield await self.create(messages)
+
+
+def read_spans(telemetry):
+    with open(telemetry.path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_nest_and_carry_the_run_id(telemetry):
+    with run_context("run-1"):
+        with span("code") as outer:
+            with span("az", kind="executor") as inner:
+                inner.set(exit_code=0)
+        with pytest.raises(RuntimeError):
+            with span("deploy"):
+                raise RuntimeError("boom")
+
+    spans = {record["name"]: record for record in read_spans(telemetry)}
+    assert {record["run_id"] for record in spans.values()} == {"run-1"}
+    assert spans["az"]["parent_id"] == outer.span_id and spans["az"]["exit_code"] == 0
+    assert spans["deploy"]["status"] == "error" and spans["deploy"]["error"] == "RuntimeError: boom"
+
+
+def test_model_calls_record_tokens_and_cache_hits(telemetry):
+    async def run():
+        await TracedChatCompletionClient(Client()).create([], prompt_name="DEVELOPER_AGENT")
+        await TracedChatCompletionClient(Client(cached=True)).create([], prompt_name="DEVELOPER_AGENT")
+        chunks = [chunk async for chunk in
+                  TracedChatCompletionClient(Client()).create_stream([], prompt_name="DEVELOPER_AGENT")]
+        return chunks
+
+    chunks = asyncio.run(run())
+    assert chunks[:2] == ["print(", "1)"]
+
+    summary = summarize(telemetry.path)["llm:DEVELOPER_AGENT"]
+    assert summary["count"] == 3 and summary["cache_hits"] == 1
+    assert (summary["prompt_tokens"], summary["completion_tokens"]) == (200, 40)
+    assert "first_chunk_s" in read_spans(telemetry)[-1]
+
+    metrics = telemetry.render_prometheus()
+    assert 'hivemind_llm_tokens_total{prompt="DEVELOPER_AGENT",type="prompt"} 200' in metrics
+    assert 'hivemind_llm_cache_total{prompt="DEVELOPER_AGENT",result="hit"} 1' in metrics
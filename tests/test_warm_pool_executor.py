@@ -0,0 +1,73 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("autogen_ext")
+
+from qa_tester.warm_pool_executor import WarmInterpreterPool, _restore_cpu_limit, _set_cpu_limit
+
+resource = pytest.importorskip("resource")
+
+
+@pytest.fixture
+def pool():
+    pool = WarmInterpreterPool(size=1, preload=["json"])
+    yield pool
+    pool.shutdown()
+
+
+def write_script(tmp_path, name, code):
+    path = tmp_path / name
+    path.write_text(code)
+    return str(path)
+
+
+def test_cpu_limit_is_restored_to_the_previous_limit():
+    before = resource.getrlimit(resource.RLIMIT_CPU)
+    previous = _set_cpu_limit(60)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    assert previous == before and hard == before[1] and soft != resource.RLIM_INFINITY
+    _restore_cpu_limit(previous)
+    assert resource.getrlimit(resource.RLIMIT_CPU) == before
+
+
+def test_waiting_jobs_do_not_hold_threads(pool, tmp_path):
+    script = write_script(tmp_path, "slow.py", "import time\ntime.sleep(1)\nprint('done')\n")
+
+    async def run():
+        # Two threads: with three jobs queued on a single worker, one stays free
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        jobs = [asyncio.create_task(pool.run(script, str(tmp_path), timeout=30)) for _ in range(3)]
+        await asyncio.sleep(0.3)
+        started = time.monotonic()
+        await asyncio.to_thread(lambda: None)
+        waited = time.monotonic() - started
+        return waited, await asyncio.gather(*jobs)
+
+    waited, results = asyncio.run(run())
+    assert waited < 0.5
+    assert results == [(0, "done\n")] * 3
+
+
+def test_cancelled_job_kills_its_worker_and_frees_its_slot(pool, tmp_path):
+    script = write_script(tmp_path, "forever.py", "import time\ntime.sleep(60)\n")
+    quick = write_script(tmp_path, "quick.py", "print('ok')\n")
+
+    async def run():
+        job = asyncio.create_task(pool.run(script, str(tmp_path), timeout=60))
+        await asyncio.sleep(1)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        assert pool._workers == []
+        return await asyncio.wait_for(pool.run(quick, str(tmp_path), timeout=30), timeout=20)
+
+    assert asyncio.run(run()) == (0, "ok\n")
+
+
+def test_pool_is_usable_from_successive_event_loops(pool, tmp_path):
+    script = write_script(tmp_path, "hello.py", "print('hello')\n")
+    for _ in range(2):
+        assert asyncio.run(pool.run(script, str(tmp_path), timeout=30)) == (0, "hello\n")
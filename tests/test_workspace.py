@@ -0,0 +1,53 @@
+import os
+import time
+
+from workspace.workspace import Workspace, prune_workspaces
+
+
+def make_runs(base_dir, count):
+    now = time.time()
+    run_ids = []
+    for index in range(count):
+        workspace = Workspace(f"run-{index}", base_dir=str(base_dir)).create()
+        # Oldest first, a minute apart
+        mtime = now - (count - index) * 60
+        os.utime(workspace.root, (mtime, mtime))
+        run_ids.append(workspace.run_id)
+    return run_ids
+
+
+def test_prune_keeps_the_newest_runs(tmp_path):
+    run_ids = make_runs(tmp_path, 5)
+    assert sorted(prune_workspaces(str(tmp_path), keep_last=2)) == run_ids[:3]
+    assert sorted(os.listdir(tmp_path)) == run_ids[3:]
+
+
+def test_prune_deletes_old_runs(tmp_path):
+    run_ids = make_runs(tmp_path, 5)
+    assert sorted(prune_workspaces(str(tmp_path), max_age_seconds=150)) == run_ids[:3]
+
+
+def test_prune_never_deletes_excluded_runs(tmp_path):
+    run_ids = make_runs(tmp_path, 4)
+    removed = prune_workspaces(str(tmp_path), keep_last=1, exclude={run_ids[0]})
+    assert sorted(removed) == run_ids[1:3]
+    assert sorted(os.listdir(tmp_path)) == [run_ids[0], run_ids[3]]
+
+
+def test_cleanup_follows_the_retention_policy(tmp_path):
+    failed = Workspace("failed", base_dir=str(tmp_path)).create()
+    succeeded = Workspace("succeeded", base_dir=str(tmp_path)).create()
+    assert not failed.cleanup(False, policy="on_success")
+    assert succeeded.cleanup(True, policy="on_success")
+    assert os.listdir(tmp_path) == ["failed"]
+
+
+def test_runs_get_separate_workspaces(tmp_path, monkeypatch):
+    monkeypatch.setenv("HIVEMIND_WORKSPACE_DIR", str(tmp_path))
+    first, second = Workspace().create(), Workspace().create()
+    assert first.run_id != second.run_id
+    assert os.path.dirname(first.root) == str(tmp_path)
+    for workspace in (first, second):
+        assert all(os.path.isdir(path) for path in (workspace.code_dir, workspace.refactor_dir,
+                                                     workspace.execution_dir))
+    assert not os.path.commonpath([first.code_dir, second.code_dir]).startswith(first.root)
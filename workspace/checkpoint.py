@@ -0,0 +1,145 @@
+"""
+Checkpoint Module
+
+This module persists the outputs of each pipeline stage to a per-run checkpoint store
+(`runs/<run_id>/checkpoint.json`) as soon as the stage completes, so a run that failed
+late (e.g. during deployment) can be resumed without regenerating and retesting its code.
+
+Every stage is recorded with a hash of its inputs. Downstream inputs are derived from
+upstream outputs (the test stage hashes the code it ran, the deploy stage the archive it
+uploaded, ...), so when anything upstream changes every stage after it is invalidated
+and re-run, while unchanged stages are skipped deterministically. Files a stage produced
+are recorded with their content hash and the stage is re-run if they were changed or
+removed.
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import json
+import time
+import hashlib
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def file_sha256(path):
+    """
+    Returns the SHA-256 of a file's content.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def inputs_hash(*values):
+    """
+    Hashes the inputs of a stage.
+
+    Args:
+        *values: JSON-serialisable values the stage's result depends on
+
+    Returns:
+        str: Hex digest
+    """
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Stage outputs of one run, stored as JSON next to the run's workspace.
+
+    Attributes:
+        path (str): Checkpoint file
+        state (dict): "run_id", "query", "options" and the completed "stages"
+    """
+
+    def __init__(self, root, run_id=None):
+        """
+        Loads the checkpoint of a workspace, if any.
+
+        Args:
+            root (str): Workspace root directory
+            run_id (str, optional): Run identifier, recorded in new checkpoints
+        """
+        self.path = os.path.join(root, CHECKPOINT_FILE)
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                self.state = json.load(f)
+        else:
+            self.state = {"run_id": run_id, "query": None, "options": {}, "stages": {}}
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def begin(self, query, options):
+        """
+        Records the query and run options, or checks them against an existing checkpoint.
+
+        Args:
+            query (str): User query of the run
+            options (dict): Run options needed to resume it
+
+        Raises:
+            ValueError: If the checkpoint belongs to a different query
+        """
+        if self.state["query"] is not None and self.state["query"] != query:
+            raise ValueError(f"Run {self.state['run_id']!r} was started for a different query; "
+                             f"use a new run id or resume it with `resume`")
+        self.state["query"] = query
+        self.state["options"] = options
+        self._save()
+
+    def completed(self, stage, stage_inputs):
+        """
+        Returns the outputs of a stage if it completed with the same inputs and its files are intact.
+
+        Args:
+            stage (str): Stage name
+            stage_inputs (str): Hash of the stage's inputs (see `inputs_hash`)
+
+        Returns:
+            dict: Recorded outputs, or None if the stage has to run
+        """
+        entry = self.state["stages"].get(stage)
+        if entry is None or entry["inputs"] != stage_inputs:
+            return None
+        for path, digest in entry["files"].items():
+            if not os.path.exists(path) or file_sha256(path) != digest:
+                return None
+        return entry["outputs"]
+
+    def record(self, stage, stage_inputs, outputs, files=()):
+        """
+        Records a completed stage.
+
+        Args:
+            stage (str): Stage name
+            stage_inputs (str): Hash of the stage's inputs (see `inputs_hash`)
+            outputs (dict): JSON-serialisable outputs of the stage
+            files (iterable, optional): Files the stage produced, checked on resume
+        """
+        self.state["stages"][stage] = {
+            "inputs": stage_inputs,
+            "outputs": outputs,
+            "files": {path: file_sha256(path) for path in files},
+            "completed_at": time.time(),
+        }
+        self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temporary_path, self.path)
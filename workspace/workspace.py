@@ -0,0 +1,125 @@
+"""
+Workspace Module
+
+This module provides run-scoped workspaces so that several pipelines can run side by side
+without overwriting each other's generated code, execution files, fixes or zip packages.
+
+Every run gets its own directory keyed by a run id:
+
+    runs/<run_id>/
+    ├── code/            # generated code (packaged and deployed)
+    ├── code_refactor/   # refactored code produced by the fix path
+    ├── code_optimized/  # optional profile-guided rewrite
+    ├── execution/       # working directory of the code executor
+    └── checkpoint.json  # completed stages, for resuming (see workspace/checkpoint.py)
+
+Author: AI Vectorial
+Date: 2026-10-17
+"""
+
+import os
+import time
+import uuid
+import shutil
+
+RETENTION_POLICIES = ("keep", "on_success", "always")
+
+
+class Workspace:
+    """
+    A directory tree that holds every artifact of a single pipeline run.
+
+    Attributes:
+        run_id (str): Unique identifier of the run
+        root (str): Root directory of the workspace
+        code_dir (str): Directory for the generated code
+        refactor_dir (str): Directory for refactored code
+        optimized_dir (str): Directory for the optimized rewrite
+        execution_dir (str): Working directory for the code executor
+    """
+
+    def __init__(self, run_id=None, base_dir=None):
+        """
+        Initializes the workspace paths. Nothing is created on disk until `create` is called.
+
+        Args:
+            run_id (str, optional): Run identifier. A random uuid is used when omitted.
+            base_dir (str, optional): Parent directory of all workspaces.
+                Defaults to $HIVEMIND_WORKSPACE_DIR or "runs".
+        """
+        self.run_id = run_id or uuid.uuid4().hex
+        self.base_dir = base_dir or os.getenv("HIVEMIND_WORKSPACE_DIR", "runs")
+        self.root = os.path.join(self.base_dir, self.run_id)
+        self.code_dir = os.path.join(self.root, "code")
+        self.refactor_dir = os.path.join(self.root, "code_refactor")
+        self.optimized_dir = os.path.join(self.root, "code_optimized")
+        self.execution_dir = os.path.join(self.root, "execution")
+
+    def create(self):
+        """
+        Creates the workspace directories.
+
+        Returns:
+            Workspace: The workspace itself, for chaining
+        """
+        for path in (self.code_dir, self.refactor_dir, self.execution_dir):
+            os.makedirs(path, exist_ok=True)
+        return self
+
+    def cleanup(self, succeeded, policy="keep"):
+        """
+        Removes the workspace according to a retention policy.
+
+        Args:
+            succeeded (bool): Whether the run finished successfully
+            policy (str, optional): One of "keep" (never delete), "on_success"
+                (delete successful runs, keep failures for debugging) or "always".
+                Defaults to "keep".
+
+        Returns:
+            bool: True if the workspace was deleted
+        """
+        if policy not in RETENTION_POLICIES:
+            raise ValueError(f"Unknown retention policy {policy!r}, expected one of {RETENTION_POLICIES}")
+
+        if policy == "always" or (policy == "on_success" and succeeded):
+            shutil.rmtree(self.root, ignore_errors=True)
+            return True
+        return False
+
+
+def prune_workspaces(base_dir=None, keep_last=None, max_age_seconds=None, exclude=()):
+    """
+    Deletes old workspaces from the workspace directory.
+
+    Args:
+        base_dir (str, optional): Parent directory of all workspaces.
+            Defaults to $HIVEMIND_WORKSPACE_DIR or "runs".
+        keep_last (int, optional): Keep only the N most recently modified workspaces
+        max_age_seconds (float, optional): Delete workspaces older than this
+        exclude (iterable, optional): Run ids never deleted, e.g. runs still in progress
+
+    Returns:
+        list: Run ids of the deleted workspaces
+    """
+    base_dir = base_dir or os.getenv("HIVEMIND_WORKSPACE_DIR", "runs")
+    if not os.path.isdir(base_dir):
+        return []
+
+    exclude = set(exclude)
+    entries = []
+    for run_id in os.listdir(base_dir):
+        path = os.path.join(base_dir, run_id)
+        if os.path.isdir(path) and run_id not in exclude:
+            entries.append((os.path.getmtime(path), run_id, path))
+    entries.sort(reverse=True)
+
+    now = time.time()
+    removed = []
+    for index, (mtime, run_id, path) in enumerate(entries):
+        too_many = keep_last is not None and index >= keep_last
+        too_old = max_age_seconds is not None and now - mtime > max_age_seconds
+        if too_many or too_old:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(run_id)
+    return removed